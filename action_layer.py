@@ -2,11 +2,18 @@
 Action Layer: Intervention Engine
 Delivers psychologically calibrated nudges and hard locks
 """
-import google.generativeai as genai
 from typing import Dict
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+import uuid
 
-from config import PRIMARY_MODEL
+from config import HARD_LOCK_DURATION, INSTANT_INTERVENTION_SEVERITIES, INTERVENTION_PERSONALIZE_WORKERS
+from intervention_history import InterventionHistory
+from intervention_library import InterventionLibrary
+from intervention_scheduler import InterventionScheduler
+from llm_client import BREAKER, CircuitOpenError, configure, generate, routed_model
+from metrics import is_rate_limit, record_fallback, record_intervention_suppressed, record_retry
 
 import time
 import random
@@ -14,35 +21,80 @@ import random
 class InterventionEngine:
     """Generates context-aware interventions using Persona Engine"""
     
+    # Deterministic messages used when the LLM is skipped (deadline budget exhausted)
+    TEMPLATES = {
+        'SOFT_NUDGE': "Your activity is picking up in a {regime} market (tilt {score}/10). "
+                      "Take a breath and re-check your plan before the next order.",
+        'CRITICAL': "Tilt warning: {score}/10 in a {regime} market, and this matches your "
+                    "{revenge} past revenge patterns. Step back before placing another trade.",
+        'HARD_LOCK': "Recovery mode: tilt {score}/10 in a {regime} market. Trading is paused "
+                     "so you can reset - this is the pattern that has cost you before."
+    }
+    
     def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(PRIMARY_MODEL)
-        self.intervention_history = []
+        configure(api_key)
+        self.model = routed_model()
+        self.intervention_history = InterventionHistory()
+        self.scheduler = InterventionScheduler()
+        self.library = InterventionLibrary()
+        
+        # LLM personalization of library interventions runs off the delivery path
+        self._personalizer = ThreadPoolExecutor(max_workers=INTERVENTION_PERSONALIZE_WORKERS,
+                                                thread_name_prefix="intervention-llm")
+        self._pending = set()
+        self._pending_lock = threading.Lock()
     
-    def _generate_with_retry(self, prompt, max_retries=3, base_delay=2):
+    def _generate_with_retry(self, prompt, max_retries=3, base_delay=2, deadline=None):
         """Helper to handle rate limits with exponential backoff"""
         for attempt in range(max_retries):
             try:
-                return self.model.generate_content(prompt)
+                return generate(self.model, prompt, 'intervention_engine', 'generate_intervention')
             except Exception as e:
-                if "429" in str(e) or "Too Many Requests" in str(e):
+                if is_rate_limit(e) and not BREAKER.is_open():
                     if attempt < max_retries - 1:
                         sleep_time = (base_delay * (2 ** attempt)) + random.uniform(0, 1)
                         print(f"⚠️ Intervention Engine: Rate limit hit. Retrying in {sleep_time:.1f}s...")
-                        time.sleep(sleep_time)
+                        record_retry('intervention_engine', 'generate_intervention')
+                        if deadline is not None:
+                            deadline.sleep(sleep_time)
+                        else:
+                            time.sleep(sleep_time)
                         continue
                 if attempt == max_retries - 1:
                     raise e
                 raise e
 
-    def generate_intervention(self, tilt_analysis: Dict, trader_profile: Dict, market_state: Dict) -> Dict:
-        """Creates calibrated intervention message"""
+    def generate_intervention(self, tilt_analysis: Dict, trader_profile: Dict, market_state: Dict,
+                              use_llm: bool = True, deadline=None, trader_id: str = 'default',
+                              deliver: bool = True) -> Dict:
+        """
+        Creates calibrated intervention message.
+        While a lock/cooldown is active (or the hourly cap is reached) the trader gets
+        the active intervention back, flagged 'repeated', without a new generation.
+        With deliver=False the new intervention is only generated; the caller records
+        it with `deliver` (a deadline-abandoned generation must not count as delivered).
+        """
         
         severity = self._assess_severity(tilt_analysis)
         
         if severity == "NONE":
             return {'type': 'NONE', 'message': None}
         
+        repeated = self.scheduler.active_intervention(trader_id, severity)
+        if repeated is not None:
+            record_intervention_suppressed(repeated['repeat_reason'])
+            return repeated
+        if self.scheduler.at_hourly_limit(trader_id):
+            # Only an escalation to HARD_LOCK gets here: deliver it, but not with a fresh LLM message
+            record_intervention_suppressed('hourly_cap_templated')
+            use_llm = False
+        
+        record = self.deliver if deliver else (lambda intervention, trader_id: intervention)
+        
+        if not use_llm:
+            return record(self._templated_intervention(severity, tilt_analysis, trader_profile, market_state),
+                          trader_id)
+        
         # Build context for LLM
         prompt = f"""You are a trading psychology coach. Generate an intervention message.
 
@@ -62,20 +114,106 @@ Generate a message that:
 
 Keep it under 100 words. Be direct."""
 
+        if severity in INSTANT_INTERVENTION_SEVERITIES and self.library.covers(severity):
+            # A lockout must appear the moment it is triggered: serve the library message now
+            intervention = self._library_intervention(severity, tilt_analysis, trader_profile, market_state,
+                                                      trader_id)
+            record(intervention, trader_id)
+            self._personalize_async(intervention, prompt)
+            return intervention
+        
         try:
-            response = self._generate_with_retry(prompt)
+            response = self._generate_with_retry(prompt, deadline=deadline)
             intervention = {
                 'type': severity,
                 'message': response.text,
                 'timestamp': datetime.now().isoformat(),
                 'requires_ui_lock': severity in ['HARD_LOCK', 'CRITICAL']
             }
-            
-            self.intervention_history.append(intervention)
-            return intervention
+            return record(intervention, trader_id)
             
         except Exception as e:
-            return {'type': 'ERROR', 'message': f'Failed to generate intervention: {str(e)}'}
+            # Rate limited, circuit open, out of budget...: the trader still gets a calibrated message
+            if not isinstance(e, CircuitOpenError):
+                print(f"Intervention generation failed, using template: {e}")
+            record_fallback('intervention_engine', 'template')
+            return record(self._templated_intervention(severity, tilt_analysis, trader_profile, market_state),
+                          trader_id)
+    
+    def deliver(self, intervention: Dict, trader_id: str = 'default') -> Dict:
+        """Records a generated intervention: history, hourly cap and lock/cooldown window"""
+        intervention.setdefault('id', uuid.uuid4().hex[:12])
+        self.intervention_history.append(intervention)
+        self.scheduler.record(trader_id, intervention)
+        return intervention
+    
+    def _library_intervention(self, severity: str, tilt_analysis: Dict, trader_profile: Dict,
+                              market_state: Dict, trader_id: str) -> Dict:
+        """Precomputed message for (severity, dominant bias, regime); no LLM call"""
+        return {
+            'type': severity,
+            'message': self.library.message(
+                severity, trader_profile.get('dominant_bias'), market_state.get('regime'),
+                tilt_analysis.get('tilt_score', 0), trader_id
+            ),
+            'timestamp': datetime.now().isoformat(),
+            'requires_ui_lock': severity in ['HARD_LOCK', 'CRITICAL'],
+            'source': 'library',
+            'personalized': False
+        }
+    
+    def _personalize_async(self, intervention: Dict, prompt: str):
+        future = self._personalizer.submit(self._personalize, intervention, prompt)
+        with self._pending_lock:
+            self._pending.add(future)
+        future.add_done_callback(self._forget_pending)
+    
+    def _forget_pending(self, future):
+        with self._pending_lock:
+            self._pending.discard(future)
+    
+    def _personalize(self, intervention: Dict, prompt: str):
+        """Swaps the LLM message into an already delivered library intervention"""
+        try:
+            message = self._generate_with_retry(prompt).text
+        except Exception as e:
+            if not isinstance(e, CircuitOpenError):
+                print(f"Intervention personalization failed, keeping library message: {e}")
+            record_fallback('intervention_engine', 'library')
+            return
+        intervention['message'] = message
+        intervention['personalized'] = True
+        if 'ui' in intervention:
+            intervention['ui']['message'] = message
+    
+    def wait_for_personalization(self, timeout: float = None) -> bool:
+        """Blocks until pending personalizations finish; True if none are left"""
+        with self._pending_lock:
+            pending = list(self._pending)
+        return not wait(pending, timeout=timeout).not_done
+    
+    def find_intervention(self, intervention_id: str) -> Dict:
+        """Recent intervention by id (clients poll it to pick up the personalized message)"""
+        for intervention in reversed(self.intervention_history.recent()):
+            if intervention.get('id') == intervention_id:
+                return intervention
+        return None
+    
+    def _templated_intervention(self, severity: str, tilt_analysis: Dict, trader_profile: Dict,
+                                market_state: Dict) -> Dict:
+        """Intervention from TEMPLATES without an LLM call"""
+        intervention = {
+            'type': severity,
+            'message': self.TEMPLATES[severity].format(
+                score=tilt_analysis.get('tilt_score', 0),
+                regime=market_state.get('regime', 'UNKNOWN'),
+                revenge=trader_profile.get('revenge_signals', 0)
+            ),
+            'timestamp': datetime.now().isoformat(),
+            'requires_ui_lock': severity in ['HARD_LOCK', 'CRITICAL'],
+            'templated': True
+        }
+        return intervention
     
     def _assess_severity(self, tilt_analysis: Dict) -> str:
         """Maps tilt score to intervention type"""
@@ -99,7 +237,7 @@ Keep it under 100 words. Be direct."""
                 'title': '🚨 RECOVERY MODE DETECTED',
                 'message': intervention['message'],
                 'action': 'LOCK_TRADING',
-                'duration_minutes': 5,
+                'duration_minutes': HARD_LOCK_DURATION,
                 'color': 'red',
                 'historical_ref': historical_reference or 'Previous blowup pattern detected'
             }
@@ -125,15 +263,5 @@ Keep it under 100 words. Be direct."""
         return {'title': 'System OK', 'message': 'No intervention needed', 'action': 'NONE'}
     
     def get_intervention_stats(self) -> Dict:
-        """Returns intervention history analytics"""
-        if not self.intervention_history:
-            return {'total': 0}
-        
-        types = [i['type'] for i in self.intervention_history]
-        return {
-            'total': len(self.intervention_history),
-            'soft_nudges': types.count('SOFT_NUDGE'),
-            'critical_warnings': types.count('CRITICAL'),
-            'hard_locks': types.count('HARD_LOCK'),
-            'last_intervention': self.intervention_history[-1]['timestamp']
-        }
+        """Returns intervention history analytics (running counters, constant-time)"""
+        return self.intervention_history.stats()
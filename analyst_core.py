@@ -1,31 +1,30 @@
-import google.generativeai as genai
 import json
 import os
 
-from config import PRIMARY_MODEL
+from llm_client import BREAKER, configure, generate, routed_model
+from metrics import is_rate_limit, record_retry
 
 import time
 import random
 
 class PsychoAnalyst:
     def __init__(self, api_key):
-        if not api_key:
-            raise ValueError("API Key is required")
-        genai.configure(api_key=api_key)
+        configure(api_key, required=True)  # No key needed on the offline fake backend
         # Using configured primary model
-        self.model = genai.GenerativeModel(PRIMARY_MODEL)
+        self.model = routed_model()
 
-    def _generate_with_retry(self, prompt, max_retries=3, base_delay=2):
+    def _generate_with_retry(self, prompt, max_retries=3, base_delay=2, endpoint='analyze_behavior'):
         """Helper to handle rate limits with exponential backoff"""
         for attempt in range(max_retries):
             try:
-                return self.model.generate_content(prompt)
+                return generate(self.model, prompt, 'psycho_analyst', endpoint)
             except Exception as e:
-                if "429" in str(e) or "Too Many Requests" in str(e):
+                if is_rate_limit(e) and not BREAKER.is_open():
                     if attempt < max_retries - 1:
                         # Exponential backoff + jitter
                         sleep_time = (base_delay * (2 ** attempt)) + random.uniform(0, 1)
                         print(f"⚠️ Rate limit hit. Retrying in {sleep_time:.1f}s...")
+                        record_retry('psycho_analyst', endpoint)
                         time.sleep(sleep_time)
                         continue
                 # If not a rate limit or retries exhausted, re-raise or return error
@@ -78,7 +77,7 @@ class PsychoAnalyst:
         Example: "Market is choppy—don't force a trade just to feel productive."
         """
         try:
-            response = self._generate_with_retry(prompt)
+            response = self._generate_with_retry(prompt, endpoint='get_realtime_nudge')
             return response.text
         except Exception as e:
             return "Stay disciplined. (System offline)"
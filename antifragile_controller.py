@@ -3,14 +3,49 @@ Orchestration Layer: Lead Controller
 Coordinates the Perceive-Reason-Intervene loop across all agents
 Enhanced with Market Intelligence and Social Content capabilities
 """
-from perception_layer import MarketStreamProcessor, UserStreamProcessor
+from perception_layer import MarketStreamProcessor, MarketSnapshotPoller, UserStreamProcessor
 from cognitive_layer import MarketAnalystAgent, ProfilerAgent, TiltDetectorAgent
 from action_layer import InterventionEngine
 from market_intelligence import MarketIntelligence
 from persona_bot import PersonaBot
-from typing import Dict, List
+from regime_scanner import RegimeScanner
+from cache_warmer import CacheWarmer
+from telemetry_journal import TelemetryJournal
+from request_context import RequestContext
+from deadline import Deadline
+from stage_graph import StageGraph
+from llm_client import BREAKER, configure, routed_model
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+import threading
+import time
 import pandas as pd
 
+import config
+
+
+class LazyAgent:
+    """
+    Attribute built by `factory(controller)` on first access and then stored on the
+    instance (so tests and callers can still assign it). Construction is serialized
+    per controller, so concurrent stages never build the same agent twice.
+    """
+    
+    def __init__(self, factory: Callable):
+        self.factory = factory
+    
+    def __set_name__(self, owner, name):
+        self.name = name
+    
+    def __get__(self, controller, owner=None):
+        if controller is None:
+            return self
+        with controller._agent_lock:
+            if self.name not in controller.__dict__:
+                controller.__dict__[self.name] = self.factory(controller)
+        return controller.__dict__[self.name]
+
+
 class AntifragileController:
     """
     Lead Controller for the Antifragile Mirror System
@@ -18,29 +53,53 @@ class AntifragileController:
     Now includes Market Intelligence and Social Content generation
     """
     
-    def __init__(self, api_key: str):
-        # Perception Layer
-        self.market_stream = MarketStreamProcessor()
-        self.user_stream = UserStreamProcessor()
-        
-        # Cognitive Layer
-        self.market_analyst = MarketAnalystAgent(api_key)
-        self.profiler = ProfilerAgent(api_key)
-        self.tilt_detector = TiltDetectorAgent(api_key)
-        
-        # Action Layer
-        self.intervention_engine = InterventionEngine(api_key)
-        
-        # NEW: Market Intelligence Layer
-        self.market_intelligence = MarketIntelligence(api_key)
+    # Agents are built on first use, so a controller is cheap enough to create per session
+    market_stream = LazyAgent(lambda self: MarketStreamProcessor())
+    user_stream = LazyAgent(lambda self: UserStreamProcessor(journal=(
+        TelemetryJournal(config.TELEMETRY_JOURNAL_PATH) if config.ENABLE_TELEMETRY_JOURNAL else None
+    ), trader_id=self.trader_id))
+    market_analyst = LazyAgent(lambda self: MarketAnalystAgent(self._api_key))
+    profiler = LazyAgent(lambda self: ProfilerAgent(self._api_key))
+    tilt_detector = LazyAgent(lambda self: TiltDetectorAgent(self._api_key))
+    intervention_engine = LazyAgent(lambda self: InterventionEngine(self._api_key))
+    market_intelligence = LazyAgent(lambda self: MarketIntelligence(self._api_key))
+    persona_bot = LazyAgent(lambda self: PersonaBot(self._api_key))
+    insight_model = LazyAgent(lambda self: routed_model())
+    
+    def __init__(self, api_key: str, trader_id: int = None):
+        # Fail fast on a missing key instead of on the first request that builds an agent
+        configure(api_key, required=True)
+        self._api_key = api_key
+        self.trader_id = config.DEFAULT_TRADER_ID if trader_id is None else trader_id  # Tags journaled events
+        self._agent_lock = threading.RLock()
+        self.market_poller = None
+        self.regime_scanner = None
+        self.cache_warmer = None
         
-        # NEW: Social Content Layer
-        self.persona_bot = PersonaBot(api_key)
+        # Budgeted stages run here so a slow LLM call can be abandoned at the deadline
+        # (worker threads are only spawned when stages are submitted)
+        self._stage_pool = ThreadPoolExecutor(max_workers=config.STAGE_MAX_WORKERS, thread_name_prefix="analyst-stage")
         
         # System state
         self.trader_profile = {}
         self.current_market_state = {}
         self.system_active = True
+        
+        # Delta gating: last loop's reasoning, reused while the perception fingerprint holds
+        self.clock = time.monotonic
+        self._last_reasoning = None
+    
+    def warm_up(self) -> List[str]:
+        """Builds every agent now instead of on first use; returns their names"""
+        for name, attr in vars(type(self)).items():
+            if isinstance(attr, LazyAgent):
+                getattr(self, name)
+        return self.built_agents()
+    
+    def built_agents(self) -> List[str]:
+        """Names of the agents constructed so far"""
+        return [name for name, attr in vars(type(self)).items()
+                if isinstance(attr, LazyAgent) and name in self.__dict__]
     
     def initialize_trader_profile(self, trades_df: pd.DataFrame):
         """One-time profiling of trader's historical behavior"""
@@ -48,15 +107,90 @@ class AntifragileController:
         self.trader_profile = self.profiler.profile_trader(trades_df)
         bias_type = self.profiler.detect_bias_type(self.trader_profile)
         self.trader_profile['dominant_bias'] = bias_type
+        self._last_reasoning = None  # Reasoning was based on the previous profile
         print(f"Profile complete. Dominant bias: {bias_type}")
         return self.trader_profile
     
-    def perceive(self, ticker: str, user_action: str = None, action_metadata: Dict = None):
+    def start_market_poller(self, watchlist: List[str] = None, interval_seconds: float = None):
+        """Starts background refresh of market snapshots so perceive() reads them hot"""
+        if self.market_poller is None:
+            self.market_poller = MarketSnapshotPoller(
+                self.market_stream,
+                watchlist or config.MARKET_WATCHLIST,
+                interval_seconds or config.MARKET_POLL_INTERVAL_SECONDS
+            )
+        self.market_poller.start()
+        return self.market_poller
+    
+    def stop_market_poller(self):
+        if self.market_poller is not None:
+            self.market_poller.stop()
+    
+    def start_regime_scanner(self, universe: List[str] = None, interval_seconds: float = None):
+        """Starts the market-wide regime scanner (one panel download per refresh)"""
+        if self.regime_scanner is None:
+            self.regime_scanner = RegimeScanner(universe or config.REGIME_SCAN_UNIVERSE)
+        self.regime_scanner.start(interval_seconds or config.REGIME_SCAN_INTERVAL_SECONDS)
+        return self.regime_scanner
+    
+    def stop_regime_scanner(self):
+        if self.regime_scanner is not None:
+            self.regime_scanner.stop()
+    
+    def start_cache_warmer(self, watchlist: List[str] = None):
+        """Schedules daily pre-market warming of data, briefing and persona caches"""
+        if self.cache_warmer is None:
+            self.cache_warmer = CacheWarmer(self, watchlist)
+        self.cache_warmer.start()
+        return self.cache_warmer
+    
+    def stop_cache_warmer(self):
+        if self.cache_warmer is not None:
+            self.cache_warmer.stop()
+    
+    def close_journal(self):
+        """Flushes and closes the telemetry journal (call on shutdown)"""
+        if 'user_stream' in self.built_agents() and self.user_stream.journal is not None:
+            self.user_stream.journal.close()
+            self.user_stream.journal = None
+    
+    def close_stage_pool(self):
+        """Releases the stage worker threads (call on shutdown; abandoned stages finish in the background)"""
+        self._stage_pool.shutdown(wait=False)
+    
+    def get_regime_map(self) -> Dict:
+        """Returns the latest market-wide regime map (scans once if the scanner is not running)"""
+        if self.regime_scanner is None:
+            self.regime_scanner = RegimeScanner(config.REGIME_SCAN_UNIVERSE)
+        if self.regime_scanner.last_scan is None:
+            self.regime_scanner.refresh()
+        return {
+            'regimes': self.regime_scanner.regime_map(),
+            'last_scan': self.regime_scanner.last_scan
+        }
+    
+    def new_context(self) -> RequestContext:
+        """
+        Request-scoped data context: pass it to every call in one user flow so each
+        ticker's market state, technicals, news and perception are fetched once
+        """
+        return RequestContext(self.market_intelligence, self.market_stream)
+    
+    def perceive(self, ticker: str, user_action: str = None, action_metadata: Dict = None,
+                 context: RequestContext = None):
         """
         PERCEIVE: Capture market + user state
         """
+        if context is not None and not user_action:
+            # Nothing new to record, so the perception already taken in this request still holds
+            perception = context.memo(('perception', ticker), lambda: self._perceive(ticker, None, None, context))
+            self.current_market_state = perception['market']
+            return perception
+        return self._perceive(ticker, user_action, action_metadata, context)
+    
+    def _perceive(self, ticker: str, user_action: str, action_metadata: Dict, context: RequestContext) -> Dict:
         # Market perception
-        self.current_market_state = self.market_stream.capture_market_state(ticker)
+        self.current_market_state = (context or self.market_stream).capture_market_state(ticker)
         
         # User perception
         if user_action:
@@ -69,42 +203,11 @@ class AntifragileController:
             'user': user_behavior
         }
     
-    def reason(self, perception: Dict) -> Dict:
-        """
-        REASON: Multi-agent analysis
-        """
-        market_state = perception['market']
-        user_behavior = perception['user']
-        
-        # Agent 1: Market Analyst
-        regime_analysis = self.market_analyst.analyze_regime(market_state)
-        
-        # Agent 2: Profiler (uses cached profile)
-        # Profile is already computed, just reference it
-        
-        # Agent 3: Tilt Detector (cross-references all data)
-        tilt_analysis = self.tilt_detector.detect_tilt(
-            market_state,
-            user_behavior,
-            self.trader_profile
-        )
-        
-        return {
-            'regime': regime_analysis,
-            'tilt': tilt_analysis,
-            'profile': self.trader_profile
-        }
-    
-    def intervene(self, reasoning: Dict) -> Dict:
-        """
-        INTERVENE: Generate and deliver intervention
-        """
-        tilt_analysis = reasoning['tilt']
-        
+    def _generate_intervention(self, tilt_analysis: Dict, use_llm: bool = True, deadline: Deadline = None) -> Dict:
+        """Intervention stage: generated only, `_deliver_intervention` records the one the graph kept"""
         intervention = self.intervention_engine.generate_intervention(
-            tilt_analysis,
-            self.trader_profile,
-            self.current_market_state
+            tilt_analysis, self.trader_profile, self.current_market_state,
+            use_llm=use_llm, deadline=deadline, deliver=False
         )
         
         # Create UI overlay if needed
@@ -117,7 +220,20 @@ class AntifragileController:
         
         return intervention
     
-    def run_cognitive_loop(self, ticker: str, trades_df: pd.DataFrame, user_action: str = None) -> Dict:
+    def _deliver_intervention(self, results: Dict, gate: Dict):
+        """
+        Records the intervention once, after the graph has settled on it.
+        An LLM generation abandoned at the deadline may still finish later, but
+        only the result kept by the graph (usually the fallback) is delivered;
+        reused and repeated interventions were recorded when first delivered.
+        """
+        intervention = results['intervention']
+        if gate.get('previous') or intervention['type'] == 'NONE' or intervention.get('repeated'):
+            return
+        self.intervention_engine.deliver(intervention)
+    
+    def run_cognitive_loop(self, ticker: str, trades_df: pd.DataFrame, user_action: str = None,
+                           deadline: Deadline = None, context: RequestContext = None) -> Dict:
         """
         Full Perceive-Reason-Intervene cycle
         """
@@ -125,55 +241,152 @@ class AntifragileController:
         if not self.trader_profile:
             self.initialize_trader_profile(trades_df)
         
-        # PERCEIVE
-        perception = self.perceive(ticker, user_action)
+        gate = {}
+        graph = self._cognitive_graph(ticker, user_action, deadline, context, gate)
+        results, timings = graph.run(self._stage_pool, deadline)
+        self._deliver_intervention(results, gate)
+        if deadline is not None:
+            self._flag_degraded(results, deadline)
+        self._remember_reasoning(results, timings, gate)
+        return {**self._behavioral_analysis(results, gate), 'stage_timings': timings}
+    
+    def _cognitive_graph(self, ticker: str, user_action: str = None, deadline: Deadline = None,
+                         context: RequestContext = None, gate: Dict = None) -> StageGraph:
+        """
+        PERCEIVE -> (REGIME || TILT) -> INTERVENE as a stage graph.
+        Regime and tilt only depend on the perception, so they run concurrently.
+        When the perception fingerprint matches the last loop within the staleness
+        window, the reasoning stages return the previous results (`gate['previous']`).
+        """
+        gate = {} if gate is None else gate
+        
+        def market(r):
+            return r['perceive']['market']
+        
+        def perceive(r):
+            perception = self.perceive(ticker, user_action, context=context)
+            gate['fingerprint'] = self.perception_fingerprint(perception)
+            gate['previous'] = self._reusable_reasoning(gate['fingerprint'])
+            return perception
         
-        # REASON
-        reasoning = self.reason(perception)
+        def reuse_or(stage, func):
+            def run(r):
+                previous = gate.get('previous')
+                return previous[stage] if previous else func(r)
+            return run
         
-        # INTERVENE
-        intervention = self.intervene(reasoning)
+        def detect_tilt(r, use_llm=True):
+            return self.tilt_detector.detect_tilt(market(r), r['perceive']['user'], self.trader_profile,
+                                                  use_llm=use_llm)
         
+        graph = StageGraph()
+        graph.add('perceive', perceive)
+        graph.add('regime', reuse_or('regime', lambda r: self.market_analyst.analyze_regime(market(r))),
+                  deps=('perceive',),
+                  fallback=lambda r: self.market_analyst.analyze_regime(market(r), use_llm=False))
+        graph.add('tilt', reuse_or('tilt', detect_tilt), deps=('perceive',),
+                  fallback=lambda r: detect_tilt(r, use_llm=False))
+        graph.add('intervention',
+                  reuse_or('intervention', lambda r: self._generate_intervention(r['tilt'], deadline=deadline)),
+                  deps=('tilt',), fallback=lambda r: self._generate_intervention(r['tilt'], use_llm=False))
+        return graph
+    
+    @staticmethod
+    def perception_fingerprint(perception: Dict) -> tuple:
+        """What the reasoning stages depend on: regime, volatility bucket, erratic flag, action counts"""
+        market, user = perception['market'], perception['user']
+        return (
+            market.get('ticker'),
+            market.get('regime'),
+            int((market.get('volatility') or 0) // config.PERCEPTION_VOLATILITY_BUCKET),
+            bool(user.get('is_erratic')),
+            user.get('total_actions', 0),
+            user.get('cancel_count', 0),
+            user.get('order_count', 0)
+        )
+    
+    def _reusable_reasoning(self, fingerprint: tuple) -> Dict:
+        """Previous loop's regime/tilt/intervention if nothing material changed since"""
+        last = self._last_reasoning
+        if config.PERCEPTION_STALENESS_SECONDS <= 0 or last is None or last['fingerprint'] != fingerprint:
+            return None
+        if self.clock() - last['at'] > config.PERCEPTION_STALENESS_SECONDS:
+            return None
+        return last
+    
+    def _remember_reasoning(self, results: Dict, timings: Dict, gate: Dict):
+        """Keeps fresh, fully LLM-backed reasoning for reuse; fallbacks are never reused"""
+        if gate.get('previous') or 'fingerprint' not in gate:
+            return
+        stages = {stage: results.get(stage) for stage in ('regime', 'tilt', 'intervention')}
+        if any(timings[stage]['status'] != 'ok' or not isinstance(value, dict)
+               or value.get('fallback_mode') or value.get('templated')
+               for stage, value in stages.items()):
+            return
+        self._last_reasoning = {'fingerprint': gate['fingerprint'], 'at': self.clock(), **stages}
+    
+    def _behavioral_analysis(self, results: Dict, gate: Dict = None) -> Dict:
         return {
-            'perception': perception,
-            'reasoning': reasoning,
-            'intervention': intervention,
+            'perception': results['perceive'],
+            'reasoning': {
+                'regime': results['regime'],
+                'tilt': results['tilt'],
+                'profile': self.trader_profile
+            },
+            'intervention': results['intervention'],
+            'reasoning_reused': bool(gate and gate.get('previous')),
             'system_status': 'ACTIVE' if self.system_active else 'PAUSED'
         }
     
+    def get_intervention(self, intervention_id: str) -> Dict:
+        """Current state of a delivered intervention (library message until personalized)"""
+        return self.intervention_engine.find_intervention(intervention_id)
+    
     def get_system_diagnostics(self) -> Dict:
         """Returns full system state for debugging"""
         return {
             'trader_profile': self.trader_profile,
             'current_market': self.current_market_state,
             'intervention_stats': self.intervention_engine.get_intervention_stats(),
-            'user_interaction_count': len(self.user_stream.interaction_buffer)
+            'intervention_schedule': self.intervention_engine.scheduler.snapshot('default'),
+            'user_interaction_count': len(self.user_stream.interaction_buffer),
+            'market_poller': {
+                'running': self.market_poller is not None and self.market_poller.is_running,
+                'cycles': self.market_poller.cycles if self.market_poller else 0,
+                'last_cycle_seconds': round(self.market_poller.last_cycle_seconds, 3) if self.market_poller else 0,
+                'hot_tickers': self.market_stream.snapshots.tickers()
+            },
+            'llm_circuit': BREAKER.snapshot()
         }
     
     # ===== NEW: Market Intelligence Methods =====
     
-    def explain_market_move(self, ticker: str) -> Dict:
+    def explain_market_move(self, ticker: str, context: RequestContext = None) -> Dict:
         """
         Generates a comprehensive "Why it moved" explanation for a ticker.
         Combines news, technicals, and LLM analysis.
         """
-        return self.market_intelligence.explain_market_move(ticker)
+        return self.market_intelligence.explain_market_move(ticker, context=context)
+    
+    def explain_market_moves(self, tickers: List[str], context: RequestContext = None) -> Dict[str, Dict]:
+        """Batched "Why it moved" explanations for a watchlist (one LLM call per token budget)."""
+        return self.market_intelligence.explain_market_moves(tickers, context=context)
     
-    def get_market_technicals(self, ticker: str) -> Dict:
+    def get_market_technicals(self, ticker: str, context: RequestContext = None) -> Dict:
         """Returns technical indicators for a ticker."""
-        return self.market_intelligence.calculate_technicals(ticker)
+        return (context or self.market_intelligence).calculate_technicals(ticker)
     
-    def get_market_news(self, ticker: str) -> List[Dict]:
+    def get_market_news(self, ticker: str, context: RequestContext = None) -> List[Dict]:
         """Returns recent news for a ticker."""
-        return self.market_intelligence.fetch_news(ticker)
+        return (context or self.market_intelligence).fetch_news(ticker)
     
-    def get_market_sentiment(self, ticker: str) -> Dict:
+    def get_market_sentiment(self, ticker: str, context: RequestContext = None) -> Dict:
         """Returns sentiment analysis for a ticker."""
-        return self.market_intelligence.get_market_sentiment(ticker)
+        return self.market_intelligence.get_market_sentiment(ticker, context=context)
     
-    def generate_daily_briefing(self, tickers: List[str]) -> str:
+    def generate_daily_briefing(self, tickers: List[str], context: RequestContext = None) -> str:
         """Generates a morning market briefing for multiple tickers."""
-        return self.market_intelligence.generate_daily_briefing(tickers)
+        return self.market_intelligence.generate_daily_briefing(tickers, context=context)
     
     # ===== NEW: Social Content Methods =====
     
@@ -181,7 +394,8 @@ class AntifragileController:
         """Returns list of available AI personas for content generation."""
         return self.persona_bot.get_available_personas()
     
-    def generate_social_content(self, ticker: str, persona_name: str, platform: str = "twitter") -> str:
+    def generate_social_content(self, ticker: str, persona_name: str, platform: str = "twitter",
+                                regenerate: bool = False, context: RequestContext = None) -> str:
         """
         Generates social media content for a ticker using specified persona.
         
@@ -189,28 +403,39 @@ class AntifragileController:
             ticker: Stock ticker symbol
             persona_name: Name of the AI persona to use
             platform: 'twitter', 'thread', or 'linkedin'
+            regenerate: Bypass the shared content cache and generate fresh content
+            context: Request context holding data already fetched in this flow
         """
         # Get market data for context
-        technicals = self.market_intelligence.calculate_technicals(ticker)
-        news = self.market_intelligence.fetch_news(ticker, max_items=3)
+        source = context or self.market_intelligence
+        technicals = source.calculate_technicals(ticker)
+        news = source.fetch_news(ticker, max_items=3)
         
-        if platform == "twitter":
-            return self.persona_bot.generate_market_update(persona_name, ticker, technicals, news)
-        elif platform == "thread":
+        if platform == "thread":
             context = self._build_market_context(ticker, technicals, news)
-            return self.persona_bot.generate_twitter_thread(persona_name, f"{ticker} analysis", context)
+            return self.persona_bot.cached_content(
+                persona_name, platform, ticker, technicals, news,
+                lambda: self.persona_bot.generate_twitter_thread(persona_name, f"{ticker} analysis", context),
+                regenerate=regenerate
+            )
         elif platform == "linkedin":
             context = self._build_market_context(ticker, technicals, news)
-            return self.persona_bot.generate_linkedin_post(persona_name, f"{ticker} market analysis", context)
+            return self.persona_bot.cached_content(
+                persona_name, platform, ticker, technicals, news,
+                lambda: self.persona_bot.generate_linkedin_post(persona_name, f"{ticker} market analysis", context),
+                regenerate=regenerate
+            )
         else:
-            return self.persona_bot.generate_market_update(persona_name, ticker, technicals, news)
+            return self.persona_bot.generate_market_update(persona_name, ticker, technicals, news,
+                                                           regenerate=regenerate)
     
-    def generate_briefing_social(self, tickers: List[str], persona_name: str) -> Dict:
+    def generate_briefing_social(self, tickers: List[str], persona_name: str,
+                                 context: RequestContext = None) -> Dict:
         """
         Generates social media versions of a daily briefing.
         Returns both Twitter thread and LinkedIn post.
         """
-        briefing = self.generate_daily_briefing(tickers)
+        briefing = self.generate_daily_briefing(tickers, context=context)
         return self.persona_bot.generate_daily_briefing_social(briefing, persona_name)
     
     def _build_market_context(self, ticker: str, technicals: Dict, news: List[Dict]) -> str:
@@ -233,11 +458,18 @@ class AntifragileController:
     # ===== NEW: Combined Analyst + Behavioral Loop =====
     
     def run_full_analyst_loop(self, ticker: str, trades_df: pd.DataFrame = None, 
-                               user_action: str = None) -> Dict:
+                               user_action: str = None, budget_seconds: float = None,
+                               context: RequestContext = None) -> Dict:
         """
         Runs both the behavioral cognitive loop AND market intelligence.
         This is the "magic" combination the hackathon is looking for.
+        Every stage shares one deadline; stages that run out of budget answer
+        with their deterministic fallback and are listed in 'degraded_stages'.
+        The explanation runs concurrently with the cognitive loop; only the
+        combined insight waits for both.
         """
+        deadline = Deadline(config.ANALYST_LOOP_DEADLINE_SECONDS if budget_seconds is None else budget_seconds)
+        context = context or self.new_context()
         result = {
             'ticker': ticker,
             'market_explanation': None,
@@ -245,36 +477,63 @@ class AntifragileController:
             'combined_insight': None
         }
         
-        # Get market explanation
-        result['market_explanation'] = self.explain_market_move(ticker)
+        has_trades = trades_df is not None and not trades_df.empty
+        if has_trades and not self.trader_profile:
+            self.initialize_trader_profile(trades_df)
+        
+        gate = {}
+        graph = self._cognitive_graph(ticker, user_action, deadline, context, gate) if has_trades else StageGraph()
+        graph.add('explanation',
+                  lambda r: self.market_intelligence.explain_market_move(ticker, deadline=deadline, context=context),
+                  fallback=lambda r: self.market_intelligence.fallback_explanation(ticker))
+        if has_trades:
+            graph.add('combined_insight', lambda r: self._combine_insight(r, deadline=deadline),
+                      deps=('explanation', 'regime', 'tilt', 'intervention'),
+                      fallback=lambda r: self._combine_insight(r, use_llm=False))
         
-        # Run behavioral loop if trade data provided
-        if trades_df is not None and not trades_df.empty:
-            result['behavioral_analysis'] = self.run_cognitive_loop(ticker, trades_df, user_action)
-            
-            # Generate combined insight if both are available and no errors
-            market_exp = result['market_explanation']
-            has_valid_market = (market_exp and 
-                                'error' not in market_exp and 
-                                market_exp.get('explanation') is not None)
-            
-            if has_valid_market and result['behavioral_analysis']:
-                result['combined_insight'] = self._generate_combined_insight(
-                    result['market_explanation'],
-                    result['behavioral_analysis']
-                )
-            elif not has_valid_market:
-                result['combined_insight'] = "Market data unavailable. Focus on your trading discipline."
+        results, timings = graph.run(self._stage_pool, deadline)
+        result['market_explanation'] = results['explanation']
+        if has_trades:
+            self._deliver_intervention(results, gate)
+            result['behavioral_analysis'] = self._behavioral_analysis(results, gate)
+            result['combined_insight'] = results['combined_insight']
+        result['stage_timings'] = timings
         
+        self._flag_degraded(results, deadline)
+        if has_trades:
+            self._remember_reasoning(results, timings, gate)
+        result['degraded_stages'] = deadline.degraded_stages
+        result['elapsed_seconds'] = round(deadline.elapsed(), 3)
         return result
     
-    def _generate_combined_insight(self, market_exp: Dict, behavioral: Dict) -> str:
+    @staticmethod
+    def _flag_degraded(results: Dict, deadline: Deadline):
+        """Stages whose own LLM call failed answered with a template/rule-based result"""
+        for stage, value in results.items():
+            if isinstance(value, dict) and (value.get('fallback_mode') or value.get('templated')):
+                deadline.degrade(stage)
+    
+    def _combine_insight(self, results: Dict, use_llm: bool = True, deadline: Deadline = None) -> str:
+        """Combined insight if the market explanation is usable and no errors"""
+        market_exp = results['explanation']
+        has_valid_market = (market_exp and 
+                            'error' not in market_exp and 
+                            market_exp.get('explanation') is not None)
+        if not has_valid_market:
+            return "Market data unavailable. Focus on your trading discipline."
+        
+        behavioral = self._behavioral_analysis(results)
+        if not use_llm:
+            return self._template_combined_insight(market_exp, behavioral)
+        return self._generate_combined_insight(market_exp, behavioral, deadline)
+    
+    def _generate_combined_insight(self, market_exp: Dict, behavioral: Dict, deadline: Deadline = None) -> str:
         """
         Generates the "killer feature" insight that combines market and behavior.
         E.g., "The market just did X, and based on your history, you tend to Y in these situations"
         """
-        import google.generativeai as genai
-        from config import PRIMARY_MODEL
+        from llm_client import generate
+        from metrics import record_fallback
         
         # Safe extraction with defaults
         technicals = market_exp.get('technicals') or {}
@@ -309,8 +568,16 @@ Example format: "The market just [X], and based on your history, you tend to [Y]
 Keep it under 100 words. Be direct and helpful."""
 
         try:
-            model = genai.GenerativeModel(PRIMARY_MODEL)
-            response = model.generate_content(prompt)
+            response = generate(self.insight_model, prompt, 'controller', 'combined_insight')
             return response.text
         except Exception as e:
-            return f"Market is {market_regime}. Your tilt score is {tilt_score}/10. Stay disciplined."
+            record_fallback('controller', 'combined_insight_template')
+            if deadline is not None:
+                deadline.degrade('combined_insight')
+            return self._template_combined_insight(market_exp, behavioral)
+    
+    def _template_combined_insight(self, market_exp: Dict, behavioral: Dict) -> str:
+        technicals = market_exp.get('technicals') or {}
+        market_regime = technicals.get('trend', 'UNKNOWN')
+        tilt_score = behavioral.get('reasoning', {}).get('tilt', {}).get('tilt_score', 0)
+        return f"Market is {market_regime}. Your tilt score is {tilt_score}/10. Stay disciplined."
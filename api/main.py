@@ -2,13 +2,16 @@
 FastAPI Backend for Trading Analyst
 Exposes all controller methods as REST API endpoints
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 print("DEBUG: SERVER STARTING...")
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import sys
 import os
+import threading
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -16,9 +19,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from dotenv import load_dotenv
 load_dotenv()
 
-from antifragile_controller import AntifragileController
-import data_manager
-import pandas as pd
+# Heavy dependencies (pandas, yfinance, google.generativeai) and the agents are loaded
+# on the first request that needs them, so importing this module stays fast
+import config
+from config import LLM_BACKEND
+from http_cache import cached_response
+from metrics import render_metrics
 
 app = FastAPI(
     title="Trading Analyst API",
@@ -35,16 +41,93 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large bodies: brotli (with gzip fallback) when brotli-asgi is installed, gzip otherwise
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=config.HTTP_COMPRESS_MIN_BYTES)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=config.HTTP_COMPRESS_MIN_BYTES)
+
 # Global state
 api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("GEMINI_API_KEY not found in environment")
+if not api_key and LLM_BACKEND != "fake":
+    raise ValueError("GEMINI_API_KEY not found in environment (or set LLM_BACKEND=fake to run offline)")
 
-controller = AntifragileController(api_key)
-trades_df = pd.DataFrame()
+controller = None
+_controller_lock = threading.Lock()
+trades_df = None
+_trades_display = (None, None)  # (trades_df it was built from, display records)
 initialized = False
 
 
+def get_controller():
+    """Builds the controller on first use (imports the layer modules and their dependencies)"""
+    global controller
+    with _controller_lock:
+        if controller is None:
+            from antifragile_controller import AntifragileController
+            controller = AntifragileController(api_key)
+        return controller
+
+
+def warm_up() -> List[str]:
+    """Explicit warm-up: builds the controller and every agent before traffic arrives"""
+    return get_controller().warm_up()
+
+
+def has_trades() -> bool:
+    return trades_df is not None and not trades_df.empty
+
+
+def display_trades() -> List[Dict]:
+    """Trades mapped to frontend fields, rebuilt only when trades_df is replaced"""
+    global _trades_display
+    source, records = _trades_display
+    if source is trades_df:
+        return records
+    
+    # Frontend expects: id, ticker, action, quantity, price, timestamp, PnL, status
+    display_df = trades_df.copy()
+    display_df = display_df.rename(columns={
+        'Date': 'timestamp',
+        'Ticker': 'ticker',
+        'Side': 'action',
+        'Size': 'quantity',
+        'Entry Price': 'price',
+        'PnL': 'PnL'
+    })
+    
+    # Ensure timestamp is ISO string for JSON serialization
+    display_df['timestamp'] = display_df['timestamp'].apply(lambda x: x.isoformat() if hasattr(x, 'isoformat') else str(x))
+    
+    records = display_df.to_dict(orient="records")
+    _trades_display = (trades_df, records)
+    return records
+
+
+@app.on_event("startup")
+async def start_background_workers():
+    if config.API_WARMUP_ON_STARTUP:
+        warm_up()
+    if config.ENABLE_MARKET_POLLER:
+        get_controller().start_market_poller()
+    if config.ENABLE_REGIME_SCANNER:
+        get_controller().start_regime_scanner()
+    if config.ENABLE_CACHE_WARMER:
+        get_controller().start_cache_warmer()
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    if controller is None:
+        return
+    controller.stop_market_poller()
+    controller.stop_regime_scanner()
+    controller.stop_cache_warmer()
+    controller.close_journal()
+    controller.close_stage_pool()
+
+
 # ==================== MODELS ====================
 
 class TickerRequest(BaseModel):
@@ -54,10 +137,14 @@ class SocialContentRequest(BaseModel):
     ticker: str
     persona: str
     platform: str = "twitter"
+    regenerate: bool = False
 
 class BriefingRequest(BaseModel):
     tickers: List[str]
 
+class BatchTickerRequest(BaseModel):
+    tickers: List[str]
+
 class BehavioralRequest(BaseModel):
     ticker: str
     user_action: Optional[str] = None
@@ -67,64 +154,44 @@ class BehavioralRequest(BaseModel):
 
 @app.get("/api/health")
 async def health_check():
-    return {"status": "healthy", "initialized": initialized}
+    return {"status": "healthy", "initialized": initialized, "controller_loaded": controller is not None}
+
+
+@app.post("/api/system/warmup")
+async def warm_up_system():
+    return {"success": True, "agents": warm_up()}
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 
 @app.post("/api/trades/load-demo")
 async def load_demo_trades():
     global trades_df
+    import data_manager
     trades_df = data_manager.generate_mock_trades(30)
     
-    # Map columns to frontend expectations
-    # Frontend expects: id, ticker, action, quantity, price, timestamp, PnL, status
-    display_df = trades_df.copy()
-    display_df = display_df.rename(columns={
-        'Date': 'timestamp',
-        'Ticker': 'ticker',
-        'Side': 'action',
-        'Size': 'quantity',
-        'Entry Price': 'price',
-        'PnL': 'PnL'
-    })
-    
-    # Ensure timestamp is ISO string for JSON serialization
-    display_df['timestamp'] = display_df['timestamp'].apply(lambda x: x.isoformat() if hasattr(x, 'isoformat') else str(x))
-    
     return {
         "success": True,
         "count": len(trades_df),
-        "trades": display_df.to_dict(orient="records")
+        "trades": display_trades()
     }
 
 
 @app.get("/api/trades")
-async def get_trades():
-    if trades_df.empty:
-        return {"trades": [], "count": 0}
-        
-    # Map columns to frontend expectations
-    display_df = trades_df.copy()
-    display_df = display_df.rename(columns={
-        'Date': 'timestamp',
-        'Ticker': 'ticker',
-        'Side': 'action',
-        'Size': 'quantity',
-        'Entry Price': 'price',
-        'PnL': 'PnL'
-    })
-    
-    # Ensure timestamp is ISO string
-    display_df['timestamp'] = display_df['timestamp'].apply(lambda x: x.isoformat() if hasattr(x, 'isoformat') else str(x))
-    
-    return {
-        "trades": display_df.to_dict(orient="records"),
-        "count": len(trades_df)
-    }
+async def get_trades(request: Request):
+    if not has_trades():
+        payload = {"trades": [], "count": 0}
+    else:
+        payload = {"trades": display_trades(), "count": len(trades_df)}
+    return cached_response(request, payload, config.HTTP_CACHE_MAX_AGE['trades'], public=False)
 
 
 @app.get("/api/trades/metrics")
 async def get_trade_metrics():
-    if trades_df.empty:
+    if not has_trades():
         return {
             "total_trades": 0,
             "win_rate": 0,
@@ -146,10 +213,10 @@ async def get_trade_metrics():
 @app.post("/api/system/initialize")
 async def initialize_system():
     global initialized
-    if trades_df.empty:
+    if not has_trades():
         raise HTTPException(status_code=400, detail="Load trades first")
     
-    profile = controller.initialize_trader_profile(trades_df)
+    profile = get_controller().initialize_trader_profile(trades_df)
     initialized = True
     return {
         "success": True,
@@ -161,8 +228,8 @@ async def initialize_system():
 async def get_system_status():
     return {
         "initialized": initialized,
-        "has_trades": not trades_df.empty,
-        "trade_count": len(trades_df) if not trades_df.empty else 0
+        "has_trades": has_trades(),
+        "trade_count": len(trades_df) if has_trades() else 0
     }
 
 
@@ -170,42 +237,60 @@ async def get_system_status():
 async def get_diagnostics():
     if not initialized:
         return {"error": "System not initialized"}
-    return controller.get_system_diagnostics()
+    return get_controller().get_system_diagnostics()
 
 
 @app.post("/api/market/analyze")
 async def analyze_market(request: TickerRequest):
     try:
-        explanation = controller.explain_market_move(request.ticker)
+        explanation = get_controller().explain_market_move(request.ticker)
         return explanation
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/market/analyze-batch")
+async def analyze_market_batch(request: BatchTickerRequest):
+    try:
+        return {"results": get_controller().explain_market_moves(request.tickers)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/market/technicals/{ticker}")
-async def get_technicals(ticker: str):
-    return controller.get_market_technicals(ticker)
+async def get_technicals(ticker: str, request: Request):
+    return cached_response(request, get_controller().get_market_technicals(ticker),
+                           config.HTTP_CACHE_MAX_AGE['technicals'])
+
+
+@app.get("/api/market/regimes")
+async def get_market_regimes():
+    try:
+        return get_controller().get_regime_map()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/market/news/{ticker}")
-async def get_news(ticker: str):
-    return controller.get_market_news(ticker)
+async def get_news(ticker: str, request: Request):
+    return cached_response(request, get_controller().get_market_news(ticker), config.HTTP_CACHE_MAX_AGE['news'])
 
 
 @app.get("/api/personas")
-async def get_personas():
-    return {
-        "personas": controller.get_available_personas()
-    }
+async def get_personas(request: Request):
+    return cached_response(request, {
+        "personas": get_controller().get_available_personas()
+    }, config.HTTP_CACHE_MAX_AGE['personas'])
 
 
 @app.post("/api/social/generate")
 async def generate_social_content(request: SocialContentRequest):
     try:
-        content = controller.generate_social_content(
+        content = get_controller().generate_social_content(
             request.ticker,
             request.persona,
-            request.platform
+            request.platform,
+            regenerate=request.regenerate
         )
         return {"content": content}
     except Exception as e:
@@ -215,7 +300,7 @@ async def generate_social_content(request: SocialContentRequest):
 @app.post("/api/briefing/generate")
 async def generate_briefing(request: BriefingRequest):
     try:
-        briefing = controller.generate_daily_briefing(request.tickers)
+        briefing = get_controller().generate_daily_briefing(request.tickers)
         return {"briefing": briefing}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -231,9 +316,9 @@ async def analyze_behavioral(request: BehavioralRequest):
         # Simulate user actions if provided
         if request.user_action:
             for _ in range(3):
-                controller.user_stream.capture_interaction(request.user_action)
+                get_controller().user_stream.capture_interaction(request.user_action)
         
-        result = controller.run_full_analyst_loop(
+        result = get_controller().run_full_analyst_loop(
             request.ticker,
             trades_df,
             request.user_action
@@ -243,11 +328,20 @@ async def analyze_behavioral(request: BehavioralRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/interventions/{intervention_id}")
+async def get_intervention(intervention_id: str):
+    """Poll after a library intervention to pick up the personalized message"""
+    intervention = get_controller().get_intervention(intervention_id)
+    if intervention is None:
+        raise HTTPException(status_code=404, detail="Intervention not found")
+    return intervention
+
+
 @app.get("/api/trader-profile")
 async def get_trader_profile():
     if not initialized:
         return {"error": "System not initialized"}
-    return controller.trader_profile
+    return get_controller().trader_profile
 
 
 if __name__ == "__main__":
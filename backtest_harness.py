@@ -0,0 +1,320 @@
+"""
+Backtest Harness: Historical replay of the Perceive-Reason-Intervene loop
+Replays a trade log, bar history and telemetry journal through AntifragileController
+on a simulated clock (offline fake LLM by default) and reports the interventions that
+would have fired and when, loop throughput and per-stage latency. Use it to tune
+thresholds, or with --min-loops-per-second / --max-loop-p95-ms as a regression gate.
+
+Usage:
+    python backtest_harness.py [--trades trades.csv] [--bars bars.csv] [--journal telemetry.journal]
+                               [--ticker SPY] [--trader-id 0] [--speed 60] [--llm-backend fake] [--json]
+Without inputs a synthetic calm-then-crisis session is replayed.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+import config
+import llm_client
+from antifragile_controller import AntifragileController
+from intervention_history import InterventionHistory
+from intervention_scheduler import InterventionScheduler
+from perception_layer import MarketStreamProcessor, UserStreamProcessor
+from telemetry_journal import ACTION_NAMES, TelemetryJournal, record_events
+
+
+class SimulatedClock:
+    """Replay time: `monotonic()` seconds since start, `time()` epoch seconds, `now()` datetime"""
+
+    def __init__(self, start: datetime):
+        self.start = start
+        self.elapsed = 0.0
+
+    def advance_to(self, elapsed: float):
+        self.elapsed = max(self.elapsed, elapsed)
+
+    def monotonic(self) -> float:
+        return self.elapsed
+
+    def time(self) -> float:
+        return self.start.timestamp() + self.elapsed
+
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=self.elapsed)
+
+
+class BarReplayStream(MarketStreamProcessor):
+    """Market stream that computes the state from the bars closed as of the simulated clock"""
+
+    def __init__(self, bars: pd.DataFrame, clock: SimulatedClock, window: int = config.BACKTEST_BAR_WINDOW):
+        super().__init__()
+        if getattr(bars.index, 'tz', None) is not None:
+            bars = bars.tz_convert(None)
+        self.bars = bars.sort_index()
+        self.clock = clock
+        self.window = window
+        self._states = {}  # (ticker, bar position) -> state; only changes when a bar closes
+
+    def capture_market_state(self, ticker: str) -> Dict:
+        now = self.clock.now()
+        position = max(int(self.bars.index.searchsorted(now, side='right')), 2)
+        key = (ticker, position)
+        if key not in self._states:
+            hist = self.bars.iloc[max(position - self.window, 0):position]
+            self._states[key] = self.state_from_bars(ticker, hist, timestamp=hist.index[-1].to_pydatetime())
+        return dict(self._states[key])
+
+    def fetch_market_state(self, ticker: str) -> Dict:
+        return self.capture_market_state(ticker)
+
+
+class ReplayUserStream(UserStreamProcessor):
+    """User stream whose velocity window is measured against the simulated clock"""
+
+    def __init__(self, clock: SimulatedClock):
+        super().__init__()
+        self.clock = clock
+
+    def analyze_interaction_velocity(self, window_minutes: int = 5, now: datetime = None) -> Dict:
+        return super().analyze_interaction_velocity(window_minutes, now or self.clock.now())
+
+
+def latency_summary(seconds: List[float]) -> Dict:
+    if not seconds:
+        return {'count': 0}
+    ms = np.asarray(seconds) * 1000
+    return {
+        'count': len(ms),
+        'mean_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'max_ms': round(float(ms.max()), 3)
+    }
+
+
+class BacktestHarness:
+    """
+    One controller replaying one trader's session. Every journaled interaction
+    (mouse speeds are only recorded) advances the simulated clock to its timestamp and
+    runs a full cognitive loop; bars and the intervention scheduler/history follow the
+    same clock, so lock windows, cooldowns and hourly caps behave as they did live.
+    `run` can be repeated; `close` (or leaving a `with` block) releases the controller's workers.
+    """
+
+    def __init__(self, trades_df: pd.DataFrame, bars: pd.DataFrame, journal: TelemetryJournal,
+                 ticker: str = 'SPY', trader_id: int = None, start_time: datetime = None,
+                 api_key: str = None, bar_window: int = config.BACKTEST_BAR_WINDOW):
+        self.trades_df = trades_df
+        self.journal = journal
+        self.ticker = ticker
+        self.trader_id = trader_id
+        if start_time is None:
+            index = bars.index.tz_convert(None) if getattr(bars.index, 'tz', None) is not None else bars.index
+            start_time = index.sort_values()[min(bar_window, len(index)) - 1].to_pydatetime()
+        self.clock = SimulatedClock(start_time)
+        self.controller = self.build_controller(api_key or os.getenv("GEMINI_API_KEY", "backtest"), bars, bar_window)
+
+    def build_controller(self, api_key: str, bars: pd.DataFrame, bar_window: int) -> AntifragileController:
+        controller = AntifragileController(api_key)
+        controller.clock = self.clock.monotonic
+        controller.market_stream = BarReplayStream(bars, self.clock, bar_window)
+        controller.user_stream = ReplayUserStream(self.clock)
+        engine = controller.intervention_engine
+        engine.scheduler = InterventionScheduler(clock=self.clock.time)
+        engine.intervention_history = InterventionHistory(spill_path=None, clock=self.clock.time)
+        return controller
+
+    def run(self, speed: float = None, max_loops: int = None) -> Dict:
+        """
+        Replays the session.
+
+        Args:
+            speed: Playback multiplier (1.0 = real time); None replays as fast as possible
+            max_loops: Stop after this many cognitive loops
+        """
+        controller = self.controller
+        controller.initialize_trader_profile(self.trades_df)
+
+        recs = self.journal.session(trader_id=self.trader_id)
+        t0 = float(recs['ts'][0]) if len(recs) else 0.0
+        interventions, loop_seconds = [], []
+        stage_seconds = {}
+        outcomes = Counter()
+        prev_ts = t0
+        started = time.perf_counter()
+
+        for rec in recs:
+            ts = float(rec['ts'])
+            if speed:
+                time.sleep(max(ts - prev_ts, 0.0) / speed)
+            prev_ts = ts
+            self.clock.advance_to(ts - t0)
+
+            action = ACTION_NAMES.get(int(rec['action']), 'unknown')
+            if action == 'mouse_speed':
+                controller.user_stream.capture_mouse_speed(float(rec['value']), timestamp=self.clock.now())
+                continue
+            controller.user_stream.capture_interaction(action, {'value': float(rec['value'])},
+                                                       timestamp=self.clock.now())
+
+            loop_started = time.perf_counter()
+            result = controller.run_cognitive_loop(self.ticker, self.trades_df)
+            loop_seconds.append(time.perf_counter() - loop_started)
+            for stage, timing in result['stage_timings'].items():
+                stage_seconds.setdefault(stage, []).append(timing['seconds'])
+
+            intervention = result['intervention']
+            if result['reasoning_reused']:
+                outcomes['reasoning_reused'] += 1
+            elif intervention.get('repeated'):
+                outcomes['suppressed'] += 1
+            elif intervention['type'] != 'NONE':
+                interventions.append({
+                    'at': self.clock.now().isoformat(),
+                    'offset_seconds': round(self.clock.elapsed, 3),
+                    'action': action,
+                    'type': intervention['type'],
+                    'tilt_score': result['reasoning']['tilt']['tilt_score'],
+                    'regime': result['perception']['market']['regime'],
+                    'message': intervention.get('message')
+                })
+            if max_loops and len(loop_seconds) >= max_loops:
+                break
+
+        elapsed = time.perf_counter() - started
+        controller.intervention_engine.wait_for_personalization(timeout=10)
+
+        loops = len(loop_seconds)
+        return {
+            'ticker': self.ticker,
+            'events': len(recs),
+            'loops': loops,
+            'simulated_seconds': round(self.clock.elapsed, 3),
+            'elapsed_seconds': round(elapsed, 6),
+            'loops_per_second': round(loops / elapsed, 1) if elapsed > 0 else 0.0,
+            'speedup': round(self.clock.elapsed / elapsed, 1) if elapsed > 0 else 0.0,
+            'interventions': interventions,
+            'intervention_counts': dict(Counter(i['type'] for i in interventions)),
+            'reasoning_reused': outcomes['reasoning_reused'],
+            'suppressed': outcomes['suppressed'],
+            'loop_latency': latency_summary(loop_seconds),
+            'stage_latency': {stage: latency_summary(seconds) for stage, seconds in stage_seconds.items()}
+        }
+
+    def close(self):
+        self.controller.close_stage_pool()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def check_regression(report: Dict, min_loops_per_second: float = None, max_loop_p95_ms: float = None) -> List[str]:
+    """Gate failures for a backtest report (empty when within limits)"""
+    failures = []
+    if min_loops_per_second is not None and report['loops_per_second'] < min_loops_per_second:
+        failures.append(f"loops/sec {report['loops_per_second']} < {min_loops_per_second}")
+    p95 = report['loop_latency'].get('p95_ms')
+    if max_loop_p95_ms is not None and p95 is not None and p95 > max_loop_p95_ms:
+        failures.append(f"loop p95 {p95} ms > {max_loop_p95_ms} ms")
+    return failures
+
+
+def synthetic_bars(calm_hours: int = 70, crisis_hours: int = 35, seed: int = 0) -> pd.DataFrame:
+    """Hourly bars: calm (~0.8% moves) followed by a crisis (~6% moves)"""
+    rng = np.random.default_rng(seed)
+    returns = np.concatenate([rng.normal(0, 0.008, calm_hours), rng.normal(0, 0.06, crisis_hours)])
+    index = pd.date_range(datetime(2024, 3, 4, 9), periods=len(returns), freq='h')
+    return pd.DataFrame({
+        'Close': 100 * np.cumprod(1 + returns),
+        'Volume': rng.integers(1_000, 5_000, len(returns)) * np.where(returns > 0.05, 3, 1)
+    }, index=index)
+
+
+def synthetic_events(hours: int, crisis_after_hours: int, seed: int = 0) -> List[tuple]:
+    """(ts, action, value) session: an order every ~10 minutes, hourly panic bursts once in crisis"""
+    rng = np.random.default_rng(seed)
+    events = []
+    for hour in range(hours):
+        base = hour * 3600.0
+        for minute in range(0, 60, 10):
+            ts = base + minute * 60 + float(rng.uniform(0, 60))
+            events.append((ts, 'place_order', 1.0))
+            events.append((ts + 1, 'mouse_speed', float(rng.uniform(100, 300))))
+        if hour >= crisis_after_hours:
+            burst = base + 30 * 60
+            for i in range(10):
+                events.append((burst + i * 5, 'cancel_order' if i % 2 else 'place_order', 1.0))
+                events.append((burst + i * 5 + 1, 'mouse_speed', float(rng.uniform(600, 900))))
+    return sorted(events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trades", help="closed-trade log CSV (default: mock trades)")
+    parser.add_argument("--bars", help="bar CSV indexed by time with Close and Volume columns")
+    parser.add_argument("--journal", help="telemetry journal to replay")
+    parser.add_argument("--ticker", default="SPY")
+    parser.add_argument("--trader-id", type=int, default=None)
+    parser.add_argument("--speed", type=float, default=None, help="playback multiplier (default: flat out)")
+    parser.add_argument("--max-loops", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-backend", choices=("fake", "gemini"), default=os.getenv("LLM_BACKEND", "fake"),
+                        help="LLM backend for the replay (default: offline fake unless LLM_BACKEND is set)")
+    parser.add_argument("--min-loops-per-second", type=float, default=None)
+    parser.add_argument("--max-loop-p95-ms", type=float, default=None)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+    llm_client.LLM_BACKEND = args.llm_backend  # Process-wide, so only set by the CLI
+
+    if args.trades:
+        trades_df = pd.read_csv(args.trades)
+    else:
+        import data_manager
+        np.random.seed(args.seed)
+        trades_df = data_manager.generate_mock_trades(30)
+    bars = pd.read_csv(args.bars, index_col=0, parse_dates=True) if args.bars else synthetic_bars(seed=args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.journal:
+            journal = TelemetryJournal(args.journal, readonly=True)
+        else:
+            journal = TelemetryJournal(os.path.join(tmp, 'session.journal'))
+            record_events(journal, synthetic_events(hours=70, crisis_after_hours=35, seed=args.seed))
+        with journal, BacktestHarness(trades_df, bars, journal, ticker=args.ticker,
+                                      trader_id=args.trader_id) as harness:
+            report = harness.run(speed=args.speed, max_loops=args.max_loops)
+
+    failures = check_regression(report, args.min_loops_per_second, args.max_loop_p95_ms)
+    if args.json:
+        print(json.dumps({**report, 'failures': failures}, indent=2, default=str))
+    else:
+        print(f"Backtest {report['ticker']} (LLM_BACKEND={args.llm_backend}): "
+              f"{report['events']} events, {report['loops']} loops over {report['simulated_seconds'] / 3600:.1f} "
+              f"simulated hours in {report['elapsed_seconds']:.2f} s ({report['speedup']}x real time)")
+        print(f"  throughput {report['loops_per_second']} loops/sec   reused {report['reasoning_reused']}   "
+              f"suppressed {report['suppressed']}")
+        for stage, r in [('loop', report['loop_latency'])] + list(report['stage_latency'].items()):
+            if r['count']:
+                print(f"  {stage:<14} p50 {r['p50_ms']:>8.3f} ms   p95 {r['p95_ms']:>8.3f} ms   max {r['max_ms']:>8.3f} ms")
+        print(f"Interventions fired: {report['intervention_counts'] or 'none'}")
+        for i in report['interventions']:
+            print(f"  {i['at']}  {i['type']:<10} tilt {i['tilt_score']}  {i['regime']}")
+        for failure in failures:
+            print(f"REGRESSION: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
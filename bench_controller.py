@@ -0,0 +1,70 @@
+"""
+Benchmark: AntifragileController construction cost
+Measures construction time and retained memory per controller instance, plus the
+one-time cost of building every agent, on the offline fake LLM backend.
+
+Usage: python bench_controller.py [--instances 200] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+
+from antifragile_controller import AntifragileController
+
+
+def measure(instances: int, warm: bool) -> dict:
+    """Times `instances` constructions and the memory they keep alive"""
+    durations = []
+    controllers = []
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+    for _ in range(instances):
+        started = time.perf_counter()
+        controller = AntifragileController(os.environ.get("GEMINI_API_KEY", "bench_key"))
+        if warm:
+            controller.warm_up()
+        durations.append(time.perf_counter() - started)
+        controllers.append(controller)
+    retained = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(baseline, 'filename'))
+    tracemalloc.stop()
+    for controller in controllers:
+        controller._stage_pool.shutdown(wait=False)
+        controller.close_journal()
+
+    durations.sort()
+    return {
+        'instances': instances,
+        'mean_ms': round(statistics.mean(durations) * 1000, 3),
+        'p95_ms': round(durations[int(len(durations) * 0.95) - 1] * 1000, 3),
+        'kib_per_instance': round(retained / instances / 1024, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--instances", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    AntifragileController("warmup")  # Exclude one-time module/router setup from the numbers
+    results = {
+        'lazy': measure(args.instances, warm=False),
+        'all_agents_built': measure(args.instances, warm=True)
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"Controller construction ({args.instances} instances, LLM_BACKEND={os.environ['LLM_BACKEND']})")
+    for label, r in results.items():
+        print(f"  {label:<18} mean {r['mean_ms']:>8.3f} ms   p95 {r['p95_ms']:>8.3f} ms   "
+              f"{r['kib_per_instance']:>8.1f} KiB/instance")
+
+
+if __name__ == "__main__":
+    main()
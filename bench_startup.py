@@ -0,0 +1,121 @@
+"""
+Benchmark: API cold start
+Measures, in fresh interpreters on the offline fake LLM backend:
+  - import time of api.main and which heavy dependencies that import pulled in
+  - time from spawning uvicorn to the first healthy /api/health response
+  - latency of the first request that builds the controller (/api/personas)
+
+Usage: python bench_startup.py [--runs 5] [--warmup] [--json]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ['pandas', 'numpy', 'yfinance', 'google.generativeai', 'antifragile_controller']
+
+IMPORT_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import api.main
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def bench_env(warmup: bool) -> dict:
+    env = dict(os.environ, LLM_BACKEND="fake", PYTHONDONTWRITEBYTECODE="1")
+    env["API_WARMUP_ON_STARTUP"] = "1" if warmup else "0"
+    return env
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(env: dict) -> dict:
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def get(url: str, timeout: float = 30) -> int:
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.status
+
+
+def measure_server(env: dict, timeout: float = 60) -> dict:
+    """Seconds to first healthy response after spawn, then the first controller-backed request"""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port),
+                               "--log-level", "warning"], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            if time.perf_counter() - started > timeout:
+                raise TimeoutError(f"No healthy response within {timeout}s")
+            try:
+                if get(f"{base_url}/api/health", timeout=1) == 200:
+                    break
+            except OSError:
+                time.sleep(0.02)
+        healthy = time.perf_counter() - started
+
+        first_request = time.perf_counter()
+        get(f"{base_url}/api/personas")
+        return {'healthy_seconds': healthy, 'first_agent_request_seconds': time.perf_counter() - first_request}
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def summarize(samples: list) -> dict:
+    samples = sorted(samples)
+    return {'median_ms': round(statistics.median(samples) * 1000, 1), 'max_ms': round(samples[-1] * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", action="store_true", help="set API_WARMUP_ON_STARTUP=1 for the server runs")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    env = bench_env(args.warmup)
+    imports = [measure_import(env) for _ in range(args.runs)]
+    servers = [measure_server(env) for _ in range(args.runs)]
+    results = {
+        'python': sys.version.split()[0],
+        'runs': args.runs,
+        'warmup_on_startup': args.warmup,
+        'import_api_main': summarize([r['seconds'] for r in imports]),
+        'heavy_modules_on_import': imports[-1]['loaded'],
+        'time_to_first_healthy_response': summarize([r['healthy_seconds'] for r in servers]),
+        'first_agent_request': summarize([r['first_agent_request_seconds'] for r in servers])
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"API cold start ({args.runs} runs, Python {results['python']}, warm-up "
+          f"{'on' if args.warmup else 'off'})")
+    for key in ('import_api_main', 'time_to_first_healthy_response', 'first_agent_request'):
+        r = results[key]
+        print(f"  {key:<32} median {r['median_ms']:>8.1f} ms   max {r['max_ms']:>8.1f} ms")
+    print(f"  heavy modules loaded by import:  {', '.join(results['heavy_modules_on_import']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Cache Warmer: Pre-market warming of market data, briefings and persona content
+Runs once per trading day at PREMARKET_WARM_TIME so pre-market users hit warm caches;
+warmed entries expire at MARKET_OPEN_TIME, and at most WARM_LLM_CONCURRENCY LLM calls
+are in flight
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from config import (
+    MARKET_OPEN_TIME, MARKET_WATCHLIST, PREMARKET_WARM_TIME, WARM_TOP_PERSONAS,
+    WARM_DATA_CONCURRENCY, WARM_LLM_CONCURRENCY
+)
+from persona_bot import PERSONAS
+
+
+class CacheWarmer:
+    """Prefetches the watchlist and pre-generates LLM content into the controller's caches"""
+
+    def __init__(self, controller, watchlist: List[str] = None, warm_time: str = PREMARKET_WARM_TIME,
+                 top_personas: int = WARM_TOP_PERSONAS, open_time: str = MARKET_OPEN_TIME,
+                 data_concurrency: int = WARM_DATA_CONCURRENCY, llm_concurrency: int = WARM_LLM_CONCURRENCY):
+        self.controller = controller
+        self.watchlist = list(watchlist or MARKET_WATCHLIST)
+        self.warm_time = warm_time
+        self.personas = list(PERSONAS)[:top_personas]
+        self.open_time = open_time
+        self.data_concurrency = data_concurrency
+        self.llm_concurrency = llm_concurrency
+        self.last_report = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _at(now: datetime, hh_mm: str) -> datetime:
+        hour, minute = (int(part) for part in hh_mm.split(':'))
+        return now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+    def warm_ttl(self, now: datetime = None) -> Optional[float]:
+        """Seconds until today's open, or None (normal per-cache TTLs) once the market is open"""
+        now = now or datetime.now()
+        remaining = (self._at(now, self.open_time) - now).total_seconds()
+        return remaining if remaining > 0 else None
+
+    def next_run(self, now: datetime = None) -> datetime:
+        """Next weekday occurrence of the configured warm time (local clock)"""
+        now = now or datetime.now()
+        candidate = self._at(now, self.warm_time)
+        if candidate <= now:
+            candidate += timedelta(days=1)
+        while candidate.weekday() >= 5:  # Markets are closed on weekends
+            candidate += timedelta(days=1)
+        return candidate
+
+    def _warm_market_data(self, ticker: str, ttl: Optional[float]):
+        """Bars, technicals and news for one ticker, pinned until the open"""
+        market_stream = self.controller.market_stream
+        mi = self.controller.market_intelligence
+
+        state = market_stream.fetch_market_state(ticker)
+        if not state.get('is_demo'):
+            market_stream.snapshots.update(ticker, state)
+
+        technicals = mi.calculate_technicals(ticker)
+        if 'error' not in technicals:
+            mi.technicals_cache.set(ticker, technicals, ttl_seconds=ttl)
+
+        mi.fetch_news(ticker)
+        news = mi.news_cache.get(ticker)
+        if news is not None:
+            mi.news_cache.set(ticker, news, ttl_seconds=ttl)
+
+    def _warm_explanations(self, ttl: Optional[float]):
+        mi = self.controller.market_intelligence
+        for ticker, result in mi.explain_market_moves(self.watchlist).items():
+            if not result.get('fallback_mode'):
+                mi.explanation_cache.set(ticker, result, ttl_seconds=ttl)
+
+    def _warm_briefing(self, ttl: Optional[float]):
+        mi = self.controller.market_intelligence
+        briefing = mi.generate_daily_briefing(self.watchlist)
+        if not briefing.startswith("Error"):
+            mi.briefing_cache.set(tuple(self.watchlist[:5]), briefing, ttl_seconds=ttl)
+
+    def _warm_persona(self, persona_name: str, ticker: str, ttl: Optional[float]):
+        mi = self.controller.market_intelligence
+        technicals = mi.calculate_technicals(ticker)
+        news = mi.fetch_news(ticker, max_items=3)
+        # Sequential variants: this worker holds one LLM call at a time, so llm_concurrency is a real bound
+        self.controller.persona_bot.generate_market_update(
+            persona_name, ticker, technicals, news, regenerate=True, ttl_seconds=ttl, sequential=True
+        )
+
+    @staticmethod
+    def _run_all(tasks: Dict[str, callable], max_workers: int) -> List[str]:
+        """Runs named tasks on a bounded pool; returns the names of the ones that failed"""
+        failures = []
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cache-warmer") as pool:
+            futures = {name: pool.submit(task) for name, task in tasks.items()}
+            for name, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Cache warming failed for {name}: {e}")
+                    failures.append(name)
+        return failures
+
+    def run_once(self) -> Dict:
+        """Warms every cache for the watchlist; data first, then LLM content"""
+        started = time.perf_counter()
+        ttl = self.warm_ttl()
+
+        data_tasks = {f"data:{t}": (lambda t=t: self._warm_market_data(t, ttl)) for t in self.watchlist}
+        failures = self._run_all(data_tasks, self.data_concurrency)
+
+        llm_tasks = {'explanations': lambda: self._warm_explanations(ttl), 'briefing': lambda: self._warm_briefing(ttl)}
+        for persona_name in self.personas:
+            for ticker in self.watchlist:
+                llm_tasks[f"persona:{persona_name}:{ticker}"] = (
+                    lambda p=persona_name, t=ticker: self._warm_persona(p, t, ttl)
+                )
+        failures += self._run_all(llm_tasks, self.llm_concurrency)
+
+        self.last_report = {
+            'tickers': self.watchlist,
+            'personas': self.personas,
+            'tasks': len(data_tasks) + len(llm_tasks),
+            'failures': failures,
+            'seconds': round(time.perf_counter() - started, 2),
+            'completed_at': datetime.now().isoformat()
+        }
+        return self.last_report
+
+    def _run(self):
+        while not self._stop.is_set():
+            wait_seconds = (self.next_run() - datetime.now()).total_seconds()
+            if self._stop.wait(max(wait_seconds, 0)):
+                break
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Cache Warmer Error: {e}")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
@@ -4,46 +4,117 @@ Three specialized agents: Market Analyst, Profiler, Tilt Detector
 """
 import numpy as np
 from typing import Dict, List
-import google.generativeai as genai
 
-from config import PRIMARY_MODEL
+from config import REGIME_DEFINITIONS, REGIME_RISK_MOVE_PCT
+from regime_scanner import REGIME_TIERS, classify_regime
+from llm_client import configure, generate_structured, routed_model
+from metrics import record_cache, record_fallback
+
+# Rule-based tilt scoring, shared with the vectorized fleet scorer (fleet_tilt.py)
+HIGH_VOL_REGIMES = ('HIGH_VOL', 'CRISIS')
+TILT_WEIGHTS = {'high_vol': 3, 'erratic': 4, 'revenge_history': 2}
+REVENGE_HISTORY_SIGNALS = 2  # More revenge signals than this count as a revenge history
 
 class MarketAnalystAgent:
     """Identifies regime shifts and market anomalies"""
     
+    RISK_LEVELS = ['LOW', 'MEDIUM', 'HIGH', 'EXTREME']
+    
+    # Structured output contract for the transition commentary
+    RESPONSE_SCHEMA = {
+        'type': 'object',
+        'properties': {'trader_advice': {'type': 'string'}},
+        'required': ['trader_advice']
+    }
+    MAX_OUTPUT_TOKENS = 128
+    
     def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(PRIMARY_MODEL)
+        configure(api_key)
+        self.model = routed_model()
+        self.current_regimes = {}    # ticker -> (regime_type, risk_level)
+        self.commentary_cache = {}   # (ticker, regime_type, risk_level) -> trader advice
+    
+    def classify_regime(self, market_state: Dict) -> Dict:
+        """Deterministic regime and risk classification from the market state scalars"""
+        regime_type = market_state.get('regime')
+        if regime_type not in REGIME_DEFINITIONS:
+            regime_type = classify_regime(market_state.get('volatility') or 0.0)
+        
+        # Base risk from the regime tier, escalated by a large move and/or a volume spike
+        risk = REGIME_TIERS.index(regime_type)
+        if abs(market_state.get('price_change_5d') or 0) >= REGIME_RISK_MOVE_PCT:
+            risk += 1
+        if market_state.get('volume_spike'):
+            risk += 1
+        
+        return {
+            'regime_type': regime_type,
+            'risk_level': self.RISK_LEVELS[min(risk, len(self.RISK_LEVELS) - 1)]
+        }
+    
+    def analyze_regime(self, market_state: Dict, use_llm: bool = True) -> Dict:
+        """Detects if market entered a new regime; the LLM is consulted only on transitions"""
+        ticker = market_state.get('ticker')
+        classification = self.classify_regime(market_state)
+        key = (ticker, classification['regime_type'], classification['risk_level'])
+        
+        regime_changed = self.current_regimes.get(ticker) != key[1:]
+        if regime_changed:
+            # New regime for this ticker: previous commentary no longer applies
+            for stale in [k for k in self.commentary_cache if k[0] == ticker]:
+                del self.commentary_cache[stale]
+            self.current_regimes[ticker] = key[1:]
+        
+        advice = self.commentary_cache.get(key)
+        record_cache('regime_commentary', advice is not None)
+        fallback_mode = False
+        if advice is None and use_llm:
+            try:
+                advice = self._generate_commentary(market_state, classification)
+                self.commentary_cache[key] = advice  # Only real LLM output is memoized
+            except Exception:
+                record_fallback('market_analyst', 'static_commentary')
+        if advice is None:
+            advice = self.static_commentary(classification)  # Not cached: retry the LLM next time
+            fallback_mode = True
+        
+        return {
+            **classification,
+            'trader_advice': advice,
+            'analysis': advice,
+            'regime_changed': regime_changed,
+            'raw_state': market_state,
+            'fallback_mode': fallback_mode
+        }
     
-    def analyze_regime(self, market_state: Dict) -> Dict:
-        """Detects if market entered a new regime"""
-        prompt = f"""You are a market regime analyst. Analyze this market state:
+    def _generate_commentary(self, market_state: Dict, classification: Dict) -> str:
+        prompt = f"""You are a market regime analyst. {market_state.get('ticker')} just entered a new regime:
 
-Ticker: {market_state.get('ticker')}
+Regime: {classification['regime_type']} ({REGIME_DEFINITIONS[classification['regime_type']]['description']})
+Risk Level: {classification['risk_level']}
 Volatility: {market_state.get('volatility')}
-Regime: {market_state.get('regime')}
 Price Change (5d): {market_state.get('price_change_5d')}%
 Volume Spike: {market_state.get('volume_spike')}
 
-Respond in JSON format:
-{{
-  "regime_type": "LOW_VOL|HIGH_VOL|CRISIS",
-  "risk_level": "LOW|MEDIUM|HIGH|EXTREME",
-  "trader_advice": "brief advice"
-}}"""
-        
-        try:
-            response = self.model.generate_content(prompt)
-            return {'analysis': response.text, 'raw_state': market_state}
-        except Exception as e:
-            return {'error': str(e)}
+Give the trader one or two sentences of brief, concrete advice for this regime.
+Respond in JSON with a single "trader_advice" field."""
+        
+        return generate_structured(
+            self.model, prompt, self.RESPONSE_SCHEMA, self.MAX_OUTPUT_TOKENS,
+            agent='market_analyst', endpoint='analyze_regime'
+        )['trader_advice']
+    
+    @staticmethod
+    def static_commentary(classification: Dict) -> str:
+        return (f"{REGIME_DEFINITIONS[classification['regime_type']]['description']}. "
+                f"Risk is {classification['risk_level']} - size positions accordingly.")
 
 class ProfilerAgent:
     """Vectorizes user's trading history to identify latent biases"""
     
     def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(PRIMARY_MODEL)
+        configure(api_key)
+        self.model = routed_model()
         self.bias_patterns = {}
     
     def profile_trader(self, trades_df) -> Dict:
@@ -97,26 +168,52 @@ class ProfilerAgent:
 class TiltDetectorAgent:
     """Compares live volatility against user's panic threshold"""
     
+    RESPONSE_SCHEMA = {
+        'type': 'object',
+        'properties': {
+            'tilt_detected': {'type': 'boolean'},
+            'severity': {'type': 'string', 'format': 'enum', 'enum': ['LOW', 'MEDIUM', 'HIGH', 'CRITICAL']},
+            'reasoning': {'type': 'string'},
+            'trigger': {'type': 'string'}
+        },
+        'required': ['tilt_detected', 'severity', 'reasoning', 'trigger']
+    }
+    MAX_OUTPUT_TOKENS = 256
+    
     def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(PRIMARY_MODEL)
+        configure(api_key)
+        self.model = routed_model()
         self.panic_threshold = 0.025  # Default 2.5% volatility
     
-    def detect_tilt(self, market_state: Dict, user_behavior: Dict, trader_profile: Dict) -> Dict:
-        """Chain-of-Thought reasoning to detect tilt state"""
-        
-        # Rule-based pre-check
-        is_high_vol = market_state.get('regime') == 'HIGH_VOL'
+    def score_tilt(self, market_state: Dict, user_behavior: Dict, trader_profile: Dict) -> int:
+        """Rule-based tilt score (0-10) without any LLM involvement"""
+        is_high_vol = market_state.get('regime') in HIGH_VOL_REGIMES
         is_erratic = user_behavior.get('is_erratic', False)
-        has_revenge_history = trader_profile.get('revenge_signals', 0) > 2
+        has_revenge_history = trader_profile.get('revenge_signals', 0) > REVENGE_HISTORY_SIGNALS
         
         tilt_score = 0
         if is_high_vol:
-            tilt_score += 3
+            tilt_score += TILT_WEIGHTS['high_vol']
         if is_erratic:
-            tilt_score += 4
+            tilt_score += TILT_WEIGHTS['erratic']
         if has_revenge_history:
-            tilt_score += 2
+            tilt_score += TILT_WEIGHTS['revenge_history']
+        return tilt_score
+    
+    def detect_tilt(self, market_state: Dict, user_behavior: Dict, trader_profile: Dict,
+                    use_llm: bool = True) -> Dict:
+        """Chain-of-Thought reasoning to detect tilt state"""
+        
+        # Rule-based pre-check
+        tilt_score = self.score_tilt(market_state, user_behavior, trader_profile)
+        
+        # Rule-only mode (session replay, regression tests)
+        if not use_llm:
+            return {
+                'tilt_score': tilt_score,
+                'tilt_detected': tilt_score >= 5,
+                'requires_intervention': tilt_score >= 7
+            }
         
         # LLM reasoning for complex cases
         if tilt_score >= 5:
@@ -126,29 +223,32 @@ MARKET: {market_state.get('regime')} regime, volatility {market_state.get('volat
 USER BEHAVIOR: {user_behavior.get('total_actions')} actions in 5min, {user_behavior.get('cancel_count')} cancels
 TRADER HISTORY: {trader_profile.get('revenge_signals')} revenge patterns detected
 
-Is the trader in TILT? Respond in JSON:
-{{
-  "tilt_detected": true/false,
-  "severity": "LOW|MEDIUM|HIGH|CRITICAL",
-  "reasoning": "brief explanation",
-  "trigger": "what caused it"
-}}"""
+Is the trader in TILT? Respond in JSON with tilt_detected, severity,
+a brief reasoning and the trigger that caused it."""
             
             try:
-                response = self.model.generate_content(prompt)
+                assessment = generate_structured(
+                    self.model, prompt, self.RESPONSE_SCHEMA, self.MAX_OUTPUT_TOKENS,
+                    agent='tilt_detector', endpoint='detect_tilt'
+                )
                 return {
                     'tilt_score': tilt_score,
-                    'llm_analysis': response.text,
+                    'llm_analysis': assessment['reasoning'],
+                    'llm_tilt_detected': assessment['tilt_detected'],
+                    'severity': assessment['severity'],
+                    'trigger': assessment['trigger'],
                     'requires_intervention': tilt_score >= 7,
                     'tilt_detected': True
                 }
             except Exception as e:
                 # Return tilt_score even if LLM fails
+                record_fallback('tilt_detector', 'rule_based')
                 return {
                     'tilt_score': tilt_score,
                     'tilt_detected': True,
                     'requires_intervention': tilt_score >= 7,
                     'error': f"LLM analysis failed: {str(e)}",
+                    'fallback_mode': True,
                     'llm_analysis': f"Tilt detected (score: {tilt_score}/10) but detailed analysis unavailable."
                 }
         
@@ -2,6 +2,7 @@
 Configuration file for Antifragile Mirror System
 Customize thresholds, models, and intervention parameters
 """
+import os
 
 # ============================================================================
 # LLM CONFIGURATION
@@ -10,12 +11,63 @@ Customize thresholds, models, and intervention parameters
 # Primary reasoning model
 PRIMARY_MODEL = "gemini-2.0-flash"
 
-# Fallback model if primary fails
-FALLBACK_MODEL = "gemini-2.0-flash"
+# Fast-tier model, also the failover/hedge target. Must differ from PRIMARY_MODEL:
+# requests are never hedged to the model they already run on
+FALLBACK_MODEL = "gemini-2.0-flash-lite"
 
 # Temperature for LLM responses (0.0 = deterministic, 1.0 = creative)
 LLM_TEMPERATURE = 0.3
 
+# LLM backend: "gemini" (live API) or "fake" (offline, deterministic; see fake_llm.py)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+
+# Fake backend latency/failure profile (median/p95 in ms, injected 500s and 429 bursts)
+FAKE_LLM_PROFILE = os.getenv("FAKE_LLM_PROFILE", "instant")
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+FAKE_LLM_PROFILES = {
+    'instant': {'median_ms': 0, 'p95_ms': 0},
+    'typical': {'median_ms': 800, 'p95_ms': 2500, 'failure_rate': 0.01,
+                'rate_limit_rate': 0.01, 'rate_limit_burst': 3},
+    'degraded': {'median_ms': 3000, 'p95_ms': 12000, 'failure_rate': 0.1,
+                 'rate_limit_rate': 0.05, 'rate_limit_burst': 10},
+    'outage': {'median_ms': 200, 'p95_ms': 1000, 'failure_rate': 1.0}
+}
+
+# Model tiers and per-task routing (task = endpoint label used in metrics)
+MODEL_TIERS = {
+    'fast': FALLBACK_MODEL,
+    'primary': PRIMARY_MODEL
+}
+TASK_MODEL_TIERS = {
+    'generate_intervention': 'fast',
+    'get_realtime_nudge': 'fast',
+    'twitter': 'fast',
+    'thread': 'fast',
+    'detect_tilt': 'fast',
+    'analyze_regime': 'fast',
+    'get_market_sentiment': 'fast',
+    'explain_market_move': 'primary',
+    'explain_market_moves': 'primary',
+    'generate_daily_briefing': 'primary',
+    'analyze_behavior': 'primary',
+    'combined': 'primary',
+    'combined_insight': 'primary',
+    'linkedin': 'primary'
+}
+DEFAULT_MODEL_TIER = 'primary'
+
+# Latency hedging: re-send to FALLBACK_MODEL once a request exceeds its model's p95
+ENABLE_HEDGED_REQUESTS = True
+HEDGE_MIN_SAMPLES = 20              # Observations needed before trusting the p95
+HEDGE_DEFAULT_DELAY_SECONDS = 5.0   # Hedge delay until then
+HEDGE_MAX_WORKERS = 16
+
+# Circuit breaker shared by every Gemini call: open after N consecutive failures,
+# short-circuit to static/template fallbacks for the cool-down, then probe
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30
+CIRCUIT_HALF_OPEN_PROBES = 1
+
 # ============================================================================
 # PERCEPTION LAYER SETTINGS
 # ============================================================================
@@ -32,6 +84,17 @@ INTERACTION_WINDOW_MINUTES = 5
 # Maximum interaction buffer size
 MAX_INTERACTION_BUFFER = 100
 
+# Background market poller: watchlist kept hot so perceive() never waits on Yahoo
+MARKET_WATCHLIST = ['AAPL', 'TSLA', 'NVDA', 'SPY', 'BTC-USD']
+MARKET_POLL_INTERVAL_SECONDS = 30
+MARKET_SNAPSHOT_MAX_AGE_SECONDS = 120  # Older snapshots trigger a synchronous fetch
+ENABLE_MARKET_POLLER = False   # Opt-in like the other workers: polls Yahoo every interval once enabled
+
+# Durable telemetry journal (append-only, replayable) for user/mouse events
+ENABLE_TELEMETRY_JOURNAL = False
+TELEMETRY_JOURNAL_PATH = "telemetry.journal"
+DEFAULT_TRADER_ID = int(os.getenv("TRADER_ID", "0"))  # Journal trader id when the controller is given none
+
 # ============================================================================
 # COGNITIVE LAYER SETTINGS
 # ============================================================================
@@ -43,6 +106,9 @@ TILT_THRESHOLDS = {
     'HARD_LOCK': 9        # Score 9-10
 }
 
+# 5-day move (%) that escalates the deterministic regime risk level by one step
+REGIME_RISK_MOVE_PCT = 5.0
+
 # Panic threshold for volatility (2.5% = 0.025)
 PANIC_THRESHOLD = 0.025
 
@@ -72,6 +138,17 @@ CRITICAL_WARNING_COOLDOWN = 2
 # Maximum interventions per hour (prevent spam)
 MAX_INTERVENTIONS_PER_HOUR = 10
 
+# Intervention history: entries kept in memory; older ones are appended to the spill log
+INTERVENTION_HISTORY_SIZE = 200
+INTERVENTION_HISTORY_SPILL_PATH = os.getenv("INTERVENTION_HISTORY_SPILL_PATH", "intervention_history.jsonl")  # None drops them
+
+# Instant interventions: these severities are served from the precomputed library
+# (intervention_library.py) and the LLM-personalized message is swapped in when ready
+INSTANT_INTERVENTION_SEVERITIES = ('CRITICAL', 'HARD_LOCK')
+INTERVENTION_LIBRARY_PATH = "intervention_library.json"  # Built-in messages when missing
+INTERVENTION_LIBRARY_VARIATIONS = 3
+INTERVENTION_PERSONALIZE_WORKERS = 2
+
 # Intervention message max length (words)
 MAX_INTERVENTION_WORDS = 100
 
@@ -138,6 +215,14 @@ REGIME_DEFINITIONS = {
     }
 }
 
+# Relative band around tier boundaries a ticker must clear before changing regime
+REGIME_HYSTERESIS = 0.1
+
+# Market-wide regime scanner (one panel download per refresh)
+REGIME_SCAN_UNIVERSE = ['AAPL', 'TSLA', 'NVDA', 'GOOGL', 'AMZN', 'META', 'MSFT', 'AMD', 'SPY', 'QQQ', 'BTC-USD']
+REGIME_SCAN_INTERVAL_SECONDS = 60
+ENABLE_REGIME_SCANNER = False
+
 # ============================================================================
 # SYSTEM BEHAVIOR
 # ============================================================================
@@ -154,8 +239,49 @@ LOG_USER_ACTIONS = True
 
 # Performance
 CACHE_MARKET_DATA_SECONDS = 60   # Cache market data for 1 minute
+EXPLANATION_CACHE_SECONDS = 300  # Reuse "why it moved" explanations for 5 minutes
+
+# Pre-market cache warming (local time, runs on weekdays before the open)
+ENABLE_CACHE_WARMER = False
+PREMARKET_WARM_TIME = "09:00"
+MARKET_OPEN_TIME = "09:30"       # Warmed entries expire here; warming after the open uses the normal TTLs
+WARM_TOP_PERSONAS = 2            # First N entries of persona_bot.PERSONAS
+WARM_DATA_CONCURRENCY = 4        # Parallel yfinance fetches
+WARM_LLM_CONCURRENCY = 2         # Parallel LLM generations (quota guard)
+
+# Batched explanations: prompt token budget per call and output tokens per ticker
+BATCH_EXPLAIN_TOKEN_BUDGET = 4000
+BATCH_EXPLAIN_OUTPUT_TOKENS_PER_TICKER = 200
 PROFILE_UPDATE_FREQUENCY = 100   # Re-profile every N trades
 
+# End-to-end budget for run_full_analyst_loop; stages that would overrun use their fallback
+ANALYST_LOOP_DEADLINE_SECONDS = 8.0
+DEADLINE_MIN_STAGE_SECONDS = 0.5  # Below this remaining budget an LLM stage is skipped outright
+STAGE_MAX_WORKERS = 8             # Pool that runs budgeted stages
+
+# Delta gating: reuse the last loop's reasoning and intervention while the perception
+# fingerprint (regime, volatility bucket, erratic flag, action counts) is unchanged
+PERCEPTION_STALENESS_SECONDS = 30  # 0 disables reuse
+PERCEPTION_VOLATILITY_BUCKET = 0.005
+
+# API cold start: the controller and its heavy imports load on the first request that needs
+# them; set API_WARMUP_ON_STARTUP=1 to pay that cost in the startup hook instead
+API_WARMUP_ON_STARTUP = os.getenv("API_WARMUP_ON_STARTUP", "0") == "1"
+
+# HTTP caching for polled GET endpoints: content-hash ETags answer unchanged polls with
+# 304, and max-age follows the TTL of the data behind each endpoint
+HTTP_CACHE_MAX_AGE = {
+    'technicals': CACHE_MARKET_DATA_SECONDS,
+    'news': CACHE_MARKET_DATA_SECONDS,
+    'personas': 3600,
+    'trades': 0  # Replaced by /api/trades/load-demo at any time, so always revalidate
+}
+HTTP_COMPRESS_MIN_BYTES = 1000  # gzip (brotli when brotli-asgi is installed) above this size
+
+# Backtest replay (backtest_harness.py): bars per market state, matching the live
+# 5-day hourly download
+BACKTEST_BAR_WINDOW = 35
+
 # ============================================================================
 # ADVANCED: AGENT WEIGHTS
 # ============================================================================
@@ -183,6 +309,23 @@ supportive but firm interventions. Reference specific patterns and provide
 actionable guidance."""
 }
 
+# ============================================================================
+# SOCIAL CONTENT SETTINGS
+# ============================================================================
+
+# Bounded pool for generating platform variants concurrently
+PERSONA_MAX_WORKERS = 4
+
+# Produce all platform variants from one structured prompt instead of one call each
+PERSONA_SINGLE_PROMPT = False
+PERSONA_COMBINED_MAX_OUTPUT_TOKENS = 1200
+
+# Persona content cache shared across users: entries keyed by quantized market snapshot
+PERSONA_CACHE_SECONDS = 300
+PERSONA_CACHE_MAX_ENTRIES = 1024
+PERSONA_CACHE_PRICE_BUCKET_PCT = 0.5   # Prices within ~0.5% share a bucket
+PERSONA_CACHE_RSI_BUCKET = 5           # RSI points per bucket
+
 # ============================================================================
 # LINKEDIN CONFIGURATION
 # ============================================================================
@@ -208,7 +351,9 @@ def get_config():
         'perception': {
             'volatility_threshold': VOLATILITY_THRESHOLD,
             'volume_spike_multiplier': VOLUME_SPIKE_MULTIPLIER,
-            'interaction_window': INTERACTION_WINDOW_MINUTES
+            'interaction_window': INTERACTION_WINDOW_MINUTES,
+            'market_watchlist': MARKET_WATCHLIST,
+            'market_poll_interval': MARKET_POLL_INTERVAL_SECONDS
         },
         'cognitive': {
             'tilt_thresholds': TILT_THRESHOLDS,
@@ -0,0 +1,51 @@
+"""
+Deadline: Per-request time budget shared by every stage of an analyst loop
+Stages check the remaining budget before LLM calls and retry sleeps, and record
+when they had to answer with their deterministic fallback instead
+"""
+import time
+from typing import Dict, List
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a stage would overrun the request budget"""
+
+
+class Deadline:
+    """Monotonic budget started at construction; tracks which stages degraded"""
+
+    def __init__(self, budget_seconds: float, clock=time.monotonic):
+        self.budget_seconds = budget_seconds
+        self.clock = clock
+        self.started = clock()
+        self.degraded_stages: List[str] = []
+
+    def elapsed(self) -> float:
+        return self.clock() - self.started
+
+    def remaining(self) -> float:
+        return max(self.budget_seconds - self.elapsed(), 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def allows(self, seconds: float) -> bool:
+        """True if `seconds` more work still fits in the budget"""
+        return self.remaining() >= seconds
+
+    def sleep(self, seconds: float):
+        """Backoff sleep that refuses to run past the deadline"""
+        if not self.allows(seconds):
+            raise DeadlineExceeded(f"{seconds:.1f}s backoff exceeds remaining {self.remaining():.1f}s budget")
+        time.sleep(seconds)
+
+    def degrade(self, stage: str):
+        if stage not in self.degraded_stages:
+            self.degraded_stages.append(stage)
+
+    def summary(self) -> Dict:
+        return {
+            'budget_seconds': self.budget_seconds,
+            'elapsed_seconds': round(self.elapsed(), 3),
+            'degraded_stages': list(self.degraded_stages)
+        }
@@ -0,0 +1,157 @@
+"""
+Fake LLM: Offline drop-in for genai.GenerativeModel
+Deterministic, schema-valid responses per prompt type with injectable latency
+distributions, 429 bursts and failure rates, so the whole system can be tested and
+load-tested without GEMINI_API_KEY or network access
+"""
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Dict
+
+from config import FAKE_LLM_PROFILE, FAKE_LLM_PROFILES, FAKE_LLM_SEED
+
+_TICKER_BLOCK = re.compile(r'^\[([A-Z0-9.^=\-]+)\]', re.MULTILINE)
+_TICKER_MENTION = re.compile(r'\b(?:why|for|of) ([A-Z][A-Z0-9.\-]{0,9})\b')
+
+# Plain-text responses by prompt type (first keyword found in the prompt wins)
+TEXT_RESPONSES = [
+    ('Generate an intervention message',
+     "You're trading faster than your plan allows after a loss. This is the same pattern that hurt "
+     "you before. Step away for five minutes, then re-check your stop before the next order."),
+    ('combined insight',
+     "The market just moved sharply, and based on your history you tend to chase in these "
+     "situations. Consider waiting for your setup instead of reacting."),
+    ('morning market briefing',
+     "Markets open with a cautious tone as leaders consolidate recent gains.\n\n"
+     "The largest movers are reacting to earnings and rate expectations rather than new information.\n\n"
+     "Watch volume at the open and key support levels for confirmation."),
+    ('Explain why',
+     "{ticker} moved on a mix of sector rotation and recent headlines, with price holding above "
+     "short-term support. Volume and RSI suggest the move is orderly. Watch the next resistance level."),
+    ('tweet',
+     "{ticker} is testing its range again. Process over prediction. #Trading"),
+]
+DEFAULT_TEXT = "Offline response for {ticker}: conditions are mixed, stay disciplined and follow your plan."
+
+
+class FakeUsage:
+    def __init__(self, prompt_token_count: int, candidates_token_count: int):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+
+class FakeResponse:
+    """The subset of GenerateContentResponse the agents read"""
+
+    def __init__(self, text: str, prompt: str):
+        self.text = text
+        self.usage_metadata = FakeUsage(len(prompt) // 4 + 1, len(text) // 4 + 1)
+
+
+class LatencyProfile:
+    """
+    Log-normal latency fitted to a median and p95 (milliseconds), plus failure injection:
+    `failure_rate` of calls raise a 500, and `rate_limit_rate` of calls start a burst of
+    `rate_limit_burst` consecutive 429s.
+    """
+
+    def __init__(self, median_ms: float = 0, p95_ms: float = 0, failure_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, rate_limit_burst: int = 0):
+        self.median_ms = median_ms
+        self.p95_ms = max(p95_ms, median_ms)
+        self.failure_rate = failure_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rate_limit_burst = rate_limit_burst
+
+    @classmethod
+    def named(cls, name: str) -> 'LatencyProfile':
+        return cls(**FAKE_LLM_PROFILES[name])
+
+    def sample_seconds(self, rng: random.Random) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        sigma = math.log(self.p95_ms / self.median_ms) / 1.645 if self.p95_ms > self.median_ms else 0.0
+        return rng.lognormvariate(math.log(self.median_ms), sigma) / 1000.0
+
+
+def _seed(prompt: str) -> int:
+    return int(hashlib.md5(prompt.encode()).hexdigest()[:8], 16)
+
+
+def _ticker(prompt: str) -> str:
+    match = _TICKER_MENTION.search(prompt) or _TICKER_BLOCK.search(prompt)
+    return match.group(1) if match else 'the market'
+
+
+def synthesize(schema: Dict, prompt: str, seed: int, key: str = 'value'):
+    """Deterministic instance of an OpenAPI-style response_schema"""
+    kind = schema['type']
+    if kind == 'object':
+        return {name: synthesize(sub, prompt, seed + i, name)
+                for i, (name, sub) in enumerate(schema.get('properties', {}).items())}
+    if kind == 'array':
+        items = schema.get('items', {'type': 'string'})
+        if items['type'] == 'object' and 'ticker' in items.get('properties', {}):
+            # Batched per-ticker prompts: one entry per "[TICKER]" block
+            return [{**synthesize(items, prompt, seed + i, key), 'ticker': ticker}
+                    for i, ticker in enumerate(_TICKER_BLOCK.findall(prompt))]
+        return [synthesize(items, prompt, seed + i, key) for i in range(2 + seed % 2)]
+    if 'enum' in schema:
+        return schema['enum'][seed % len(schema['enum'])]
+    if kind == 'string':
+        return f"Offline {key.replace('_', ' ')} for {_ticker(prompt)}."
+    if kind == 'boolean':
+        return seed % 2 == 0
+    low, high = schema.get('minimum', 0), schema.get('maximum', 100)
+    if kind == 'integer':
+        return int(low + seed % (int(high - low) + 1))
+    return round(low + (seed % 1000) / 1000 * (high - low), 3)
+
+
+class FakeGenerativeModel:
+    """generate_content-compatible fake; responses depend only on the prompt and schema"""
+
+    def __init__(self, model_name: str = 'fake', profile=None, seed: int = FAKE_LLM_SEED, sleep=time.sleep):
+        self.model_name = model_name
+        self.profile = profile if isinstance(profile, LatencyProfile) else LatencyProfile.named(profile or FAKE_LLM_PROFILE)
+        self.sleep = sleep
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._burst_remaining = 0
+        self._lock = threading.Lock()
+
+    def _inject(self) -> float:
+        """Draws this call's latency and raises injected 429/500 errors"""
+        with self._lock:
+            self.calls += 1
+            latency = self.profile.sample_seconds(self._rng)
+            if self._burst_remaining > 0:
+                self._burst_remaining -= 1
+                error = "429 Too Many Requests (injected burst)"
+            elif self._rng.random() < self.profile.rate_limit_rate:
+                self._burst_remaining = max(self.profile.rate_limit_burst - 1, 0)
+                error = "429 Too Many Requests (injected burst)"
+            elif self._rng.random() < self.profile.failure_rate:
+                error = "500 Internal Server Error (injected)"
+            else:
+                error = None
+        self.sleep(latency)
+        if error:
+            raise RuntimeError(error)
+        return latency
+
+    def generate_content(self, prompt: str, generation_config: Dict = None, **kwargs) -> FakeResponse:
+        self._inject()
+        seed = _seed(prompt)
+        schema = (generation_config or {}).get('response_schema')
+        if schema is not None:
+            return FakeResponse(json.dumps(synthesize(schema, prompt, seed)), prompt)
+
+        text = next((template for keyword, template in TEXT_RESPONSES if keyword.lower() in prompt.lower()),
+                    DEFAULT_TEXT)
+        return FakeResponse(text.format(ticker=_ticker(prompt)), prompt)
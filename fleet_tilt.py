@@ -0,0 +1,117 @@
+"""
+Cognitive Layer: Fleet Tilt Scoring
+Rule-based tilt scores and severities for thousands of traders in one vectorized
+pass (same rules as TiltDetectorAgent.score_tilt); only traders whose severity
+changed since the previous pass are returned, so LLM work is limited to those
+"""
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from cognitive_layer import HIGH_VOL_REGIMES, REVENGE_HISTORY_SIGNALS, TILT_WEIGHTS
+from config import TILT_THRESHOLDS
+from perception_layer import ERRATIC_CANCEL_COUNT, ERRATIC_MOUSE_SPEED, ERRATIC_ORDER_COUNT
+from regime_scanner import REGIME_TIERS
+
+SEVERITIES = np.array(['NONE', 'SOFT_NUDGE', 'CRITICAL', 'HARD_LOCK'])
+SEVERITY_BOUNDARIES = np.array([TILT_THRESHOLDS[name] for name in SEVERITIES[1:]])
+HIGH_VOL_TIERS = np.array([tier in HIGH_VOL_REGIMES for tier in REGIME_TIERS])
+
+
+def high_vol_mask(regimes) -> np.ndarray:
+    """Regime names, or tier indices into REGIME_TIERS (as produced by RegimeScanner)"""
+    regimes = np.asarray(regimes)
+    if regimes.dtype.kind in 'iu':
+        return HIGH_VOL_TIERS[np.clip(regimes, 0, len(REGIME_TIERS) - 1)] & (regimes >= 0)
+    return np.isin(regimes, HIGH_VOL_REGIMES)
+
+
+def erratic_mask(cancel_count=0, order_count=0, mouse_speed=0) -> np.ndarray:
+    """Vectorized UserStreamProcessor.analyze_interaction_velocity erratic rule"""
+    return ((np.asarray(cancel_count) > ERRATIC_CANCEL_COUNT)
+            | (np.asarray(order_count) > ERRATIC_ORDER_COUNT)
+            | (np.asarray(mouse_speed) > ERRATIC_MOUSE_SPEED))
+
+
+def score_fleet(regimes, is_erratic, revenge_signals) -> np.ndarray:
+    """Tilt score per trader from aligned arrays (N,)"""
+    return (high_vol_mask(regimes) * TILT_WEIGHTS['high_vol']
+            + np.asarray(is_erratic, dtype=bool) * TILT_WEIGHTS['erratic']
+            + (np.asarray(revenge_signals) > REVENGE_HISTORY_SIGNALS) * TILT_WEIGHTS['revenge_history']
+            ).astype(np.int8)
+
+
+def severity_codes(scores: np.ndarray) -> np.ndarray:
+    """Indices into SEVERITIES (same thresholds as InterventionEngine._assess_severity)"""
+    return np.searchsorted(SEVERITY_BOUNDARIES, scores, side='right').astype(np.int8)
+
+
+class FleetTiltScorer:
+    """
+    Keeps the last severity per trader id (sorted by id). Each `update` merges in the
+    traders passed, so a partial batch leaves the others as they were, and returns
+    only those whose severity changed (new traders start at NONE).
+    """
+
+    def __init__(self):
+        self.trader_ids = np.array([])
+        self.severities = np.array([], dtype=np.int8)
+        self.last_scores = np.array([], dtype=np.int8)
+        self._lock = threading.Lock()
+
+    def _locate(self, trader_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Position of each id in the stored ids, and whether it is already known"""
+        if np.array_equal(trader_ids, self.trader_ids):
+            return np.arange(len(trader_ids)), np.ones(len(trader_ids), dtype=bool)  # Same fleet: no search
+        if not len(self.trader_ids):
+            return np.zeros(len(trader_ids), dtype=np.intp), np.zeros(len(trader_ids), dtype=bool)
+        pos = np.searchsorted(self.trader_ids, trader_ids)
+        found = self.trader_ids[np.minimum(pos, len(self.trader_ids) - 1)] == trader_ids
+        return pos, found
+
+    def _merge(self, trader_ids: np.ndarray, codes: np.ndarray, scores: np.ndarray,
+               pos: np.ndarray, found: np.ndarray):
+        self.severities[pos[found]] = codes[found]
+        self.last_scores[pos[found]] = scores[found]
+        if found.all():
+            return
+        new_ids, first = np.unique(trader_ids[~found], return_index=True)
+        at, new_codes, new_scores = pos[~found][first], codes[~found][first], scores[~found][first]
+        if not len(self.trader_ids):
+            self.trader_ids, self.severities, self.last_scores = new_ids, new_codes, new_scores
+            return
+        self.trader_ids = np.insert(self.trader_ids, at, new_ids)
+        self.severities = np.insert(self.severities, at, new_codes)
+        self.last_scores = np.insert(self.last_scores, at, new_scores)
+
+    def update(self, trader_ids, regimes, revenge_signals, is_erratic=None, cancel_count=0,
+               order_count=0, mouse_speed=0) -> List[Dict]:
+        """
+        Scores a batch of traders from aligned (N,) arrays. Pass `is_erratic` directly, or the
+        raw cancel/order counts and mouse speed to derive it. Returns the severity changes.
+        """
+        trader_ids = np.asarray(trader_ids)
+        if is_erratic is None:
+            is_erratic = erratic_mask(cancel_count, order_count, mouse_speed)
+        scores = score_fleet(regimes, is_erratic, revenge_signals)
+        codes = severity_codes(scores)
+
+        with self._lock:
+            pos, found = self._locate(trader_ids)
+            previous = np.zeros(len(trader_ids), dtype=np.int8)
+            previous[found] = self.severities[pos[found]]
+            changed = np.flatnonzero(codes != previous)
+            self._merge(trader_ids, codes, scores, pos, found)
+
+        return [{
+            'trader_id': trader_ids[i].item(),
+            'tilt_score': int(scores[i]),
+            'severity': str(SEVERITIES[codes[i]]),
+            'previous_severity': str(SEVERITIES[previous[i]])
+        } for i in changed]
+
+    def severity_counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts = np.bincount(self.severities, minlength=len(SEVERITIES))
+        return {str(name): int(count) for name, count in zip(SEVERITIES, counts)}
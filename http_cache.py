@@ -0,0 +1,45 @@
+"""
+API Layer: HTTP Caching
+Content-hash ETags and Cache-Control for polled GET endpoints: a poll whose
+If-None-Match still matches is answered with an empty 304
+"""
+import hashlib
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match check (weak comparison: compression proxies may add W/)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or etag in (tag[2:] if tag.startswith('W/') else tag for tag in candidates)
+
+
+def cache_control(max_age: int, public: bool = True) -> str:
+    if max_age <= 0:
+        return "no-cache"  # Cacheable, but revalidated (cheaply, via the ETag) on every use
+    return f"{'public' if public else 'private'}, max-age={max_age}"
+
+
+def cached_response(request: Request, payload, max_age: int, public: bool = True) -> Response:
+    """
+    JSON response with an ETag over the rendered body and Cache-Control max-age.
+    Error payloads ({'error': ...}) are sent with no-store so a transient failure is not cached.
+    """
+    response = JSONResponse(jsonable_encoder(payload))
+    if isinstance(payload, dict) and 'error' in payload:
+        response.headers['Cache-Control'] = "no-store"
+        return response
+
+    headers = {'ETag': etag_for(response.body), 'Cache-Control': cache_control(max_age, public)}
+    if etag_matches(request.headers.get('if-none-match'), headers['ETag']):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
@@ -0,0 +1,116 @@
+"""
+Action Layer: Intervention History
+Bounded, time-indexed record of delivered interventions with running per-severity
+counters, so stats are constant-time and memory stays flat in long-running processes
+"""
+import json
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List
+
+from config import INTERVENTION_HISTORY_SIZE, INTERVENTION_HISTORY_SPILL_PATH
+
+SEVERITIES = ('SOFT_NUDGE', 'CRITICAL', 'HARD_LOCK')
+
+
+class RollingCounter:
+    """Per-kind counts over a sliding window, kept in a fixed number of time buckets"""
+
+    def __init__(self, window_seconds: float, buckets: int):
+        self.bucket_seconds = window_seconds / buckets
+        self.buckets = buckets
+        self.counts = Counter()
+        self._buckets = deque()  # (bucket index, Counter), oldest first
+
+    def _expire(self, now: float):
+        oldest = int(now // self.bucket_seconds) - self.buckets + 1
+        while self._buckets and self._buckets[0][0] < oldest:
+            self.counts -= self._buckets.popleft()[1]
+
+    def add(self, kind: str, now: float):
+        self._expire(now)
+        index = int(now // self.bucket_seconds)
+        if not self._buckets or self._buckets[-1][0] != index:
+            self._buckets.append((index, Counter()))
+        self._buckets[-1][1][kind] += 1
+        self.counts[kind] += 1
+
+    def snapshot(self, now: float) -> Dict[str, int]:
+        self._expire(now)
+        return {kind: self.counts[kind] for kind in SEVERITIES}
+
+
+class InterventionHistory:
+    """
+    Keeps the last `maxlen` interventions in memory; older ones are appended to a
+    JSON-lines log at `spill_path` (dropped when it is None), opened per write so no
+    handle outlives the spill. All-time totals and last-hour / last-day counts are
+    maintained on append.
+    """
+
+    def __init__(self, maxlen: int = INTERVENTION_HISTORY_SIZE, spill_path: str = INTERVENTION_HISTORY_SPILL_PATH,
+                 clock=time.time):
+        self.maxlen = maxlen
+        self.spill_path = spill_path
+        self.clock = clock
+        self.totals = Counter()
+        self.total = 0
+        self.spilled = 0
+        self.windows = {'last_hour': RollingCounter(3600, 60), 'last_day': RollingCounter(86400, 96)}
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def append(self, intervention: Dict):
+        with self._lock:
+            now = self.clock()
+            self._recent.append(intervention)
+            self.total += 1
+            self.totals[intervention['type']] += 1
+            for window in self.windows.values():
+                window.add(intervention['type'], now)
+            while len(self._recent) > self.maxlen:
+                self._spill_entry(self._recent.popleft())
+
+    def _spill_entry(self, intervention: Dict):
+        self.spilled += 1
+        if self.spill_path is None:
+            return
+        try:
+            with open(self.spill_path, 'a', encoding='utf-8') as spill:
+                spill.write(json.dumps(intervention, default=str) + '\n')
+        except OSError as e:
+            print(f"Intervention history spill failed: {e}")
+
+    def recent(self, limit: int = None) -> List[Dict]:
+        """Retained interventions, oldest first"""
+        with self._lock:
+            items = list(self._recent)
+        return items if limit is None else items[-limit:]
+
+    def last(self) -> Dict:
+        with self._lock:
+            return self._recent[-1] if self._recent else None
+
+    def stats(self) -> Dict:
+        """Constant-time analytics (same keys as before, plus rolling windows)"""
+        with self._lock:
+            if not self.total:
+                return {'total': 0}
+            now = self.clock()
+            return {
+                'total': self.total,
+                'soft_nudges': self.totals['SOFT_NUDGE'],
+                'critical_warnings': self.totals['CRITICAL'],
+                'hard_locks': self.totals['HARD_LOCK'],
+                'last_intervention': self._recent[-1]['timestamp'],
+                **{name: window.snapshot(now) for name, window in self.windows.items()},
+                'retained': len(self._recent),
+                'spilled': self.spilled
+            }
+
+    def __len__(self) -> int:
+        return self.total
+
+    def __iter__(self):
+        return iter(self.recent())
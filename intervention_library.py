@@ -0,0 +1,177 @@
+"""
+Action Layer: Intervention Library
+Precomputed intervention messages indexed by (severity, dominant bias, regime) with
+several variations each, so a CRITICAL warning or HARD_LOCK is shown the moment it is
+triggered; the LLM-personalized message is swapped in later by the InterventionEngine
+
+Build (or rebuild with LLM-written variations) offline:
+    python intervention_library.py [--out intervention_library.json] [--llm]
+"""
+import argparse
+import json
+import os
+import threading
+from typing import Dict, List
+
+from config import (BIAS_DEFINITIONS, HARD_LOCK_DURATION, INTERVENTION_LIBRARY_PATH,
+                    INTERVENTION_LIBRARY_VARIATIONS, REGIME_DEFINITIONS)
+
+LIBRARY_SEVERITIES = ('CRITICAL', 'HARD_LOCK')
+DEFAULT_BIAS = 'DEFAULT'  # Profiles without a known dominant bias
+
+BIAS_LINES = {
+    'LOSS_AVERSION_REVENGE': [
+        "You're trying to win back the last loss.",
+        "This is the revenge pattern from your history.",
+        "Chasing a loss is what has cost you most before.",
+    ],
+    'FOMO_OVERTRADING': [
+        "You're chasing a move you didn't plan for.",
+        "This is the fear-of-missing-out pattern from your history.",
+        "Entries made to avoid missing out have been your weakest trades.",
+    ],
+    'POOR_EDGE_EXECUTION': [
+        "These entries don't match a setup with a proven edge.",
+        "Your recent trades have drifted away from your best setups.",
+        "Trading without an edge only adds to the drawdown.",
+    ],
+    'CUTTING_WINNERS_EARLY': [
+        "You're reacting to every tick instead of your plan.",
+        "Jumping in and out is how you have cut winners short before.",
+        "Your best trades came from letting the plan work.",
+    ],
+    'DISCIPLINED_TRADER': [
+        "Even a disciplined trader slips under pressure.",
+        "This isn't how you normally trade.",
+        "Your own rules say to slow down right now.",
+    ],
+    DEFAULT_BIAS: [
+        "Your activity has moved away from your plan.",
+        "This pace is a sign of emotional trading.",
+        "You're trading faster than your process allows.",
+    ],
+}
+
+REGIME_LINES = {
+    'LOW_VOL': "The market is calm, so there is no reason to rush.",
+    'HIGH_VOL': "Volatility is elevated, and every mistake costs more.",
+    'CRISIS': "The market is in crisis mode, where size and speed multiply losses.",
+}
+
+ACTION_LINES = {
+    'CRITICAL': [
+        "Step back for two minutes before placing another order.",
+        "Re-read your plan and confirm your stop before the next trade.",
+        "Close the order ticket and take five slow breaths.",
+    ],
+    'HARD_LOCK': [
+        "Trading is paused for {minutes} minutes so you can reset.",
+        "Your account is locked for {minutes} minutes. Walk away from the screen.",
+        "Recovery mode: no new orders for {minutes} minutes.",
+    ],
+}
+
+
+def library_key(severity: str, bias: str, regime: str) -> str:
+    return f"{severity}|{bias}|{regime}"
+
+
+def build_library(variations: int = INTERVENTION_LIBRARY_VARIATIONS) -> Dict[str, List[str]]:
+    """Deterministic library for every (severity, bias, regime); `{score}` is filled at delivery"""
+    library = {}
+    for severity in LIBRARY_SEVERITIES:
+        for bias in list(BIAS_DEFINITIONS) + [DEFAULT_BIAS]:
+            for regime in REGIME_DEFINITIONS:
+                bias_lines, actions = BIAS_LINES[bias], ACTION_LINES[severity]
+                library[library_key(severity, bias, regime)] = [
+                    f"Tilt {{score}}/10. {bias_lines[i % len(bias_lines)]} {REGIME_LINES[regime]} "
+                    f"{actions[i % len(actions)]}"
+                    for i in range(variations)
+                ]
+    return library
+
+
+class InterventionLibrary:
+    """Serves library messages, rotating through the variations per trader and key"""
+
+    def __init__(self, entries: Dict[str, List[str]] = None, path: str = INTERVENTION_LIBRARY_PATH):
+        if entries is None:
+            entries = self.load(path) if path and os.path.exists(path) else build_library()
+        self.entries = entries
+        self._next = {}  # (trader_id, key) -> next variation index
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load(path: str) -> Dict[str, List[str]]:
+        try:
+            with open(path, encoding='utf-8') as fh:
+                return json.load(fh)
+        except (OSError, ValueError) as e:
+            print(f"Intervention library {path} unreadable, using built-in messages: {e}")
+            return build_library()
+
+    def covers(self, severity: str) -> bool:
+        return severity in LIBRARY_SEVERITIES
+
+    def message(self, severity: str, bias: str, regime: str, score: int, trader_id: str = 'default') -> str:
+        key = library_key(severity, bias, regime)
+        if key not in self.entries:
+            key = library_key(severity, DEFAULT_BIAS, regime if regime in REGIME_DEFINITIONS else 'HIGH_VOL')
+        variations = self.entries[key]
+        with self._lock:
+            index = self._next.get((trader_id, key), 0)
+            self._next[(trader_id, key)] = (index + 1) % len(variations)
+        return variations[index].replace('{score}', str(score)).replace('{minutes}', str(HARD_LOCK_DURATION))
+
+
+VARIATIONS_SCHEMA = {
+    'type': 'object',
+    'properties': {'variations': {'type': 'array', 'items': {'type': 'string'}}},
+    'required': ['variations']
+}
+
+
+def rewrite_with_llm(library: Dict[str, List[str]], api_key: str = None) -> Dict[str, List[str]]:
+    """Asks the LLM for fresh variations per key; keys it fails on keep the built-in text"""
+    from llm_client import configure, generate_structured, routed_model
+    configure(api_key)
+    model = routed_model()
+    rewritten = {}
+    for key, variations in library.items():
+        severity, bias, regime = key.split('|')
+        prompt = f"""You are a trading psychology coach. Write {len(variations)} different short intervention
+messages (under 40 words each) for a trader with a tilt score of {{score}}/10.
+
+INTERVENTION TYPE: {severity}
+DOMINANT BIAS: {bias} ({BIAS_DEFINITIONS.get(bias, {}).get('description', 'unknown')})
+MARKET REGIME: {regime} ({REGIME_DEFINITIONS[regime]['description']})
+
+Keep the literal placeholder {{score}} in every message{' and {minutes} for the lock length' if severity == 'HARD_LOCK' else ''}.
+Respond in JSON with a "variations" array."""
+        try:
+            written = generate_structured(model, prompt, VARIATIONS_SCHEMA, 600,
+                                          agent='intervention_library', endpoint='generate_intervention')
+            rewritten[key] = [text for text in written['variations'] if '{score}' in text] or variations
+        except Exception as e:
+            print(f"{key}: keeping built-in variations ({e})")
+            rewritten[key] = variations
+    return rewritten
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Builds the precomputed intervention library")
+    parser.add_argument("--out", default=INTERVENTION_LIBRARY_PATH)
+    parser.add_argument("--variations", type=int, default=INTERVENTION_LIBRARY_VARIATIONS)
+    parser.add_argument("--llm", action="store_true", help="have the LLM write the variations")
+    args = parser.parse_args()
+
+    library = build_library(args.variations)
+    if args.llm:
+        library = rewrite_with_llm(library, os.getenv("GEMINI_API_KEY"))
+    with open(args.out, 'w', encoding='utf-8') as fh:
+        json.dump(library, fh, indent=2)
+    print(f"Wrote {len(library)} keys x {args.variations} variations to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Action Layer: Intervention Scheduler
+Per-trader lock windows, cooldowns and hourly caps, checked before any LLM call
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict
+
+from config import CRITICAL_WARNING_COOLDOWN, HARD_LOCK_DURATION, MAX_INTERVENTIONS_PER_HOUR
+
+SEVERITY_RANK = {'NONE': 0, 'SOFT_NUDGE': 1, 'CRITICAL': 2, 'HARD_LOCK': 3}
+
+# Minutes an intervention stays active; while active, equal or lower severities get it again
+ACTIVE_MINUTES = {'HARD_LOCK': HARD_LOCK_DURATION, 'CRITICAL': CRITICAL_WARNING_COOLDOWN}
+
+
+class TraderSchedule:
+    """Delivery times in the last hour and the currently active intervention"""
+
+    def __init__(self):
+        self.deliveries = deque()
+        self.active = None
+        self.active_until = 0.0
+        self.last = None
+
+
+class InterventionScheduler:
+    """
+    Decides whether a new intervention may be generated for a trader.
+    - A HARD_LOCK or CRITICAL warning stays active for HARD_LOCK_DURATION /
+      CRITICAL_WARNING_COOLDOWN minutes; requests of the same or lower severity
+      get the active intervention back. Escalations always go through.
+    - At MAX_INTERVENTIONS_PER_HOUR, lower severities get the last intervention back;
+      a HARD_LOCK is still delivered, but templated (see `at_hourly_limit`).
+    """
+
+    def __init__(self, max_per_hour: int = MAX_INTERVENTIONS_PER_HOUR, active_minutes: Dict = None,
+                 clock=time.time):
+        self.max_per_hour = max_per_hour
+        self.active_minutes = ACTIVE_MINUTES if active_minutes is None else active_minutes
+        self.clock = clock
+        self._traders: Dict[str, TraderSchedule] = {}
+        self._lock = threading.Lock()
+
+    def _schedule(self, trader_id: str) -> TraderSchedule:
+        schedule = self._traders.get(trader_id)
+        if schedule is None:
+            schedule = self._traders[trader_id] = TraderSchedule()
+        cutoff = self.clock() - 3600
+        while schedule.deliveries and schedule.deliveries[0] <= cutoff:
+            schedule.deliveries.popleft()
+        return schedule
+
+    def active_intervention(self, trader_id: str, severity: str) -> Dict:
+        """The intervention to show again instead of generating one, or None"""
+        with self._lock:
+            schedule = self._schedule(trader_id)
+            if schedule.active is not None and self.clock() < schedule.active_until:
+                if SEVERITY_RANK[severity] <= SEVERITY_RANK[schedule.active['type']]:
+                    return self._repeat(schedule.active, 'active', schedule.active_until)
+            if len(schedule.deliveries) >= self.max_per_hour and schedule.last is not None \
+                    and severity != 'HARD_LOCK':
+                return self._repeat(schedule.last, 'rate_limited')
+            return None
+
+    def at_hourly_limit(self, trader_id: str) -> bool:
+        with self._lock:
+            return len(self._schedule(trader_id).deliveries) >= self.max_per_hour
+
+    def record(self, trader_id: str, intervention: Dict):
+        """Registers a delivered intervention and opens its lock/cooldown window"""
+        with self._lock:
+            schedule = self._schedule(trader_id)
+            now = self.clock()
+            schedule.deliveries.append(now)
+            schedule.last = intervention
+            minutes = self.active_minutes.get(intervention['type'])
+            if minutes:
+                schedule.active = intervention
+                schedule.active_until = now + minutes * 60
+
+    def snapshot(self, trader_id: str) -> Dict:
+        with self._lock:
+            schedule = self._schedule(trader_id)
+            active = schedule.active is not None and self.clock() < schedule.active_until
+            return {
+                'active': schedule.active['type'] if active else None,
+                'active_until': datetime.fromtimestamp(schedule.active_until).isoformat() if active else None,
+                'delivered_last_hour': len(schedule.deliveries),
+                'max_per_hour': self.max_per_hour
+            }
+
+    @staticmethod
+    def _repeat(intervention: Dict, reason: str, until: float = None) -> Dict:
+        repeated = {**intervention, 'repeated': True, 'repeat_reason': reason}
+        if until is not None:
+            repeated['active_until'] = datetime.fromtimestamp(until).isoformat()
+        return repeated
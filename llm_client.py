@@ -0,0 +1,396 @@
+"""
+LLM Client: Shared helpers around the Gemini generate_content surface
+Instrumented generation, schema-constrained JSON output with per-agent token caps
+and local validation, tiered model routing with latency-hedged fallback, and a
+shared circuit breaker that fails fast while Gemini is down
+"""
+import json
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FuturesTimeout, wait
+from typing import Dict, List
+
+import google.generativeai as genai
+from google.api_core import exceptions as api_exceptions
+
+from config import (
+    LLM_BACKEND, FALLBACK_MODEL, LLM_TEMPERATURE, MODEL_TIERS, TASK_MODEL_TIERS, DEFAULT_MODEL_TIER,
+    ENABLE_HEDGED_REQUESTS, HEDGE_MIN_SAMPLES, HEDGE_DEFAULT_DELAY_SECONDS, HEDGE_MAX_WORKERS,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS, CIRCUIT_HALF_OPEN_PROBES
+)
+from fake_llm import FakeGenerativeModel
+from metrics import is_rate_limit, record_circuit_rejected, record_circuit_transition, record_hedge, record_llm_call
+
+
+class SchemaValidationError(ValueError):
+    """Raised when a structured LLM response does not match the declared schema"""
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling Gemini while the circuit breaker is open"""
+
+
+_JSON_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'integer': int,
+    'number': (int, float),
+    'boolean': bool
+}
+
+
+# Schema fields the Gemini SDK accepts; anything else (e.g. minimum/maximum) is enforced locally by validate()
+SDK_SCHEMA_FIELDS = {'type', 'format', 'description', 'nullable', 'enum', 'items', 'max_items', 'min_items',
+                     'properties', 'required'}
+
+
+def sdk_schema(schema: Dict) -> Dict:
+    """Copy of a response schema restricted to the fields the SDK can serialize"""
+    result = {}
+    for key, value in schema.items():
+        if key not in SDK_SCHEMA_FIELDS:
+            continue
+        if key == 'properties':
+            value = {name: sdk_schema(sub) for name, sub in value.items()}
+        elif key == 'items':
+            value = sdk_schema(value)
+        result[key] = value
+    return result
+
+
+def structured_config(schema: Dict, max_output_tokens: int) -> Dict:
+    """generation_config for constrained JSON output"""
+    return {
+        'response_mime_type': 'application/json',
+        'response_schema': sdk_schema(schema),
+        'max_output_tokens': max_output_tokens
+    }
+
+
+def parse_json(text: str):
+    """Parses a JSON response, tolerating markdown code fences"""
+    text = (text or '').strip()
+    if text.startswith('```'):
+        text = text.strip('`')
+        if text.lower().startswith('json'):
+            text = text[4:]
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        raise SchemaValidationError(f"Response is not valid JSON: {e}")
+
+
+def validate(data, schema: Dict, path: str = '$') -> List[str]:
+    """Checks data against the OpenAPI-style schema subset used for response_schema"""
+    expected = _JSON_TYPES[schema['type']]
+    # bool is an int subclass; don't let True pass as an integer or number
+    if not isinstance(data, expected) or (isinstance(data, bool) and schema['type'] != 'boolean'):
+        return [f"{path}: expected {schema['type']}, got {type(data).__name__}"]
+
+    errors = []
+    if 'enum' in schema and data not in schema['enum']:
+        errors.append(f"{path}: {data!r} not in {schema['enum']}")
+    if schema['type'] in ('integer', 'number'):
+        if 'minimum' in schema and data < schema['minimum']:
+            errors.append(f"{path}: {data} < {schema['minimum']}")
+        if 'maximum' in schema and data > schema['maximum']:
+            errors.append(f"{path}: {data} > {schema['maximum']}")
+    if schema['type'] == 'object':
+        for key in schema.get('required', []):
+            if key not in data:
+                errors.append(f"{path}.{key}: missing")
+        for key, sub_schema in schema.get('properties', {}).items():
+            if key in data:
+                errors.extend(validate(data[key], sub_schema, f"{path}.{key}"))
+    if schema['type'] == 'array' and 'items' in schema:
+        for i, item in enumerate(data):
+            errors.extend(validate(item, schema['items'], f"{path}[{i}]"))
+    return errors
+
+
+_configured_key = None
+_configure_lock = threading.Lock()
+
+
+def configure(api_key: str = None, required: bool = False):
+    """
+    Configures the Gemini SDK for an agent; the offline fake backend needs no key.
+    The SDK client is process-wide, so repeat calls with the same key are no-ops.
+    """
+    global _configured_key
+    if LLM_BACKEND == 'fake':
+        return
+    if required and not api_key:
+        raise ValueError("API Key is required")
+    with _configure_lock:
+        if _configured_key is not None and _configured_key == api_key:
+            return
+        genai.configure(api_key=api_key)
+        _configured_key = api_key
+
+
+def create_model(name: str, temperature: float = LLM_TEMPERATURE):
+    """Backend model for a name: Gemini, or the offline fake when LLM_BACKEND == 'fake'"""
+    if LLM_BACKEND == 'fake':
+        return FakeGenerativeModel(name)
+    return genai.GenerativeModel(name, generation_config={'temperature': temperature})
+
+
+class ModelRouter:
+    """
+    Assigns a model tier per task and hedges slow requests.
+    When the routed model has not answered within its observed p95 latency, the same
+    prompt is sent to FALLBACK_MODEL and whichever answer arrives first wins.
+    """
+
+    def __init__(self, tiers: Dict[str, str] = None, task_tiers: Dict[str, str] = None,
+                 hedge_model: str = FALLBACK_MODEL, temperature: float = LLM_TEMPERATURE,
+                 hedging: bool = ENABLE_HEDGED_REQUESTS, model_factory=None):
+        self.tiers = tiers or MODEL_TIERS
+        self.task_tiers = task_tiers or TASK_MODEL_TIERS
+        self.hedge_model = hedge_model
+        self.temperature = temperature
+        self.hedging = hedging
+        self.model_factory = model_factory or (lambda name: create_model(name, self.temperature))
+        self._models = {}
+        self._latencies = {}  # model name -> recent successful latencies
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="llm-hedge")
+        if hedging and set(self.tiers.values()) == {hedge_model}:
+            print(f"LLM hedging is inactive: every model tier is the hedge model {hedge_model} "
+                  f"(set FALLBACK_MODEL to a different model than PRIMARY_MODEL)")
+
+    def model_name_for(self, task: str) -> str:
+        return self.tiers[self.task_tiers.get(task, DEFAULT_MODEL_TIER)]
+
+    def get_model(self, name: str):
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self.model_factory(name)
+            return self._models[name]
+
+    def p95_latency(self, name: str) -> float:
+        """Observed p95 latency of a model, or the default hedge delay until enough samples exist"""
+        with self._lock:
+            samples = sorted(self._latencies.get(name, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY_SECONDS
+        return samples[min(int(len(samples) * 0.95), len(samples) - 1)]
+
+    def _call(self, name: str, prompt: str, generation_config: Dict = None):
+        started = time.perf_counter()
+        model = self.get_model(name)
+        if generation_config is None:
+            response = model.generate_content(prompt)
+        else:
+            response = model.generate_content(prompt, generation_config=generation_config)
+        with self._lock:
+            self._latencies.setdefault(name, deque(maxlen=200)).append(time.perf_counter() - started)
+        return response
+
+    def generate(self, task: str, prompt: str, generation_config: Dict = None):
+        name = self.model_name_for(task)
+        if not self.hedging or self.hedge_model == name:
+            # Fast-tier tasks already run on the hedge model: a hedge would just duplicate the request
+            return self._call(name, prompt, generation_config)
+
+        primary = self._executor.submit(self._call, name, prompt, generation_config)
+        try:
+            return primary.result(timeout=self.p95_latency(name))
+        except FuturesTimeout:
+            record_hedge(name, 'sent')
+        except Exception as e:
+            if is_rate_limit(e):
+                raise  # Callers back off and retry 429s; failing over here would double every attempt
+            record_hedge(name, 'failover')
+            return self._call(self.hedge_model, prompt, generation_config)
+
+        hedge = self._executor.submit(self._call, self.hedge_model, prompt, generation_config)
+        pending = {primary, hedge}
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    record_hedge(name, 'hedge_won' if future is hedge else 'primary_won')
+                    return future.result()
+                first_error = first_error or future.exception()
+        raise first_error
+
+
+class RoutedModel:
+    """generate_content-compatible handle that sends every call through the shared router"""
+
+    def __init__(self, router: ModelRouter, task: str = None):
+        self.router = router
+        self.task = task
+
+    def generate_content(self, prompt: str, generation_config: Dict = None, task: str = None):
+        return self.router.generate(task or self.task, prompt, generation_config)
+
+
+_SERVER_STATUS = re.compile(r'\b5\d\d\b')
+
+
+def is_outage_error(error: Exception) -> bool:
+    """
+    Errors that say Gemini is unavailable: transport failures, timeouts, 5xx and 429.
+    Client-side mistakes (bad schema, bad arguments, 4xx) would fail on every retry
+    and must not open the breaker for everyone else.
+    """
+    if isinstance(error, (ValueError, TypeError)):
+        return False
+    if isinstance(error, (api_exceptions.ServerError, api_exceptions.TooManyRequests,
+                          api_exceptions.DeadlineExceeded, api_exceptions.RetryError,
+                          TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, api_exceptions.GoogleAPICallError):
+        return False  # Remaining API errors are 4xx
+    return is_rate_limit(error) or bool(_SERVER_STATUS.search(str(error)))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker: CLOSED -> OPEN after `failure_threshold` failures,
+    OPEN -> HALF_OPEN after `reset_seconds`, where up to `half_open_probes` calls
+    are let through; a probe success closes the circuit, a failure re-opens it.
+    """
+
+    def __init__(self, name: str = 'gemini', failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_seconds: float = CIRCUIT_RESET_SECONDS, half_open_probes: int = CIRCUIT_HALF_OPEN_PROBES,
+                 clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.transitions = {}  # (from_state, to_state) -> count
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _transition(self, to_state: str):
+        from_state, self.state = self.state, to_state
+        self.transitions[(from_state, to_state)] = self.transitions.get((from_state, to_state), 0) + 1
+        record_circuit_transition(self.name, from_state, to_state)
+
+    def is_open(self) -> bool:
+        """True while calls would be short-circuited (no probe slot available)"""
+        with self._lock:
+            if self.state == 'open':
+                return self.clock() - self.opened_at < self.reset_seconds
+            return self.state == 'half_open' and self._probes_in_flight >= self.half_open_probes
+
+    def before_call(self):
+        with self._lock:
+            if self.state == 'open' and self.clock() - self.opened_at >= self.reset_seconds:
+                self._transition('half_open')
+                self._probes_in_flight = 0
+            if self.state == 'open' or (self.state == 'half_open' and
+                                        self._probes_in_flight >= self.half_open_probes):
+                record_circuit_rejected(self.name)
+                raise CircuitOpenError(f"LLM circuit '{self.name}' is open; using fallback")
+            if self.state == 'half_open':
+                self._probes_in_flight += 1
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state == 'half_open':
+                self._probes_in_flight = 0
+                self._transition('closed')
+
+    def release_probe(self):
+        """Frees a half-open probe slot after an error that says nothing about availability"""
+        with self._lock:
+            if self.state == 'half_open' and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == 'half_open' or (self.state == 'closed' and
+                                             self.consecutive_failures >= self.failure_threshold):
+                self._probes_in_flight = 0
+                self.opened_at = self.clock()
+                self._transition('open')
+
+    def reset(self):
+        with self._lock:
+            if self.state != 'closed':
+                self._transition('closed')
+            self.consecutive_failures = 0
+            self._probes_in_flight = 0
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'transitions': {f"{a}->{b}": n for (a, b), n in self.transitions.items()}
+            }
+
+
+BREAKER = CircuitBreaker()
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> ModelRouter:
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter()
+        return _router
+
+
+def routed_model(task: str = None) -> RoutedModel:
+    """Model handle for an agent; per-call tasks come from the endpoint label in generate()"""
+    return RoutedModel(get_router(), task)
+
+
+def generate(model, prompt: str, agent: str, endpoint: str, generation_config: Dict = None):
+    """
+    Single instrumented entry point for generate_content (latency, outcome, tokens).
+    Raises CircuitOpenError without calling Gemini while the shared breaker is open.
+    """
+    BREAKER.before_call()
+    started = time.perf_counter()
+    try:
+        if isinstance(model, RoutedModel):
+            response = model.generate_content(prompt, generation_config, task=model.task or endpoint)
+        elif generation_config is None:
+            response = model.generate_content(prompt)
+        else:
+            response = model.generate_content(prompt, generation_config=generation_config)
+    except Exception as e:
+        if is_outage_error(e):
+            BREAKER.record_failure()
+        else:
+            BREAKER.release_probe()  # A client error neither closes nor re-opens the circuit
+        record_llm_call(agent, endpoint, time.perf_counter() - started, error=e)
+        raise
+    BREAKER.record_success()
+    record_llm_call(agent, endpoint, time.perf_counter() - started, response=response)
+    return response
+
+
+def generate_structured(model, prompt: str, schema: Dict, max_output_tokens: int,
+                        agent: str = 'unknown', endpoint: str = 'unknown') -> Dict:
+    """
+    Generates a schema-constrained JSON response and returns it as a dict.
+    Malformed output raises SchemaValidationError so callers can fall back locally
+    instead of re-prompting.
+    """
+    response = generate(model, prompt, agent, endpoint, structured_config(schema, max_output_tokens))
+    data = parse_json(response.text)
+    errors = validate(data, schema)
+    if errors:
+        raise SchemaValidationError("; ".join(errors[:5]))
+    return data
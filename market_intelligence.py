@@ -5,12 +5,17 @@ Fetches news, calculates technicals, and explains market moves using LLM
 import yfinance as yf
 import pandas as pd
 import numpy as np
-import google.generativeai as genai
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
 
-from config import PRIMARY_MODEL
+from config import (
+    EXPLANATION_CACHE_SECONDS, BATCH_EXPLAIN_TOKEN_BUDGET,
+    BATCH_EXPLAIN_OUTPUT_TOKENS_PER_TICKER, CACHE_MARKET_DATA_SECONDS
+)
+from llm_client import BREAKER, CircuitOpenError, configure, generate, generate_structured, routed_model
+from metrics import record_cache, record_fallback, record_retry, track_data
+from ttl_cache import TTLCache
 
 class MarketIntelligence:
     """
@@ -20,30 +25,72 @@ class MarketIntelligence:
     - LLM-powered "Why it moved" explanations
     """
 
+    SENTIMENT_SCHEMA = {
+        'type': 'object',
+        'properties': {
+            'sentiment': {'type': 'string', 'format': 'enum', 'enum': ['BULLISH', 'BEARISH', 'NEUTRAL']},
+            'confidence': {'type': 'integer', 'minimum': 0, 'maximum': 100},
+            'key_factors': {'type': 'array', 'items': {'type': 'string'}},
+            'risk_level': {'type': 'string', 'format': 'enum', 'enum': ['LOW', 'MEDIUM', 'HIGH']}
+        },
+        'required': ['sentiment', 'confidence', 'key_factors', 'risk_level']
+    }
+    SENTIMENT_MAX_OUTPUT_TOKENS = 256
+
+    BATCH_EXPLAIN_SCHEMA = {
+        'type': 'object',
+        'properties': {
+            'explanations': {
+                'type': 'array',
+                'items': {
+                    'type': 'object',
+                    'properties': {
+                        'ticker': {'type': 'string'},
+                        'explanation': {'type': 'string'}
+                    },
+                    'required': ['ticker', 'explanation']
+                }
+            }
+        },
+        'required': ['explanations']
+    }
+
     def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(PRIMARY_MODEL)
+        configure(api_key)
+        self.model = routed_model()
         self.cache = {}  # Simple cache to avoid redundant API calls
+        self.explanation_cache = TTLCache(maxsize=512, ttl_seconds=EXPLANATION_CACHE_SECONDS)  # ticker -> result
+        self.technicals_cache = TTLCache(maxsize=512, ttl_seconds=CACHE_MARKET_DATA_SECONDS)
+        self.news_cache = TTLCache(maxsize=512, ttl_seconds=CACHE_MARKET_DATA_SECONDS)
+        self.briefing_cache = TTLCache(maxsize=64, ttl_seconds=EXPLANATION_CACHE_SECONDS)
         self._last_request_time = 0
 
-    def _generate_content_with_retry(self, prompt: str) -> str:
+    def _generate_content_with_retry(self, prompt: str, deadline=None) -> str:
         """Internal method to handle rate limits with retries."""
         import time
         
         # Simple cache check
         cache_key = hash(prompt)
+        record_cache('explanation_prompt', cache_key in self.cache)
         if cache_key in self.cache:
             return self.cache[cache_key]
         
+        # Gemini is known to be down: go straight to the static fallback, no spacing or retries
+        if BREAKER.is_open():
+            raise CircuitOpenError("LLM circuit is open")
+        
         # Enforce minimum delay between requests (2 seconds)
         current_time = time.time()
         if current_time - self._last_request_time < 2:
-            time.sleep(2)
+            if deadline is not None:
+                deadline.sleep(2)
+            else:
+                time.sleep(2)
         
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                response = self.model.generate_content(prompt)
+                response = generate(self.model, prompt, 'market_intelligence', 'explain_market_move')
                 self._last_request_time = time.time()
                 result = response.text
                 
@@ -51,11 +98,19 @@ class MarketIntelligence:
                 self.cache[cache_key] = result
                 return result
                 
+            except CircuitOpenError:
+                raise
             except Exception as e:
                 # Fix indentation and logic here
+                if BREAKER.is_open():
+                    raise CircuitOpenError(f"LLM circuit opened after: {e}")
                 if attempt < max_retries - 1:
                     sleep_time = 2 ** (attempt + 1)
-                    time.sleep(sleep_time)
+                    record_retry('market_intelligence', 'explain_market_move')
+                    if deadline is not None:
+                        deadline.sleep(sleep_time)
+                    else:
+                        time.sleep(sleep_time)
                     continue
                 else:
                     print(f"LLM Generation failed after retries: {e}")
@@ -115,11 +170,18 @@ class MarketIntelligence:
     def fetch_news(self, ticker: str, max_items: int = 5) -> List[Dict]:
         """
         Fetches recent news headlines for a given ticker using yfinance.
-        Returns a list of news items with title, publisher, and link.
+        Returns a list of news items with title, publisher, and link
+        (every cached headline when max_items is None).
         """
+        cached = self.news_cache.get(ticker)
+        record_cache('news', cached is not None)
+        if cached is not None:
+            return cached[:max_items]
+        
         try:
-            stock = yf.Ticker(ticker)
-            news = stock.news[:max_items] if stock.news else []
+            with track_data('yfinance', 'news'):
+                stock = yf.Ticker(ticker)
+                news = stock.news or []
             
             formatted_news = []
             for item in news:
@@ -132,9 +194,12 @@ class MarketIntelligence:
                     ).strftime('%Y-%m-%d %H:%M') if item.get('providerPublishTime') else 'Unknown'
                 })
             
-            return formatted_news
+            # Cache the full headline list so callers asking for fewer items share the entry
+            self.news_cache.set(ticker, formatted_news)
+            return formatted_news[:max_items]
         except Exception as e:
             print(f"Error fetching news for {ticker}: {e}")
+            record_fallback('market_intelligence', 'demo_news')
             return self._get_demo_news(ticker)
 
     def calculate_technicals(self, ticker: str) -> Dict:
@@ -145,9 +210,15 @@ class MarketIntelligence:
         - Volume analysis
         - Support/Resistance levels
         """
+        cached = self.technicals_cache.get(ticker)
+        record_cache('technicals', cached is not None)
+        if cached is not None:
+            return cached
+        
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period="3mo", interval="1d")
+            with track_data('yfinance', 'history_3mo_1d'):
+                stock = yf.Ticker(ticker)
+                hist = stock.history(period="3mo", interval="1d")
             
             if hist.empty or len(hist) < 20:
                 return {'error': 'Insufficient data for technical analysis'}
@@ -190,7 +261,7 @@ class MarketIntelligence:
             price_change_1d = ((close.iloc[-1] - close.iloc[-2]) / close.iloc[-2]) * 100
             price_change_5d = ((close.iloc[-1] - close.iloc[-5]) / close.iloc[-5]) * 100 if len(close) >= 5 else 0
             
-            return {
+            technicals = {
                 'current_price': round(current_price, 2),
                 'rsi': round(current_rsi, 2),
                 'rsi_signal': 'OVERBOUGHT' if current_rsi > 70 else ('OVERSOLD' if current_rsi < 30 else 'NEUTRAL'),
@@ -204,22 +275,59 @@ class MarketIntelligence:
                 'price_change_5d': round(price_change_5d, 2),
                 'timestamp': datetime.now().isoformat()
             }
+            self.technicals_cache.set(ticker, technicals)
+            return technicals
         except Exception as e:
             return {'error': str(e)}
 
-    def explain_market_move(self, ticker: str) -> Dict:
-        """
-        Uses LLM to synthesize Price + News + Technicals into a 
-        "Why it moved" explanation. This is the core analyst feature.
-        """
-        # Fetch all data
-        news = self.fetch_news(ticker)
-        technicals = self.calculate_technicals(ticker)
+    def _get_explanation_inputs(self, ticker: str, context=None):
+        """Fetches technicals and news, switching to demo data if yfinance fails."""
+        source = context or self
+        news = source.fetch_news(ticker)
+        technicals = source.calculate_technicals(ticker)
         
         # If yfinance fails, use demo data for hackathon demo
         if 'error' in technicals:
+            record_fallback('market_intelligence', 'demo_mode')
             technicals = self._get_demo_technicals(ticker)
             news = self._get_demo_news(ticker)
+        return technicals, news
+
+    def fallback_explanation(self, ticker: str) -> Dict:
+        """
+        Static explanation from cached (or demo) inputs without any network call.
+        Used when a request deadline leaves no time for the LLM.
+        """
+        technicals = self.technicals_cache.get(ticker)
+        news = self.news_cache.get(ticker)
+        if technicals is None:
+            technicals, news = self._get_demo_technicals(ticker), self._get_demo_news(ticker)
+        return self._fallback_explanation(ticker, technicals, news or [])
+
+    def _fallback_explanation(self, ticker: str, technicals: Dict, news: List[Dict]) -> Dict:
+        record_fallback('market_intelligence', 'fallback_mode')
+        return {
+            'ticker': ticker,
+            'explanation': self._generate_static_explanation(ticker, technicals, news),
+            'technicals': technicals,
+            'news': news,
+            'generated_at': datetime.now().isoformat(),
+            'fallback_mode': True  # Flag to indicate this is a static explanation
+        }
+
+    def explain_market_move(self, ticker: str, deadline=None, context=None) -> Dict:
+        """
+        Uses LLM to synthesize Price + News + Technicals into a 
+        "Why it moved" explanation. This is the core analyst feature.
+        Pass a RequestContext to reuse data already fetched in the same request.
+        """
+        cached = self.explanation_cache.get(ticker)
+        record_cache('explanation', cached is not None)
+        if cached is not None:
+            return cached
+        
+        # Fetch all data
+        technicals, news = self._get_explanation_inputs(ticker, context)
         
         # Prepare news summary for LLM
         news_summary = "\n".join([
@@ -251,33 +359,121 @@ Provide:
 Keep it professional but accessible. No predictions or buy/sell signals."""
 
         try:
-            explanation = self._generate_content_with_retry(prompt)
+            explanation = self._generate_content_with_retry(prompt, deadline=deadline)
             
-            return {
+            result = {
                 'ticker': ticker,
                 'explanation': explanation,
                 'technicals': technicals,
                 'news': news,
                 'generated_at': datetime.now().isoformat()
             }
+            self.explanation_cache.set(ticker, result)
+            return result
         except Exception as e:
-            # Use static fallback when LLM fails (rate limited, etc.)
-            static_explanation = self._generate_static_explanation(ticker, technicals, news)
-            return {
+            # Use static fallback when LLM fails (rate limited, out of time, etc.)
+            return self._fallback_explanation(ticker, technicals, news)
+
+    def explain_market_moves(self, tickers: List[str], token_budget: int = BATCH_EXPLAIN_TOKEN_BUDGET,
+                             context=None) -> Dict[str, Dict]:
+        """
+        Batched "Why it moved" for a watchlist: packs several tickers into one
+        structured prompt per token budget instead of one LLM call per ticker.
+        Results populate the per-ticker explanation cache.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        results = {}
+        pending = []
+        
+        for ticker in tickers:
+            cached = self.explanation_cache.get(ticker)
+            record_cache('explanation', cached is not None)
+            if cached is not None:
+                results[ticker] = cached
+                continue
+            technicals, news = self._get_explanation_inputs(ticker, context)
+            pending.append((ticker, technicals, news, self._format_ticker_block(ticker, technicals, news)))
+        
+        for batch in self._pack_batches(pending, token_budget):
+            results.update(self._explain_batch(batch))
+        
+        return {ticker: results[ticker] for ticker in tickers}
+
+    def _format_ticker_block(self, ticker: str, technicals: Dict, news: List[Dict]) -> str:
+        headlines = "; ".join(item['title'] for item in news[:3]) if news else "No recent news"
+        return (
+            f"[{ticker}] Price ${technicals['current_price']} | 1D {technicals['price_change_1d']}% | "
+            f"5D {technicals['price_change_5d']}% | RSI {technicals['rsi']} ({technicals['rsi_signal']}) | "
+            f"Trend {technicals['trend']} | Volume {technicals['volume_signal']} | "
+            f"S/R ${technicals['support']}/${technicals['resistance']}\nNews: {headlines}"
+        )
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        return len(text) // 4 + 1  # ~4 characters per token for English prompts
+
+    def _pack_batches(self, pending: list, token_budget: int) -> List[list]:
+        """Greedily groups ticker blocks so each prompt stays within the token budget."""
+        batches, current, used = [], [], 0
+        for item in pending:
+            cost = self._estimate_tokens(item[3])
+            if current and used + cost > token_budget:
+                batches.append(current)
+                current, used = [], 0
+            current.append(item)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _explain_batch(self, batch: list) -> Dict[str, Dict]:
+        blocks = "\n\n".join(item[3] for item in batch)
+        prompt = f"""You are a professional market analyst. For EACH ticker below, explain in 2-3 sentences
+why it moved today, naming the key driver (news, technicals, or sentiment) and what to watch next.
+No predictions or buy/sell signals.
+
+{blocks}
+
+Respond in JSON: an "explanations" array with one {{"ticker", "explanation"}} object per ticker."""
+        
+        explanations = {}
+        try:
+            data = generate_structured(
+                self.model, prompt, self.BATCH_EXPLAIN_SCHEMA,
+                BATCH_EXPLAIN_OUTPUT_TOKENS_PER_TICKER * len(batch),
+                agent='market_intelligence', endpoint='explain_market_moves'
+            )
+            explanations = {item['ticker'].upper(): item['explanation'] for item in data['explanations']}
+        except Exception as e:
+            print(f"Batch explanation failed for {len(batch)} tickers: {e}")
+        
+        results = {}
+        for ticker, technicals, news, _ in batch:
+            explanation = explanations.get(ticker.upper())
+            result = {
                 'ticker': ticker,
-                'explanation': static_explanation,
+                'explanation': explanation,
                 'technicals': technicals,
                 'news': news,
-                'generated_at': datetime.now().isoformat(),
-                'fallback_mode': True  # Flag to indicate this is a static explanation
+                'generated_at': datetime.now().isoformat()
             }
+            if explanation:
+                self.explanation_cache.set(ticker, result)
+            else:
+                # Batch failed or skipped this ticker: static fallback, not cached
+                record_fallback('market_intelligence', 'fallback_mode')
+                result['explanation'] = self._generate_static_explanation(ticker, technicals, news)
+                result['fallback_mode'] = True
+            results[ticker] = result
+        return results
 
-    def get_market_sentiment(self, ticker: str) -> Dict:
+    def get_market_sentiment(self, ticker: str, context=None) -> Dict:
         """
         Analyzes overall market sentiment based on technicals and news tone.
         """
-        technicals = self.calculate_technicals(ticker)
-        news = self.fetch_news(ticker)
+        source = context or self
+        technicals = source.calculate_technicals(ticker)
+        news = source.fetch_news(ticker)
         
         if 'error' in technicals:
             return {'sentiment': 'UNKNOWN', 'confidence': 0}
@@ -292,35 +488,55 @@ TECHNICALS:
 NEWS HEADLINES:
 {chr(10).join([f"- {n['title']}" for n in news[:5]])}
 
-Respond in JSON format:
-{{
-    "sentiment": "BULLISH|BEARISH|NEUTRAL",
-    "confidence": 0-100,
-    "key_factors": ["factor1", "factor2"],
-    "risk_level": "LOW|MEDIUM|HIGH"
-}}"""
+Respond in JSON with sentiment, confidence (0-100), up to three short key_factors and risk_level."""
 
+        technicals_summary = {
+            'rsi': technicals['rsi'],
+            'trend': technicals['trend'],
+            'price_change': technicals['price_change_1d']
+        }
         try:
-            response = self.model.generate_content(prompt)
+            sentiment = generate_structured(
+                self.model, prompt, self.SENTIMENT_SCHEMA, self.SENTIMENT_MAX_OUTPUT_TOKENS,
+                agent='market_intelligence', endpoint='get_market_sentiment'
+            )
+            return {**sentiment, 'technicals_summary': technicals_summary}
+        except Exception as e:
+            # Malformed or failed generation: derive sentiment from the technicals instead of re-prompting
+            record_fallback('market_intelligence', 'fallback_mode')
             return {
-                'raw_response': response.text,
-                'technicals_summary': {
-                    'rsi': technicals['rsi'],
-                    'trend': technicals['trend'],
-                    'price_change': technicals['price_change_1d']
-                }
+                **self._static_sentiment(technicals),
+                'technicals_summary': technicals_summary,
+                'fallback_mode': True,
+                'error': str(e)
             }
-        except Exception as e:
-            return {'error': str(e)}
 
-    def generate_daily_briefing(self, tickers: List[str]) -> str:
+    def _static_sentiment(self, technicals: Dict) -> Dict:
+        """Rule-based sentiment used when the LLM output is unavailable or invalid."""
+        trend = technicals.get('trend', 'NEUTRAL')
+        rsi_signal = technicals.get('rsi_signal', 'NEUTRAL')
+        return {
+            'sentiment': trend if trend in ('BULLISH', 'BEARISH') else 'NEUTRAL',
+            'confidence': 50,
+            'key_factors': [f"Trend {trend}", f"RSI {rsi_signal}"],
+            'risk_level': 'HIGH' if rsi_signal != 'NEUTRAL' else 'MEDIUM'
+        }
+
+    def generate_daily_briefing(self, tickers: List[str], context=None) -> str:
         """
         Generates a comprehensive daily market briefing for multiple tickers.
         """
+        cache_key = tuple(tickers[:5])
+        cached = self.briefing_cache.get(cache_key)
+        record_cache('briefing', cached is not None)
+        if cached is not None:
+            return cached
+        
         briefing_data = []
         
+        source = context or self
         for ticker in tickers[:5]:  # Limit to 5 tickers
-            technicals = self.calculate_technicals(ticker)
+            technicals = source.calculate_technicals(ticker)
             if 'error' not in technicals:
                 briefing_data.append({
                     'ticker': ticker,
@@ -332,6 +548,7 @@ Respond in JSON format:
         
         if not briefing_data:
             # Fallback to demo data for briefing if real data fails
+            record_fallback('market_intelligence', 'demo_mode')
             tickers_to_use = tickers[:5] if tickers else ['AAPL', 'TSLA', 'NVDA', 'BTC-USD']
             for ticker in tickers_to_use:
                 technicals = self._get_demo_technicals(ticker)
@@ -361,7 +578,8 @@ Create a 3-paragraph briefing that:
 Style: Professional, concise, no predictions. Suitable for LinkedIn or newsletter."""
 
         try:
-            response = self.model.generate_content(prompt)
+            response = generate(self.model, prompt, 'market_intelligence', 'generate_daily_briefing')
+            self.briefing_cache.set(cache_key, response.text)
             return response.text
         except Exception as e:
             return f"Error generating briefing: {str(e)}"
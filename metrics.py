@@ -0,0 +1,236 @@
+"""
+Metrics: In-process instrumentation for LLM and market-data calls
+Counters and histograms rendered in Prometheus text exposition format
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(label_names: Tuple[str, ...], label_values: Tuple, extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Counter:
+    """Monotonic counter keyed by label values"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for label_values, value in sorted(items):
+            lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {value:g}")
+        return "\n".join(lines)
+
+
+class Gauge(Counter):
+    """Point-in-time value keyed by label values"""
+
+    def set(self, *label_values, value: float):
+        with self._lock:
+            self._values[label_values] = value
+
+    def render(self) -> str:
+        return super().render().replace(f"# TYPE {self.name} counter", f"# TYPE {self.name} gauge")
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[Tuple, list] = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, *label_values) -> int:
+        series = self._series.get(label_values)
+        return series[-1] if series else 0
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for label_values, series in sorted(items):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, series):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, label_values, f'le="{bound:g}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, label_values, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+            plain = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{plain} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{plain} {series[-1]}")
+        return "\n".join(lines)
+
+
+class MetricsRegistry:
+    """Holds every metric and renders the /api/metrics payload"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> Gauge:
+        metric = Gauge(name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+LLM_LATENCY = REGISTRY.histogram(
+    'llm_request_duration_seconds', 'Latency of generate_content calls', ('agent', 'endpoint'))
+LLM_REQUESTS = REGISTRY.counter(
+    'llm_requests_total', 'generate_content calls by outcome', ('agent', 'endpoint', 'outcome'))
+LLM_TOKENS = REGISTRY.counter(
+    'llm_tokens_total', 'Tokens reported in usage metadata', ('agent', 'endpoint', 'kind'))
+LLM_RETRIES = REGISTRY.counter(
+    'llm_retries_total', 'Retries after a failed generate_content call', ('agent', 'endpoint'))
+LLM_RATE_LIMITED = REGISTRY.counter(
+    'llm_rate_limited_total', 'generate_content calls rejected with HTTP 429', ('agent', 'endpoint'))
+DATA_LATENCY = REGISTRY.histogram(
+    'market_data_duration_seconds', 'Latency of market-data calls', ('source', 'endpoint'))
+DATA_REQUESTS = REGISTRY.counter(
+    'market_data_requests_total', 'Market-data calls by outcome', ('source', 'endpoint', 'outcome'))
+CACHE_LOOKUPS = REGISTRY.counter(
+    'cache_lookups_total', 'Cache lookups by result', ('cache', 'result'))
+LLM_HEDGES = REGISTRY.counter(
+    'llm_hedged_requests_total', 'Hedged/failover requests to the fallback model by outcome', ('model', 'outcome'))
+LLM_CIRCUIT_STATE = REGISTRY.gauge(
+    'llm_circuit_state', 'LLM circuit breaker state (0=closed, 1=half_open, 2=open)', ('breaker',))
+LLM_CIRCUIT_TRANSITIONS = REGISTRY.counter(
+    'llm_circuit_transitions_total', 'LLM circuit breaker state transitions', ('breaker', 'from_state', 'to_state'))
+LLM_CIRCUIT_REJECTED = REGISTRY.counter(
+    'llm_circuit_rejected_total', 'Calls short-circuited while the breaker was open', ('breaker',))
+FALLBACKS = REGISTRY.counter(
+    'fallback_activations_total', 'Static/demo fallbacks served instead of live results', ('component', 'kind'))
+INTERVENTIONS_SUPPRESSED = REGISTRY.counter(
+    'interventions_suppressed_total', 'Interventions not generated because of an active lock, cooldown or hourly cap',
+    ('reason',))
+
+
+def is_rate_limit(error: Exception) -> bool:
+    return "429" in str(error) or "Too Many Requests" in str(error)
+
+
+def record_llm_call(agent: str, endpoint: str, seconds: float, response=None, error: Exception = None):
+    """Records latency, outcome and token usage of one generate_content call"""
+    LLM_LATENCY.observe(seconds, agent, endpoint)
+    if error is not None:
+        LLM_REQUESTS.inc(agent, endpoint, 'rate_limited' if is_rate_limit(error) else 'error')
+        if is_rate_limit(error):
+            LLM_RATE_LIMITED.inc(agent, endpoint)
+        return
+    LLM_REQUESTS.inc(agent, endpoint, 'success')
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is not None:
+        prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+        output_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+        if isinstance(prompt_tokens, (int, float)) and prompt_tokens:
+            LLM_TOKENS.inc(agent, endpoint, 'prompt', amount=prompt_tokens)
+        if isinstance(output_tokens, (int, float)) and output_tokens:
+            LLM_TOKENS.inc(agent, endpoint, 'output', amount=output_tokens)
+
+
+def record_retry(agent: str, endpoint: str):
+    LLM_RETRIES.inc(agent, endpoint)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_LOOKUPS.inc(cache, 'hit' if hit else 'miss')
+
+
+def record_hedge(model: str, outcome: str):
+    LLM_HEDGES.inc(model, outcome)
+
+
+CIRCUIT_STATE_VALUES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+
+def record_circuit_transition(breaker: str, from_state: str, to_state: str):
+    LLM_CIRCUIT_TRANSITIONS.inc(breaker, from_state, to_state)
+    LLM_CIRCUIT_STATE.set(breaker, value=CIRCUIT_STATE_VALUES[to_state])
+
+
+def record_circuit_rejected(breaker: str):
+    LLM_CIRCUIT_REJECTED.inc(breaker)
+
+
+def record_fallback(component: str, kind: str):
+    FALLBACKS.inc(component, kind)
+
+
+def record_intervention_suppressed(reason: str):
+    INTERVENTIONS_SUPPRESSED.inc(reason)
+
+
+@contextmanager
+def track_data(source: str, endpoint: str):
+    """Times a market-data call and counts its outcome"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        DATA_LATENCY.observe(time.perf_counter() - started, source, endpoint)
+        DATA_REQUESTS.inc(source, endpoint, 'error')
+        raise
+    DATA_LATENCY.observe(time.perf_counter() - started, source, endpoint)
+    DATA_REQUESTS.inc(source, endpoint, 'success')
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
@@ -2,50 +2,111 @@
 Perception Layer: Sensory Input for the Antifragile Mirror
 Ingests Market Stream + User Behavioral Stream
 """
+import threading
+import time
 import numpy as np
 import yfinance as yf
 from datetime import datetime, timedelta
 from typing import Dict, List
 
+from config import MARKET_SNAPSHOT_MAX_AGE_SECONDS, MARKET_POLL_INTERVAL_SECONDS
+from regime_scanner import classify_regime
+from metrics import record_cache, record_fallback, track_data
+
+# Erratic behavior within the velocity window (also used by fleet_tilt.py)
+ERRATIC_CANCEL_COUNT = 3
+ERRATIC_ORDER_COUNT = 5
+ERRATIC_MOUSE_SPEED = 500
+
+
+class MarketSnapshotTable:
+    """Lock-protected table of the latest market state per ticker"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots = {}  # ticker -> (monotonic capture time, state)
+    
+    def update(self, ticker: str, state: Dict):
+        with self._lock:
+            self._snapshots[ticker] = (time.monotonic(), state)
+    
+    def get(self, ticker: str, max_age: float = None) -> Dict:
+        """Returns the latest snapshot, or None if missing or older than max_age seconds"""
+        with self._lock:
+            entry = self._snapshots.get(ticker)
+        if entry is None:
+            return None
+        captured_at, state = entry
+        if max_age is not None and time.monotonic() - captured_at > max_age:
+            return None
+        return state
+    
+    def tickers(self) -> List[str]:
+        with self._lock:
+            return list(self._snapshots)
+
+
 class MarketStreamProcessor:
     """Processes real-time market data and detects regime shifts"""
     
-    def __init__(self):
+    def __init__(self, snapshot_max_age: float = MARKET_SNAPSHOT_MAX_AGE_SECONDS):
         self.volatility_threshold = 0.02  # 2% for regime detection
+        self.snapshots = MarketSnapshotTable()
+        self.snapshot_max_age = snapshot_max_age
         
     def capture_market_state(self, ticker: str) -> Dict:
-        """Captures current market conditions"""
+        """Captures current market conditions, served from the snapshot table when hot"""
+        snapshot = self.snapshots.get(ticker, max_age=self.snapshot_max_age)
+        record_cache('market_snapshot', snapshot is not None)
+        if snapshot is not None:
+            return snapshot
+        
+        # Cold ticker: fetch synchronously and keep it for the next caller
+        state = self.fetch_market_state(ticker)
+        if not state.get('is_demo'):
+            self.snapshots.update(ticker, state)
+        return state
+    
+    @staticmethod
+    def state_from_bars(ticker: str, hist, timestamp: datetime = None) -> Dict:
+        """Market state from a Close/Volume bar frame (also used by the backtest replay)"""
+        # Calculate volatility (std of returns)
+        returns = hist['Close'].pct_change().dropna()
+        volatility = returns.std()
+        
+        # Detect regime against the configured LOW_VOL / HIGH_VOL / CRISIS tiers
+        regime = classify_regime(volatility)
+        
+        # Price momentum
+        price_change = (hist['Close'].iloc[-1] - hist['Close'].iloc[0]) / hist['Close'].iloc[0]
+        
+        return {
+            'ticker': ticker,
+            'current_price': round(hist['Close'].iloc[-1], 2),
+            'volatility': round(volatility, 4),
+            'regime': regime,
+            'price_change_5d': round(price_change * 100, 2),
+            'volume_spike': hist['Volume'].iloc[-1] > hist['Volume'].mean() * 1.5,
+            'timestamp': (timestamp or datetime.now()).isoformat()
+        }
+    
+    def fetch_market_state(self, ticker: str) -> Dict:
+        """Downloads bars and computes the market state (blocking network call)"""
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period="5d", interval="1h")
+            with track_data('yfinance', 'history_5d_1h'):
+                stock = yf.Ticker(ticker)
+                hist = stock.history(period="5d", interval="1h")
             
             if hist.empty or len(hist) < 2:
                 # No data available from yfinance, use demo data
                 raise Exception("No historical data available")
             
-            # Calculate volatility (std of returns)
-            returns = hist['Close'].pct_change().dropna()
-            volatility = returns.std()
-            
-            # Detect regime
-            regime = "HIGH_VOL" if volatility > self.volatility_threshold else "LOW_VOL"
-            
-            # Price momentum
-            price_change = (hist['Close'].iloc[-1] - hist['Close'].iloc[0]) / hist['Close'].iloc[0]
-            
-            return {
-                'ticker': ticker,
-                'current_price': round(hist['Close'].iloc[-1], 2),
-                'volatility': round(volatility, 4),
-                'regime': regime,
-                'price_change_5d': round(price_change * 100, 2),
-                'volume_spike': hist['Volume'].iloc[-1] > hist['Volume'].mean() * 1.5,
-                'timestamp': datetime.now().isoformat()
-            }
+            return self.state_from_bars(ticker, hist)
         except Exception as e:
             # Fallback to demo data if live data fails
             import random
             print(f"Market Stream Error: {e}. Using demo data.")
+            record_fallback('market_stream', 'is_demo')
             
             base_price = 150.0
             volatility = random.uniform(0.01, 0.05)
@@ -54,47 +115,112 @@ class MarketStreamProcessor:
                 'ticker': ticker,
                 'current_price': round(base_price * (1 + random.uniform(-0.05, 0.05)), 2),
                 'volatility': round(volatility, 4),
-                'regime': "HIGH_VOL" if volatility > self.volatility_threshold else "LOW_VOL",
+                'regime': classify_regime(volatility),
                 'price_change_5d': round(random.uniform(-5, 5), 2),
                 'volume_spike': random.choice([True, False]),
                 'timestamp': datetime.now().isoformat(),
                 'is_demo': True
             }
 
+class MarketSnapshotPoller:
+    """Background scheduler that keeps watchlist snapshots hot"""
+    
+    def __init__(self, market_stream: MarketStreamProcessor, watchlist: List[str],
+                 interval_seconds: float = MARKET_POLL_INTERVAL_SECONDS):
+        self.market_stream = market_stream
+        self.watchlist = list(watchlist)
+        self.interval_seconds = interval_seconds
+        self.last_cycle_seconds = 0.0
+        self.cycles = 0
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def refresh(self):
+        """Refreshes every watchlist ticker once; keeps the last good snapshot on failure"""
+        started = time.perf_counter()
+        for ticker in self.watchlist:
+            state = self.market_stream.fetch_market_state(ticker)
+            if not state.get('is_demo'):
+                self.market_stream.snapshots.update(ticker, state)
+        self.last_cycle_seconds = time.perf_counter() - started
+        self.cycles += 1
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Market Poller Error: {e}")
+            self._stop.wait(self.interval_seconds)
+    
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="market-snapshot-poller", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
 class UserStreamProcessor:
     """Processes user behavioral data - interaction patterns"""
     
-    def __init__(self):
+    def __init__(self, journal=None, trader_id: int = 0):
         self.interaction_buffer = []
         self.mouse_speed_buffer = []  # NEW: Store mouse speeds
+        self.journal = journal  # Optional TelemetryJournal for durable session capture
+        self.trader_id = trader_id
         
-    def capture_interaction(self, action_type: str, metadata: Dict = None):
+    def capture_interaction(self, action_type: str, metadata: Dict = None, timestamp: datetime = None):
         """Logs user interaction events"""
         event = {
-            'timestamp': datetime.now(),
+            'timestamp': timestamp or datetime.now(),
             'action': action_type,
             'metadata': metadata or {}
         }
         self.interaction_buffer.append(event)
         
+        # Replayed events carry their own timestamp and are not re-journaled
+        if self.journal is not None and timestamp is None:
+            self.journal.append(self.trader_id, action_type, self._journal_value(metadata))
+        
         # Keep only last 100 events
         if len(self.interaction_buffer) > 100:
             self.interaction_buffer.pop(0)
     
-    def capture_mouse_speed(self, speed: float):
+    @staticmethod
+    def _journal_value(metadata: Dict) -> float:
+        """Numeric payload for the journal; non-numeric metadata is recorded as 0.0"""
+        try:
+            return float((metadata or {}).get('value', 0.0))
+        except (TypeError, ValueError):
+            return 0.0
+    
+    def capture_mouse_speed(self, speed: float, timestamp: datetime = None):
         """NEW: Logs mouse movement speed"""
         self.mouse_speed_buffer.append({
-            'timestamp': datetime.now(),
+            'timestamp': timestamp or datetime.now(),
             'speed': speed
         })
         
+        if self.journal is not None and timestamp is None:
+            self.journal.append(self.trader_id, 'mouse_speed', float(speed))
+        
         # Keep only last 50 speeds
         if len(self.mouse_speed_buffer) > 50:
             self.mouse_speed_buffer.pop(0)
     
-    def analyze_interaction_velocity(self, window_minutes: int = 5) -> Dict:
+    def analyze_interaction_velocity(self, window_minutes: int = 5, now: datetime = None) -> Dict:
         """Detects rapid-fire behavior (panic indicator)"""
-        cutoff = datetime.now() - timedelta(minutes=window_minutes)
+        cutoff = (now or datetime.now()) - timedelta(minutes=window_minutes)
         recent = [e for e in self.interaction_buffer if e['timestamp'] > cutoff]
         
         action_counts = {}
@@ -111,7 +237,8 @@ class UserStreamProcessor:
                        if m['timestamp'] > cutoff]
         avg_mouse_speed = sum(m['speed'] for m in recent_mouse) / len(recent_mouse) if recent_mouse else 0
         
-        is_erratic = cancel_rate > 3 or order_rate > 5 or avg_mouse_speed > 500
+        is_erratic = (cancel_rate > ERRATIC_CANCEL_COUNT or order_rate > ERRATIC_ORDER_COUNT
+                      or avg_mouse_speed > ERRATIC_MOUSE_SPEED)
         
         return {
             'total_actions': len(recent),
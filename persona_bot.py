@@ -2,12 +2,20 @@
 Social Content Engine: AI Persona-Based Content Generation
 Generates platform-appropriate content for LinkedIn and X (Twitter)
 """
-import google.generativeai as genai
-from typing import Dict, Optional
+import hashlib
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
 from datetime import datetime
 
 
-from config import PRIMARY_MODEL
+from config import (
+    PERSONA_MAX_WORKERS, PERSONA_SINGLE_PROMPT, PERSONA_COMBINED_MAX_OUTPUT_TOKENS,
+    PERSONA_CACHE_SECONDS, PERSONA_CACHE_MAX_ENTRIES, PERSONA_CACHE_PRICE_BUCKET_PCT, PERSONA_CACHE_RSI_BUCKET
+)
+from llm_client import configure, generate, generate_structured, routed_model
+from metrics import record_cache, record_fallback
+from ttl_cache import TTLCache
 
 # Enhanced Persona Definitions with Platform-Specific Styles
 PERSONAS = {
@@ -43,6 +51,33 @@ PERSONAS = {
     }
 }
 
+# Shared across every PersonaBot (and therefore every user/session) in the process
+CONTENT_CACHE = TTLCache(maxsize=PERSONA_CACHE_MAX_ENTRIES, ttl_seconds=PERSONA_CACHE_SECONDS)
+
+
+def market_snapshot_key(technicals: Dict, news: list) -> tuple:
+    """
+    Quantizes the market inputs of a post so near-identical snapshots share cache entries:
+    (price bucket, RSI bucket, trend, top headline hash).
+    """
+    technicals = technicals if technicals and 'error' not in technicals else {}
+    price = technicals.get('current_price')
+    price_bucket = (
+        int(math.log(price) / math.log(1 + PERSONA_CACHE_PRICE_BUCKET_PCT / 100))
+        if isinstance(price, (int, float)) and price > 0 else None
+    )
+    rsi = technicals.get('rsi')
+    rsi_bucket = int(rsi // PERSONA_CACHE_RSI_BUCKET) if isinstance(rsi, (int, float)) else None
+    headline = news[0].get('title', '') if news else ''
+    headline_hash = hashlib.md5(headline.encode('utf-8')).hexdigest()[:12] if headline else None
+    return (price_bucket, rsi_bucket, technicals.get('trend'), headline_hash)
+
+
+def _is_error_content(content) -> bool:
+    if isinstance(content, dict):
+        return any(_is_error_content(v) for v in content.values())
+    return isinstance(content, str) and (content.startswith("Error") or content.startswith("⚠️ **Error**"))
+
 
 class PersonaBot:
     """
@@ -51,11 +86,29 @@ class PersonaBot:
     """
     
     def __init__(self, api_key: str):
-        if not api_key:
-            raise ValueError("API Key is required")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(PRIMARY_MODEL)
+        configure(api_key, required=True)  # No key needed on the offline fake backend
+        self.model = routed_model()
         self.content_history = []
+        # Bounded pool shared by every request so variant fan-out can't exhaust the LLM quota
+        self._executor = ThreadPoolExecutor(max_workers=PERSONA_MAX_WORKERS, thread_name_prefix="persona")
+
+    def cached_content(self, persona_name: str, platform: str, ticker: str, technicals: Dict, news: list,
+                       producer: Callable[[], object], regenerate: bool = False, ttl_seconds: float = None):
+        """
+        Returns cached content for (persona, platform, ticker, market snapshot), generating it
+        with `producer` on a miss. regenerate=True bypasses the cache and refreshes the entry.
+        """
+        key = (persona_name, platform, ticker, market_snapshot_key(technicals, news))
+        if not regenerate:
+            cached = CONTENT_CACHE.get(key)
+            record_cache('persona_content', cached is not None)
+            if cached is not None:
+                return cached
+        
+        content = producer()
+        if not _is_error_content(content):
+            CONTENT_CACHE.set(key, content, ttl_seconds=ttl_seconds)
+        return content
 
     def get_available_personas(self) -> list:
         """Returns list of available persona names."""
@@ -138,10 +191,24 @@ CONSTRAINTS:
 
         return self._generate_content(prompt, "linkedin")
 
-    def generate_market_update(self, persona_name: str, ticker: str, technicals: Dict, news: list) -> Dict:
+    def generate_market_update(self, persona_name: str, ticker: str, technicals: Dict, news: list,
+                               single_prompt: bool = PERSONA_SINGLE_PROMPT, regenerate: bool = False,
+                               ttl_seconds: float = None, sequential: bool = False) -> Dict:
         """
         Generates both Twitter and LinkedIn versions of a market update.
+        Variants are generated concurrently, or from one structured prompt if single_prompt is set.
+        With sequential set they are generated one after another on the calling thread
+        (callers that bound LLM concurrency themselves, like the cache warmer).
+        Results are shared through the content cache unless regenerate is set.
         """
+        return self.cached_content(
+            persona_name, 'market_update', ticker, technicals, news,
+            lambda: self._generate_market_update(persona_name, ticker, technicals, news, single_prompt, sequential),
+            regenerate=regenerate, ttl_seconds=ttl_seconds
+        )
+
+    def _generate_market_update(self, persona_name: str, ticker: str, technicals: Dict, news: list,
+                                single_prompt: bool, sequential: bool = False) -> Dict:
         # Build context from data
         context_parts = []
         if technicals and 'error' not in technicals:
@@ -159,37 +226,108 @@ CONSTRAINTS:
         market_context = " ".join(context_parts)
         topic = f"{ticker} market update"
         
-        twitter = self.generate_twitter_post(persona_name, topic, market_context)
-        linkedin = self.generate_linkedin_post(persona_name, topic, market_context)
+        variants = None
+        if single_prompt:
+            variants = self._generate_combined(persona_name, topic, market_context, {
+                'twitter': "a single Twitter/X post under 280 characters with 1-2 hashtags",
+                'linkedin': "a 150-300 word LinkedIn post ending with a discussion question and 3-5 hashtags"
+            })
+        if variants is None:
+            variants = self._generate_concurrently({
+                'twitter': lambda: self.generate_twitter_post(persona_name, topic, market_context),
+                'linkedin': lambda: self.generate_linkedin_post(persona_name, topic, market_context)
+            }, sequential=sequential)
         
         return {
             'ticker': ticker,
             'persona': persona_name,
-            'twitter': twitter,
-            'linkedin': linkedin,
+            'twitter': variants['twitter'],
+            'linkedin': variants['linkedin'],
             'generated_at': datetime.now().isoformat()
         }
 
-    def generate_daily_briefing_social(self, briefing_text: str, persona_name: str) -> Dict:
+    def generate_daily_briefing_social(self, briefing_text: str, persona_name: str,
+                                       single_prompt: bool = PERSONA_SINGLE_PROMPT) -> Dict:
         """
         Transforms a market briefing into social media posts.
         """
         topic = "Daily Market Briefing"
         
-        twitter = self.generate_twitter_thread(persona_name, topic, briefing_text, num_tweets=3)
-        linkedin = self.generate_linkedin_post(persona_name, topic, briefing_text)
+        variants = None
+        if single_prompt:
+            variants = self._generate_combined(persona_name, topic, briefing_text, {
+                'twitter_thread': "a Twitter thread of 3 numbered tweets (1/, 2/, 3/), each under 280 characters",
+                'linkedin_post': "a 150-300 word LinkedIn post ending with a discussion question and 3-5 hashtags"
+            })
+        if variants is None:
+            variants = self._generate_concurrently({
+                'twitter_thread': lambda: self.generate_twitter_thread(persona_name, topic, briefing_text, num_tweets=3),
+                'linkedin_post': lambda: self.generate_linkedin_post(persona_name, topic, briefing_text)
+            })
         
         return {
-            'twitter_thread': twitter,
-            'linkedin_post': linkedin,
+            'twitter_thread': variants['twitter_thread'],
+            'linkedin_post': variants['linkedin_post'],
             'persona': persona_name,
             'generated_at': datetime.now().isoformat()
         }
 
+    def _generate_concurrently(self, jobs: Dict[str, Callable[[], str]], sequential: bool = False) -> Dict[str, str]:
+        """Runs each platform variant on the bounded pool and waits for all of them."""
+        if sequential:
+            return {name: job() for name, job in jobs.items()}
+        futures = {name: self._executor.submit(job) for name, job in jobs.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    def _generate_combined(self, persona_name: str, topic: str, market_context: str,
+                           variants: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """
+        Produces every platform variant from one structured prompt.
+        Returns None on failure so callers can fall back to per-platform generation.
+        """
+        persona = PERSONAS.get(persona_name, PERSONAS["The Quantitative Stoic"])
+        schema = {
+            'type': 'object',
+            'properties': {name: {'type': 'string'} for name in variants},
+            'required': list(variants)
+        }
+        instructions = "\n".join(f'- "{name}": {spec}' for name, spec in variants.items())
+        
+        prompt = f"""You are: {persona['description']}
+
+Style for Twitter: {persona['twitter_style']}
+Style for LinkedIn: {persona['linkedin_style']}
+Voice: {persona['voice']}
+
+Topic: {topic}
+Market Context: {market_context}
+
+Write every variant below, each adapted to its platform and perfectly in character.
+No preamble. Respond in JSON with these fields:
+{instructions}"""
+
+        try:
+            content = generate_structured(
+                self.model, prompt, schema, PERSONA_COMBINED_MAX_OUTPUT_TOKENS,
+                agent='persona_bot', endpoint='combined'
+            )
+        except Exception as e:
+            print(f"Combined persona generation failed: {e}")
+            record_fallback('persona_bot', 'per_platform')
+            return None
+        
+        for name, text in content.items():
+            self.content_history.append({
+                'type': name,
+                'content': text[:100] + '...',
+                'timestamp': datetime.now().isoformat()
+            })
+        return content
+
     def _generate_content(self, prompt: str, content_type: str) -> str:
         """Internal method to generate content with error handling."""
         try:
-            response = self.model.generate_content(prompt)
+            response = generate(self.model, prompt, 'persona_bot', content_type)
             content = response.text
             
             # Log for history
@@ -0,0 +1,162 @@
+"""
+Regime Scanner: Market-wide regime map
+Classifies hundreds of tickers at once against config.REGIME_DEFINITIONS tiers,
+with hysteresis to avoid flapping, and publishes regime-change events
+"""
+import threading
+import time
+import warnings
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import numpy as np
+import yfinance as yf
+
+from config import REGIME_DEFINITIONS, REGIME_HYSTERESIS, REGIME_SCAN_INTERVAL_SECONDS
+from metrics import track_data
+
+# Tiers ordered by their lower volatility bound: LOW_VOL, HIGH_VOL, CRISIS
+REGIME_TIERS = sorted(REGIME_DEFINITIONS, key=lambda r: REGIME_DEFINITIONS[r].get('volatility_min', 0.0))
+TIER_BOUNDARIES = np.array([REGIME_DEFINITIONS[r]['volatility_min'] for r in REGIME_TIERS[1:]])
+
+
+def panel_volatility(closes: np.ndarray) -> np.ndarray:
+    """Std of period returns per column of a (bars x tickers) close panel; NaNs are ignored"""
+    closes = np.asarray(closes, dtype=float)
+    returns = closes[1:] / closes[:-1] - 1.0
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # Tickers without data yield NaN
+        return np.nanstd(returns, axis=0, ddof=1)
+
+
+def classify_volatility(volatility, previous=None, hysteresis: float = REGIME_HYSTERESIS) -> np.ndarray:
+    """
+    Maps volatilities to tier indices into REGIME_TIERS.
+
+    With a previous tier, a ticker only moves up once volatility clears a boundary
+    by `hysteresis` (relative) and only moves down once it falls the same margin below.
+    """
+    vol = np.nan_to_num(np.atleast_1d(np.asarray(volatility, dtype=float)))
+    raw = np.searchsorted(TIER_BOUNDARIES, vol, side='right')
+    if previous is None:
+        return raw
+
+    prev = np.atleast_1d(np.asarray(previous))
+    upper = np.searchsorted(TIER_BOUNDARIES * (1 + hysteresis), vol, side='right')
+    lower = np.searchsorted(TIER_BOUNDARIES * (1 - hysteresis), vol, side='right')
+    return np.where(prev < 0, raw, np.clip(prev, upper, lower))
+
+
+def classify_regime(volatility: float) -> str:
+    """Scalar convenience wrapper used by the per-ticker market stream"""
+    return REGIME_TIERS[int(classify_volatility(volatility)[0])]
+
+
+class RegimeScanner:
+    """
+    Scans a ticker universe from one close-price panel and keeps a regime map.
+    Subscribers receive one event per ticker whose regime changed.
+    """
+
+    def __init__(self, universe: List[str], hysteresis: float = REGIME_HYSTERESIS):
+        self.universe = list(universe)
+        self.hysteresis = hysteresis
+        self._tiers = np.full(len(self.universe), -1)
+        self._volatility = np.full(len(self.universe), np.nan)
+        self._since = [None] * len(self.universe)
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_scan = None
+        self.last_scan_seconds = 0.0
+
+    def subscribe(self, callback: Callable[[Dict], None]):
+        """Registers a callback for regime-change events"""
+        self._subscribers.append(callback)
+
+    def scan(self, closes: np.ndarray) -> List[Dict]:
+        """Classifies every ticker from a (bars x tickers) panel; returns change events"""
+        started = time.perf_counter()
+        volatility = panel_volatility(closes)
+        valid = ~np.isnan(volatility)
+        now = datetime.now().isoformat()
+
+        with self._lock:
+            tiers = classify_volatility(volatility, self._tiers, self.hysteresis)
+            tiers = np.where(valid, tiers, self._tiers)  # No data: keep the last known regime
+            changed = np.flatnonzero(tiers != self._tiers)
+
+            events = []
+            for i in changed:
+                events.append({
+                    'ticker': self.universe[i],
+                    'previous': REGIME_TIERS[self._tiers[i]] if self._tiers[i] >= 0 else None,
+                    'regime': REGIME_TIERS[tiers[i]],
+                    'volatility': round(float(volatility[i]), 4),
+                    'timestamp': now
+                })
+                self._since[i] = now
+
+            self._tiers = tiers
+            self._volatility = np.where(valid, volatility, self._volatility)
+            self.last_scan = now
+            self.last_scan_seconds = time.perf_counter() - started
+
+        for event in events:
+            for callback in self._subscribers:
+                try:
+                    callback(event)
+                except Exception as e:
+                    print(f"Regime Scanner subscriber error: {e}")
+        return events
+
+    def regime_map(self) -> Dict[str, Dict]:
+        """Latest regime per ticker with its risk multiplier"""
+        with self._lock:
+            result = {}
+            for i, ticker in enumerate(self.universe):
+                if self._tiers[i] < 0:
+                    continue
+                regime = REGIME_TIERS[self._tiers[i]]
+                result[ticker] = {
+                    'regime': regime,
+                    'volatility': round(float(self._volatility[i]), 4),
+                    'risk_multiplier': REGIME_DEFINITIONS[regime]['risk_multiplier'],
+                    'since': self._since[i]
+                }
+            return result
+
+    def fetch_panel(self, period: str = "5d", interval: str = "1h") -> np.ndarray:
+        """Downloads one close panel for the whole universe, columns aligned to self.universe"""
+        with track_data('yfinance', 'download_panel'):
+            data = yf.download(self.universe, period=period, interval=interval,
+                               progress=False, group_by='column', auto_adjust=False)
+        closes = data['Close']
+        return closes.reindex(columns=self.universe).to_numpy(dtype=float)
+
+    def refresh(self) -> List[Dict]:
+        return self.scan(self.fetch_panel())
+
+    def _run(self, interval_seconds: float):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Regime Scanner Error: {e}")
+            self._stop.wait(interval_seconds)
+
+    def start(self, interval_seconds: float = REGIME_SCAN_INTERVAL_SECONDS):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval_seconds,), name="regime-scanner", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,51 @@
+"""
+Request Context: Per-request memo of market data
+One user flow (explain -> sentiment -> social post -> analyst loop) fetches each
+ticker's technicals, news, market state and perception at most once, even when
+the shared caches miss or yfinance fails and demo data is served instead
+"""
+import threading
+from typing import Callable, Dict, List
+
+
+class RequestContext:
+    """
+    Memoizing facade over MarketIntelligence and MarketStreamProcessor.
+    Exposes the same fetch methods, so any code that takes a data source can be
+    handed a context instead; values live for the lifetime of the context only.
+    Thread-safe: concurrent stages asking for the same key share one fetch.
+    """
+
+    def __init__(self, market_intelligence, market_stream=None):
+        self.market_intelligence = market_intelligence
+        self.market_stream = market_stream
+        self.fetches: Dict[tuple, int] = {}
+        self._values: Dict[tuple, object] = {}
+        self._locks: Dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def memo(self, key: tuple, fetch: Callable[[], object]):
+        """Returns the value stored under `key`, calling `fetch` on first use"""
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._values:
+                    return self._values[key]
+            value = fetch()
+            with self._lock:
+                self._values[key] = value
+                self.fetches[key] = self.fetches.get(key, 0) + 1
+            return value
+
+    def calculate_technicals(self, ticker: str) -> Dict:
+        return self.memo(('technicals', ticker), lambda: self.market_intelligence.calculate_technicals(ticker))
+
+    def fetch_news(self, ticker: str, max_items: int = 5) -> List[Dict]:
+        # Memoize the full headline list; callers asking for fewer items get a slice of it
+        return self.memo(('news', ticker), lambda: self.market_intelligence.fetch_news(ticker, max_items=None))[:max_items]
+
+    def capture_market_state(self, ticker: str) -> Dict:
+        return self.memo(('market_state', ticker), lambda: self.market_stream.capture_market_state(ticker))
@@ -0,0 +1,97 @@
+"""
+Stage Graph: Dependency-aware parallel executor for analyst loop stages
+Independent stages run concurrently, so wall-clock time follows the critical path
+instead of the sum of stages; per-stage timings are reported with the results
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from typing import Callable, Dict, Tuple
+
+from config import DEADLINE_MIN_STAGE_SECONDS
+
+
+class Stage:
+    """A named unit of work; `func` and `fallback` receive the results of earlier stages"""
+
+    def __init__(self, name: str, func: Callable[[Dict], object], deps: Tuple[str, ...] = (),
+                 fallback: Callable[[Dict], object] = None):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.fallback = fallback
+
+
+class StageGraph:
+    """
+    Small DAG of stages executed on a shared pool.
+    With a deadline, stages that have a fallback are answered by it (and flagged
+    degraded) once the budget runs out; stages without one are always awaited.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Stage] = {}
+
+    def add(self, name: str, func: Callable[[Dict], object], deps: Tuple[str, ...] = (),
+            fallback: Callable[[Dict], object] = None) -> 'StageGraph':
+        missing = [dep for dep in deps if dep not in self.stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on undefined stages {missing}")
+        self.stages[name] = Stage(name, func, deps, fallback)
+        return self
+
+    def run(self, executor: Executor, deadline=None) -> Tuple[Dict, Dict]:
+        """Executes every stage; returns (results by stage, timings by stage)"""
+        started = time.perf_counter()
+        results, timings = {}, {}
+        pending = dict(self.stages)
+        running = {}  # future -> (stage, submitted_at)
+
+        def finish(stage: Stage, value, status: str, began: float):
+            results[stage.name] = value
+            timings[stage.name] = {
+                'start_ms': round((began - started) * 1000, 1),
+                'seconds': round(time.perf_counter() - began, 4),
+                'status': status
+            }
+
+        def use_fallback(stage: Stage, began: float):
+            deadline.degrade(stage.name)
+            finish(stage, stage.fallback(dict(results)), 'fallback', began)
+
+        while pending or running:
+            ready = [s for s in pending.values() if all(dep in results for dep in s.deps)]
+            for stage in ready:
+                del pending[stage.name]
+                now = time.perf_counter()
+                if deadline is not None and stage.fallback and not deadline.allows(DEADLINE_MIN_STAGE_SECONDS):
+                    use_fallback(stage, now)
+                else:
+                    running[executor.submit(stage.func, dict(results))] = (stage, now)
+            if ready and not running:
+                continue  # Fallbacks may have unblocked further stages
+
+            timeout = None
+            if deadline is not None and any(stage.fallback for stage, _ in running.values()):
+                timeout = deadline.remaining()
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # Out of budget: abandon every stage that can be answered deterministically
+                for future, (stage, began) in list(running.items()):
+                    if stage.fallback:
+                        del running[future]
+                        use_fallback(stage, began)
+                continue
+
+            for future in done:
+                stage, began = running.pop(future)
+                error = future.exception()
+                if error is None:
+                    finish(stage, future.result(), 'ok', began)
+                elif stage.fallback and deadline is not None:
+                    print(f"Stage '{stage.name}' failed, using fallback: {error}")
+                    use_fallback(stage, began)
+                else:
+                    raise error
+
+        return results, timings
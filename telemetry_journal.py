@@ -0,0 +1,242 @@
+"""
+Telemetry Journal: Durable record of the User Stream
+Append-only binary journal of fixed-width records, memory-mapped for zero-copy
+reads, plus a replay driver that pushes a recorded session back through the
+Perception and Cognitive layers
+"""
+import mmap
+import os
+import struct
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import numpy as np
+
+# File layout: 16-byte header followed by 24-byte records
+JOURNAL_MAGIC = b'AFTJ'
+JOURNAL_VERSION = 1
+HEADER_FORMAT = '<4sHH8x'          # magic, version, record size, reserved
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# Monotonic timestamp (s), trader id, action code, padding, value
+RECORD_FORMAT = '<dIH2xd'
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+RECORD_DTYPE = np.dtype([
+    ('ts', '<f8'),
+    ('trader_id', '<u4'),
+    ('action', '<u2'),
+    ('_pad', '<u2'),
+    ('value', '<f8')
+])
+
+# Action vocabulary shared with the UI (unknown actions are stored as 0)
+ACTION_CODES = {
+    'unknown': 0,
+    'place_order': 1,
+    'cancel_order': 2,
+    'modify_order': 3,
+    'check_position': 4,
+    'mouse_speed': 100
+}
+ACTION_NAMES = {code: name for name, code in ACTION_CODES.items()}
+
+
+class TelemetryJournal:
+    """
+    Append-only journal of user interaction events.
+    Writers append packed records; readers get a numpy view over an mmap of the file.
+    """
+
+    def __init__(self, path: str, readonly: bool = False, clock=time.monotonic, autoflush: bool = True):
+        self.path = path
+        self.readonly = readonly
+        self.clock = clock
+        self.autoflush = autoflush  # Hand every record to the OS so a crash can't lose it
+        self._fh = None
+        self._mmap = None
+        self._mapped_size = 0
+
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if readonly and not exists:
+            raise FileNotFoundError(f"Telemetry journal not found: {path}")
+
+        if exists:
+            self._validate_header()
+
+        if not readonly:
+            self._fh = open(path, 'ab')
+            if not exists:
+                self._fh.write(struct.pack(HEADER_FORMAT, JOURNAL_MAGIC, JOURNAL_VERSION, RECORD_SIZE))
+                self._fh.flush()
+
+    def _validate_header(self):
+        with open(self.path, 'rb') as fh:
+            magic, version, record_size = struct.unpack(HEADER_FORMAT, fh.read(HEADER_SIZE))
+        if magic != JOURNAL_MAGIC or record_size != RECORD_SIZE:
+            raise ValueError(f"{self.path} is not a telemetry journal (version {version})")
+
+    def append(self, trader_id: int, action: str, value: float = 0.0, ts: float = None):
+        """Appends one event. Timestamps default to the monotonic clock."""
+        if self._fh is None:
+            raise IOError("Telemetry journal is read-only or closed")
+        self._fh.write(struct.pack(
+            RECORD_FORMAT,
+            self.clock() if ts is None else ts,
+            trader_id,
+            ACTION_CODES.get(action, 0),
+            value
+        ))
+        if self.autoflush:
+            self._fh.flush()
+
+    def flush(self):
+        """Pushes buffered records to the OS so readers can map them."""
+        if self._fh is not None:
+            self._fh.flush()
+
+    def __len__(self) -> int:
+        self.flush()
+        return max(os.path.getsize(self.path) - HEADER_SIZE, 0) // RECORD_SIZE
+
+    def records(self) -> np.ndarray:
+        """Zero-copy structured view over every complete record in the journal."""
+        count = len(self)
+        if count == 0:
+            return np.empty(0, dtype=RECORD_DTYPE)
+
+        size = HEADER_SIZE + count * RECORD_SIZE
+        if self._mmap is None or size > self._mapped_size:
+            # Old maps are dropped rather than closed: earlier views may still reference them
+            with open(self.path, 'rb') as fh:
+                self._mmap = mmap.mmap(fh.fileno(), size, access=mmap.ACCESS_READ)
+            self._mapped_size = size
+
+        return np.frombuffer(self._mmap, dtype=RECORD_DTYPE, count=count, offset=HEADER_SIZE)
+
+    def session(self, trader_id: int = None, start: float = None, end: float = None) -> np.ndarray:
+        """Records for one trader and/or time range, in journal order."""
+        recs = self.records()
+        mask = np.ones(len(recs), dtype=bool)
+        if trader_id is not None:
+            mask &= recs['trader_id'] == trader_id
+        if start is not None:
+            mask &= recs['ts'] >= start
+        if end is not None:
+            mask &= recs['ts'] <= end
+        return recs if mask.all() else recs[mask]
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # Views handed out by records() are still alive
+            self._mmap = None
+            self._mapped_size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SessionReplayer:
+    """
+    Replays a recorded session through UserStreamProcessor and TiltDetectorAgent.
+    Event timestamps are re-based onto a virtual clock so the 5-minute velocity
+    window behaves exactly as it did live, at any replay speed.
+    """
+
+    def __init__(self, journal: TelemetryJournal, user_stream=None, tilt_detector=None):
+        from perception_layer import UserStreamProcessor
+
+        self.journal = journal
+        self.user_stream = user_stream or UserStreamProcessor()
+        self.tilt_detector = tilt_detector
+
+    def replay(self, trader_id: int = None, speed: float = None, market_state: Dict = None,
+               trader_profile: Dict = None, use_llm: bool = False,
+               start_time: datetime = None) -> Dict:
+        """
+        Pushes every recorded event back through the pipeline.
+
+        Args:
+            trader_id: Only replay this trader's events (all traders if None)
+            speed: Playback multiplier (1.0 = real time); None replays as fast as possible
+            market_state: Market context for tilt detection (defaults to LOW_VOL)
+            trader_profile: Trader profile for tilt detection
+            use_llm: Let the tilt detector call the LLM for high scores
+            start_time: Virtual wall-clock time of the first event
+        """
+        recs = self.journal.session(trader_id=trader_id)
+        market_state = market_state or {'regime': 'LOW_VOL', 'volatility': 0.0}
+        trader_profile = trader_profile or {}
+        start_time = start_time or datetime.now()
+
+        evaluations = []
+        episodes = []
+        in_tilt = False
+
+        t0 = float(recs['ts'][0]) if len(recs) else 0.0
+        prev_ts = t0
+        started = time.perf_counter()
+
+        for rec in recs:
+            ts = float(rec['ts'])
+            if speed:
+                time.sleep(max(ts - prev_ts, 0.0) / speed)
+            prev_ts = ts
+
+            virtual_now = start_time + timedelta(seconds=ts - t0)
+            action = ACTION_NAMES.get(int(rec['action']), 'unknown')
+            if action == 'mouse_speed':
+                self.user_stream.capture_mouse_speed(float(rec['value']), timestamp=virtual_now)
+            else:
+                self.user_stream.capture_interaction(
+                    action, {'value': float(rec['value'])}, timestamp=virtual_now
+                )
+
+            behavior = self.user_stream.analyze_interaction_velocity(now=virtual_now)
+            if self.tilt_detector is None:
+                continue
+
+            tilt = self.tilt_detector.detect_tilt(market_state, behavior, trader_profile, use_llm=use_llm)
+            evaluations.append({
+                'ts': ts,
+                'trader_id': int(rec['trader_id']),
+                'action': action,
+                'tilt_score': tilt['tilt_score'],
+                'tilt_detected': tilt['tilt_detected']
+            })
+
+            if tilt['tilt_detected'] and not in_tilt:
+                episodes.append({'start_ts': ts, 'peak_score': tilt['tilt_score']})
+            elif tilt['tilt_detected']:
+                episodes[-1]['peak_score'] = max(episodes[-1]['peak_score'], tilt['tilt_score'])
+            in_tilt = tilt['tilt_detected']
+
+        elapsed = time.perf_counter() - started
+        return {
+            'events': len(recs),
+            'session_seconds': round(prev_ts - t0, 3),
+            'evaluations': evaluations,
+            'tilt_episodes': episodes,
+            'final_behavior': self.user_stream.analyze_interaction_velocity(
+                now=start_time + timedelta(seconds=prev_ts - t0)
+            ),
+            'elapsed_seconds': round(elapsed, 6),
+            'events_per_second': round(len(recs) / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+
+def record_events(journal: TelemetryJournal, events: List[tuple], trader_id: int = 0) -> int:
+    """Bulk-appends (ts, action, value) tuples; handy for fixtures and imports."""
+    for ts, action, value in events:
+        journal.append(trader_id, action, value, ts=ts)
+    journal.flush()
+    return len(events)
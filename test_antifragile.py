@@ -4,6 +4,7 @@ Verifies all components work correctly
 """
 import os
 from antifragile_controller import AntifragileController
+from config import LLM_BACKEND
 import data_manager
 
 def test_system():
@@ -11,12 +12,15 @@ def test_system():
     
     # Check API key
     api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
+    if LLM_BACKEND == "fake":
+        api_key = api_key or "offline"
+        print("✅ Using offline fake LLM backend")
+    elif not api_key:
         print("❌ GEMINI_API_KEY not found in environment")
-        print("Set it with: export GEMINI_API_KEY='your_key'")
+        print("Set it with: export GEMINI_API_KEY='your_key' (or LLM_BACKEND=fake to run offline)")
         return
-    
-    print("✅ API Key loaded")
+    else:
+        print("✅ API Key loaded")
     
     # Generate test data
     print("\n📊 Generating mock trade data...")
@@ -1,13 +1,26 @@
 import requests
 import json
+import os
+import sys
 import time
 
+OFFLINE = "--offline" in sys.argv  # In-process API on the fake LLM backend; no server or key needed
+
+def _client():
+    if not OFFLINE:
+        return requests, "http://127.0.0.1:8000"
+    os.environ["LLM_BACKEND"] = "fake"
+    from fastapi.testclient import TestClient
+    from api.main import app
+    return TestClient(app), ""
+
 def test_api():
-    url = "http://127.0.0.1:8000/api/trades/load-demo"
+    client, base_url = _client()
+    url = f"{base_url}/api/trades/load-demo"
     print(f"Testing {url}...")
     
     try:
-        response = requests.post(url)
+        response = client.post(url)
         if response.status_code == 200:
             data = response.json()
             print("Response received:")
@@ -33,6 +46,7 @@ def test_api():
         print(f"Exception: {e}")
 
 if __name__ == "__main__":
-    # Give server a moment to start
-    time.sleep(2)
+    if not OFFLINE:
+        # Give server a moment to start
+        time.sleep(2)
     test_api()
@@ -0,0 +1,48 @@
+"""
+Unit tests for API cold start (lazy controller and heavy imports)
+"""
+import importlib
+import json
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+
+from bench_startup import HEAVY_MODULES, IMPORT_PROBE
+
+
+class TestLazyStartup(unittest.TestCase):
+
+    def test_import_does_not_load_heavy_dependencies(self):
+        env = dict(os.environ, LLM_BACKEND="fake", API_WARMUP_ON_STARTUP="0")
+        output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                env=env, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(json.loads(output.strip().splitlines()[-1])['loaded'], [])
+        self.assertIn('yfinance', HEAVY_MODULES)
+
+    def test_controller_is_built_by_the_first_request_that_needs_it(self):
+        from fastapi.testclient import TestClient
+        with patch.dict(os.environ, {'GEMINI_API_KEY': 'test_key'}):
+            main = importlib.import_module('api.main')
+        self.addCleanup(setattr, main, 'controller', None)
+        main.controller = None
+        client = TestClient(main.app)
+
+        self.assertFalse(client.get('/api/health').json()['controller_loaded'])
+        self.assertIn('personas', client.get('/api/personas').json())
+        self.assertTrue(client.get('/api/health').json()['controller_loaded'])
+        self.assertEqual(client.get('/api/trades').json(), {'trades': [], 'count': 0})
+
+    def test_warm_up_builds_every_agent(self):
+        with patch.dict(os.environ, {'GEMINI_API_KEY': 'test_key'}):
+            main = importlib.import_module('api.main')
+        self.addCleanup(setattr, main, 'controller', None)
+        main.controller = None
+        agents = main.warm_up()
+        self.assertIn('market_intelligence', agents)
+        self.assertEqual(sorted(agents), sorted(main.controller.built_agents()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Unit tests for the historical replay harness (offline fake LLM, synthetic session)
+"""
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+from unittest.mock import patch
+
+import numpy as np
+
+import data_manager
+from backtest_harness import (BacktestHarness, BarReplayStream, SimulatedClock, check_regression,
+                              synthetic_bars, synthetic_events)
+from telemetry_journal import TelemetryJournal, record_events
+
+
+def mock_trades():
+    np.random.seed(0)
+    return data_manager.generate_mock_trades(30)
+
+
+class TestBarReplayStream(unittest.TestCase):
+
+    def test_state_only_uses_bars_closed_by_the_clock(self):
+        bars = synthetic_bars(calm_hours=40, crisis_hours=40)
+        clock = SimulatedClock(bars.index[39].to_pydatetime())
+        stream = BarReplayStream(bars, clock, window=35)
+        calm = stream.capture_market_state('SPY')
+        self.assertEqual(calm['regime'], 'LOW_VOL')
+        self.assertEqual(calm['current_price'], round(bars['Close'].iloc[39], 2))
+
+        clock.advance_to(timedelta(hours=39).total_seconds())
+        crisis = stream.capture_market_state('SPY')
+        self.assertEqual(crisis['regime'], 'CRISIS')
+        self.assertEqual(crisis['timestamp'], bars.index[78].isoformat())
+
+
+class TestBacktestHarness(unittest.TestCase):
+
+    def setUp(self):
+        backend = patch('llm_client.LLM_BACKEND', 'fake')
+        backend.start()
+        self.addCleanup(backend.stop)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.journal = TelemetryJournal(os.path.join(self.tmp.name, 'session.journal'))
+        self.addCleanup(self.journal.close)
+        record_events(self.journal, synthetic_events(hours=6, crisis_after_hours=3))
+        # Bars turn volatile as the hourly panic bursts start (3 hours in)
+        self.harness = BacktestHarness(mock_trades(), synthetic_bars(calm_hours=8, crisis_hours=6),
+                                       self.journal, bar_window=6)
+        self.addCleanup(self.harness.close)
+
+    def test_replay_report(self):
+        report = self.harness.run()
+        self.assertEqual(report['loops'], 6 * 6 + 3 * 10)
+        self.assertGreater(report['simulated_seconds'], 5 * 3600)
+        self.assertGreater(report['speedup'], 1)
+        self.assertEqual(set(report['stage_latency']), {'perceive', 'regime', 'tilt', 'intervention'})
+        self.assertEqual(report['loop_latency']['count'], report['loops'])
+
+        fired = report['interventions']
+        self.assertTrue(fired)
+        self.assertTrue(all(i['offset_seconds'] > 3 * 3600 and i['regime'] != 'LOW_VOL' for i in fired))
+        # Lock windows follow the simulated clock: one lock per burst, the rest of the burst is suppressed
+        self.assertEqual(report['intervention_counts']['HARD_LOCK'], 3)
+        self.assertGreater(report['suppressed'], 0)
+
+    def test_max_loops(self):
+        self.assertEqual(self.harness.run(max_loops=5)['loops'], 5)
+
+    def test_runs_repeat_until_closed(self):
+        with self.harness as harness:
+            self.assertEqual(harness.run(max_loops=5)['loops'], 5)
+            self.assertEqual(harness.run(max_loops=5)['loops'], 5)
+        with self.assertRaises(RuntimeError):
+            self.harness.run(max_loops=1)
+
+    def test_regression_gate(self):
+        report = {'loops_per_second': 100.0, 'loop_latency': {'p95_ms': 12.0}}
+        self.assertEqual(check_regression(report, min_loops_per_second=50, max_loop_p95_ms=20), [])
+        self.assertEqual(len(check_regression(report, min_loops_per_second=500, max_loop_p95_ms=5)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Unit tests for the pre-market cache warmer (yfinance and LLM calls are faked)
+"""
+import json
+import threading
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+from antifragile_controller import AntifragileController
+from cache_warmer import CacheWarmer
+from persona_bot import CONTENT_CACHE
+
+
+class FakeTicker:
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self.news = [{'title': f'{ticker} headline', 'publisher': 'Wire', 'link': '#'}]
+
+    def history(self, period="3mo", interval="1d"):
+        bars = 60 if interval == "1d" else 40
+        close = 100 + np.cumsum(np.sin(np.arange(bars)))
+        index = pd.date_range("2026-01-01", periods=bars, freq="D" if interval == "1d" else "h")
+        return pd.DataFrame({'Close': close, 'High': close + 1, 'Low': close - 1,
+                             'Volume': np.full(bars, 1000.0)}, index=index)
+
+
+def fake_generate(prompt, **kwargs):
+    if '"explanations"' in prompt:
+        tickers = [line[1:line.index(']')] for line in prompt.splitlines() if line.startswith('[')]
+        return MagicMock(text=json.dumps({'explanations': [{'ticker': t, 'explanation': 'Warm.'} for t in tickers]}))
+    return MagicMock(text="Warm content")
+
+
+class TestCacheWarmer(unittest.TestCase):
+
+    def setUp(self):
+        CONTENT_CACHE.clear()
+        self.controller = AntifragileController("test_key")
+        for agent in (self.controller.market_intelligence, self.controller.persona_bot):
+            agent.model = MagicMock()
+            agent.model.generate_content.side_effect = fake_generate
+        for module in ('market_intelligence', 'perception_layer'):
+            patcher = patch(f'{module}.yf.Ticker', FakeTicker)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_run_once_fills_every_cache(self):
+        warmer = CacheWarmer(self.controller, ['AAPL', 'TSLA'], top_personas=2, llm_concurrency=2)
+        report = warmer.run_once()
+        self.assertEqual(report['failures'], [])
+        self.assertEqual(report['tasks'], 2 + 2 + 4)
+
+        mi = self.controller.market_intelligence
+        calls_after_warm = mi.model.generate_content.call_count + self.controller.persona_bot.model.generate_content.call_count
+        self.assertEqual(self.controller.explain_market_move('AAPL')['explanation'], 'Warm.')
+        self.assertEqual(self.controller.generate_daily_briefing(['AAPL', 'TSLA']), 'Warm content')
+        self.controller.generate_social_content('TSLA', warmer.personas[1], 'twitter')
+        self.assertEqual(
+            mi.model.generate_content.call_count + self.controller.persona_bot.model.generate_content.call_count,
+            calls_after_warm
+        )
+        self.assertIsNotNone(self.controller.market_stream.snapshots.get('AAPL'))
+
+    def test_llm_concurrency_is_a_real_bound(self):
+        in_flight, peak, lock = [0], [0], threading.Lock()
+
+        def tracked_generate(prompt, **kwargs):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+            return fake_generate(prompt, **kwargs)
+
+        for agent in (self.controller.market_intelligence, self.controller.persona_bot):
+            agent.model.generate_content.side_effect = tracked_generate
+        report = CacheWarmer(self.controller, ['AAPL', 'TSLA'], top_personas=2, llm_concurrency=1).run_once()
+        self.assertEqual(report['failures'], [])
+        self.assertEqual(peak[0], 1)
+
+    def test_warmed_entries_expire_at_the_open(self):
+        warmer = CacheWarmer(self.controller, ['AAPL'], open_time="09:30")
+        self.assertEqual(warmer.warm_ttl(datetime(2026, 10, 19, 9, 0)), 1800)
+        self.assertIsNone(warmer.warm_ttl(datetime(2026, 10, 19, 9, 30)))
+
+    def test_next_run_skips_weekends(self):
+        warmer = CacheWarmer(self.controller, ['AAPL'], warm_time="09:00")
+        friday_evening = datetime(2026, 10, 16, 18, 0)
+        self.assertEqual(warmer.next_run(friday_evening), datetime(2026, 10, 19, 9, 0))
+        monday_early = datetime(2026, 10, 19, 7, 30)
+        self.assertEqual(warmer.next_run(monday_early), datetime(2026, 10, 19, 9, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
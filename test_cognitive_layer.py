@@ -0,0 +1,91 @@
+"""
+Unit tests for the Cognitive Layer agents (LLM calls are mocked)
+"""
+import unittest
+from unittest.mock import MagicMock
+
+from cognitive_layer import MarketAnalystAgent, TiltDetectorAgent
+from llm_client import BREAKER
+
+
+def _market(ticker='AAPL', volatility=0.01, change=1.0, spike=False):
+    return {'ticker': ticker, 'volatility': volatility, 'price_change_5d': change, 'volume_spike': spike}
+
+
+class TestMarketAnalystAgent(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(BREAKER.reset)
+        self.agent = MarketAnalystAgent("test_key")
+        self.agent.model = MagicMock()
+        self.agent.model.generate_content.return_value = MagicMock(text='{"trader_advice": "Stay patient."}')
+
+    def test_deterministic_classification(self):
+        self.assertEqual(self.agent.classify_regime(_market(volatility=0.01)),
+                         {'regime_type': 'LOW_VOL', 'risk_level': 'LOW'})
+        self.assertEqual(self.agent.classify_regime(_market(volatility=0.03, change=-6.0)),
+                         {'regime_type': 'HIGH_VOL', 'risk_level': 'HIGH'})
+        self.assertEqual(self.agent.classify_regime(_market(volatility=0.08, change=9.0, spike=True)),
+                         {'regime_type': 'CRISIS', 'risk_level': 'EXTREME'})
+
+    def test_llm_called_only_on_transition(self):
+        first = self.agent.analyze_regime(_market())
+        second = self.agent.analyze_regime(_market(change=2.0))
+        self.assertTrue(first['regime_changed'])
+        self.assertFalse(second['regime_changed'])
+        self.assertEqual(second['trader_advice'], "Stay patient.")
+        self.assertEqual(self.agent.model.generate_content.call_count, 1)
+
+        self.agent.analyze_regime(_market(volatility=0.03))
+        self.assertEqual(self.agent.model.generate_content.call_count, 2)
+        self.agent.analyze_regime(_market(ticker='TSLA'))
+        self.assertEqual(self.agent.model.generate_content.call_count, 3)
+
+    def test_llm_failure_falls_back_to_template(self):
+        self.agent.model.generate_content.side_effect = Exception("429 Too Many Requests")
+        result = self.agent.analyze_regime(_market(volatility=0.08))
+        self.assertEqual(result['regime_type'], 'CRISIS')
+        self.assertIn('Extreme volatility', result['trader_advice'])
+
+        # The template is not memoized: the next call in the same regime retries the LLM
+        self.agent.model.generate_content.side_effect = None
+        result = self.agent.analyze_regime(_market(volatility=0.08))
+        self.assertFalse(result['regime_changed'])
+        self.assertEqual(result['trader_advice'], "Stay patient.")
+
+
+class TestTiltDetectorAgent(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(BREAKER.reset)
+        self.agent = TiltDetectorAgent("test_key")
+        self.agent.model = MagicMock()
+        self.market = {'regime': 'HIGH_VOL', 'volatility': 0.03}
+        self.behavior = {'is_erratic': True, 'total_actions': 12, 'cancel_count': 5}
+
+    def test_structured_output_is_typed(self):
+        self.agent.model.generate_content.return_value = MagicMock(text=(
+            '{"tilt_detected": true, "severity": "HIGH", '
+            '"reasoning": "Rapid cancels after losses", "trigger": "HIGH_VOL"}'
+        ))
+        result = self.agent.detect_tilt(self.market, self.behavior, {})
+
+        self.assertEqual(result['tilt_score'], 7)
+        self.assertEqual(result['severity'], 'HIGH')
+        self.assertEqual(result['llm_analysis'], 'Rapid cancels after losses')
+        config = self.agent.model.generate_content.call_args.kwargs['generation_config']
+        self.assertEqual(config['response_mime_type'], 'application/json')
+        self.assertEqual(config['max_output_tokens'], TiltDetectorAgent.MAX_OUTPUT_TOKENS)
+
+    def test_malformed_output_is_rejected_without_reprompt(self):
+        self.agent.model.generate_content.return_value = MagicMock(text='{"severity": "SEVERE"}')
+        result = self.agent.detect_tilt(self.market, self.behavior, {})
+
+        self.assertEqual(self.agent.model.generate_content.call_count, 1)
+        self.assertTrue(result['tilt_detected'])
+        self.assertNotIn('severity', result)
+        self.assertIn('LLM analysis failed', result['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
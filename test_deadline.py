@@ -0,0 +1,151 @@
+"""
+Unit tests for request deadlines and degraded-stage fallbacks (LLM calls are faked)
+"""
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from antifragile_controller import AntifragileController
+from data_manager import generate_mock_trades
+from deadline import Deadline, DeadlineExceeded
+from llm_client import BREAKER
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDeadline(unittest.TestCase):
+
+    def test_budget_accounting(self):
+        clock = FakeClock()
+        deadline = Deadline(5.0, clock=clock)
+        clock.now = 3.0
+        self.assertAlmostEqual(deadline.remaining(), 2.0)
+        self.assertTrue(deadline.allows(2.0))
+        self.assertFalse(deadline.allows(2.5))
+        with self.assertRaises(DeadlineExceeded):
+            deadline.sleep(4)
+        clock.now = 6.0
+        self.assertTrue(deadline.expired())
+
+    def test_degrade_records_each_stage_once(self):
+        deadline = Deadline(1.0)
+        deadline.degrade('tilt')
+        deadline.degrade('tilt')
+        self.assertEqual(deadline.summary()['degraded_stages'], ['tilt'])
+
+
+class TestAnalystLoopDeadline(unittest.TestCase):
+
+    def setUp(self):
+        self.controller = AntifragileController("test_key")
+
+    def stub_reasoning(self, tilt_seconds=0.0, tilt_score=0):
+        """Cognitive graph agents without LLM calls; the LLM tilt path takes `tilt_seconds`"""
+        controller = self.controller
+        controller.trader_profile = {'revenge_signals': 0, 'dominant_bias': 'DISCIPLINED_TRADER'}
+        controller.market_stream.capture_market_state = lambda ticker: {
+            'ticker': ticker, 'regime': 'LOW_VOL', 'volatility': 0.01, 'price_change_5d': 0.5
+        }
+        controller.market_analyst.analyze_regime = lambda market, use_llm=True: {'regime': market['regime']}
+
+        def detect_tilt(market, behavior, profile, use_llm=True):
+            if use_llm:
+                time.sleep(tilt_seconds)
+            return {'tilt_score': tilt_score, 'tilt_detected': tilt_score >= 5, 'fallback_mode': not use_llm}
+        controller.tilt_detector.detect_tilt = detect_tilt
+
+    def run_graph(self, deadline):
+        with patch('stage_graph.DEADLINE_MIN_STAGE_SECONDS', 0.01):
+            graph = self.controller._cognitive_graph('AAPL', deadline=deadline)
+            return graph.run(self.controller._stage_pool, deadline)
+
+    def test_slow_stage_returns_fallback(self):
+        self.stub_reasoning(tilt_seconds=0.5)
+        deadline = Deadline(0.1)
+        results, timings = self.run_graph(deadline)
+        self.assertTrue(results['tilt']['fallback_mode'])
+        self.assertEqual(timings['tilt']['status'], 'fallback')
+        self.assertEqual(timings['regime']['status'], 'ok')
+        # The budget is spent by then, so the intervention is templated as well
+        self.assertEqual(deadline.degraded_stages, ['tilt', 'intervention'])
+
+    def test_fast_stage_is_not_degraded(self):
+        self.stub_reasoning()
+        deadline = Deadline(5.0)
+        results, timings = self.run_graph(deadline)
+        self.assertFalse(results['tilt']['fallback_mode'])
+        self.assertEqual({t['status'] for t in timings.values()}, {'ok'})
+        self.assertEqual(deadline.degraded_stages, [])
+
+    def test_abandoned_intervention_is_delivered_once(self):
+        self.stub_reasoning(tilt_score=6)
+        engine = self.controller.intervention_engine
+        engine.model = MagicMock()
+
+        def slow_generation(*args, **kwargs):
+            time.sleep(0.6)
+            return MagicMock(text="Late LLM nudge")
+        engine.model.generate_content.side_effect = slow_generation
+
+        with patch('stage_graph.DEADLINE_MIN_STAGE_SECONDS', 0.01):
+            result = self.controller.run_cognitive_loop('AAPL', None, deadline=Deadline(0.3))
+        self.controller._stage_pool.shutdown(wait=True)  # Let the abandoned LLM generation finish
+
+        intervention = result['intervention']
+        self.assertTrue(intervention['templated'])
+        self.assertEqual(engine.intervention_history.recent(), [intervention])
+        self.assertEqual(engine.scheduler.snapshot('default')['delivered_last_hour'], 1)
+        self.assertIs(engine.scheduler._schedule('default').last, intervention)
+
+    def test_exhausted_budget_skips_the_llm(self):
+        mi = self.controller.market_intelligence
+        mi.model = MagicMock()
+        result = self.controller.run_full_analyst_loop('AAPL', budget_seconds=0)
+        self.assertTrue(result['market_explanation']['fallback_mode'])
+        self.assertIn('explanation', result['degraded_stages'])
+        mi.model.generate_content.assert_not_called()
+
+    def test_llm_failures_are_flagged_as_degraded(self):
+        self.addCleanup(BREAKER.reset)
+        controller = self.controller
+        controller.trader_profile = {'revenge_signals': 3, 'win_rate': 40, 'dominant_bias': 'REVENGE'}
+        controller.market_stream.capture_market_state = lambda ticker: {
+            'ticker': ticker, 'regime': 'HIGH_VOL', 'volatility': 0.03, 'price_change_5d': 1.0
+        }
+        mi = controller.market_intelligence
+        mi.explain_market_move = lambda ticker, deadline=None, context=None: {
+            **mi.fallback_explanation(ticker), 'fallback_mode': False
+        }
+        failing = MagicMock()
+        failing.generate_content.side_effect = RuntimeError("500 Internal Server Error")
+        for agent in (controller.market_analyst, controller.tilt_detector, controller.intervention_engine):
+            agent.model = failing
+        controller.insight_model = failing
+
+        result = controller.run_full_analyst_loop('AAPL', generate_mock_trades(30), budget_seconds=30)
+
+        intervention = result['behavioral_analysis']['intervention']
+        self.assertTrue(intervention['templated'])
+        self.assertNotEqual(intervention['type'], 'ERROR')
+        self.assertEqual(sorted(result['degraded_stages']),
+                         ['combined_insight', 'intervention', 'regime', 'tilt'])
+
+    def test_templated_intervention(self):
+        engine = self.controller.intervention_engine
+        engine.model = MagicMock()
+        intervention = engine.generate_intervention(
+            {'tilt_score': 9}, {'revenge_signals': 3}, {'regime': 'CRISIS'}, use_llm=False
+        )
+        self.assertEqual(intervention['type'], 'HARD_LOCK')
+        self.assertIn('CRISIS', intervention['message'])
+        engine.model.generate_content.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Unit tests for delta-gated reasoning in the cognitive loop (LLM calls are faked)
+"""
+import unittest
+from unittest.mock import patch
+
+from antifragile_controller import AntifragileController
+from data_manager import generate_mock_trades
+from fake_llm import FakeGenerativeModel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDeltaGating(unittest.TestCase):
+
+    def setUp(self):
+        controller = self.controller = AntifragileController("test_key")
+        controller.clock = self.clock = FakeClock()
+        controller.trader_profile = {'revenge_signals': 3, 'win_rate': 40, 'dominant_bias': 'REVENGE'}
+        self.market = {'ticker': 'AAPL', 'regime': 'HIGH_VOL', 'volatility': 0.031, 'price_change_5d': 1.0}
+        controller.market_stream.capture_market_state = lambda ticker: dict(self.market)
+        self.model = FakeGenerativeModel(profile='instant')
+        for agent in (controller.market_analyst, controller.tilt_detector, controller.intervention_engine):
+            agent.model = self.model
+        self.trades = generate_mock_trades(30)
+
+    def loop(self, user_action=None):
+        return self.controller.run_cognitive_loop('AAPL', self.trades, user_action)
+
+    def test_unchanged_perception_reuses_reasoning(self):
+        first = self.loop()
+        calls = self.model.calls
+        second = self.loop()
+        self.assertFalse(first['reasoning_reused'])
+        self.assertTrue(second['reasoning_reused'])
+        self.assertEqual(self.model.calls, calls)
+        self.assertIs(second['intervention'], first['intervention'])
+        self.assertEqual(len(self.controller.intervention_engine.intervention_history), 1)
+
+    def test_small_volatility_moves_stay_in_the_bucket(self):
+        self.loop()
+        self.market['volatility'] = 0.032
+        self.assertTrue(self.loop()['reasoning_reused'])
+        self.market['volatility'] = 0.036
+        self.assertFalse(self.loop()['reasoning_reused'])
+
+    def test_new_action_or_regime_reruns_reasoning(self):
+        self.loop()
+        self.assertFalse(self.loop('cancel_order')['reasoning_reused'])
+        self.market['regime'] = 'CRISIS'
+        self.assertFalse(self.loop()['reasoning_reused'])
+
+    def test_stale_reasoning_is_recomputed(self):
+        self.loop()
+        self.clock.now = 31
+        self.assertFalse(self.loop()['reasoning_reused'])
+        with patch('config.PERCEPTION_STALENESS_SECONDS', 0):
+            self.assertFalse(self.loop()['reasoning_reused'])
+
+    def test_fallback_results_are_not_reused(self):
+        self.model.generate_content = lambda *args, **kwargs: (_ for _ in ()).throw(ValueError("bad output"))
+        self.loop()
+        self.assertIsNone(self.controller._last_reasoning)
+        self.assertFalse(self.loop()['reasoning_reused'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Unit tests for the offline fake LLM backend
+"""
+import json
+import unittest
+from unittest.mock import patch
+
+from antifragile_controller import AntifragileController
+from fake_llm import FakeGenerativeModel, LatencyProfile
+from llm_client import structured_config, validate
+from market_intelligence import MarketIntelligence
+from metrics import is_rate_limit
+
+
+class TestFakeGenerativeModel(unittest.TestCase):
+
+    def test_structured_responses_are_schema_valid(self):
+        model = FakeGenerativeModel(profile='instant')
+        for schema in (MarketIntelligence.SENTIMENT_SCHEMA, MarketIntelligence.BATCH_EXPLAIN_SCHEMA):
+            response = model.generate_content("[AAPL] Price $1\n\n[TSLA] Price $2", structured_config(schema, 256))
+            self.assertEqual(validate(json.loads(response.text), schema), [])
+
+    def test_batch_response_covers_every_ticker(self):
+        model = FakeGenerativeModel(profile='instant')
+        config = structured_config(MarketIntelligence.BATCH_EXPLAIN_SCHEMA, 400)
+        data = json.loads(model.generate_content("[AAPL] x\n\n[NVDA] y", config).text)
+        self.assertEqual([item['ticker'] for item in data['explanations']], ['AAPL', 'NVDA'])
+
+    def test_responses_are_deterministic(self):
+        prompt = "You are a professional market analyst. Explain why NVDA moved today."
+        first = FakeGenerativeModel(profile='instant').generate_content(prompt)
+        second = FakeGenerativeModel(profile='instant').generate_content(prompt)
+        self.assertEqual(first.text, second.text)
+        self.assertIn('NVDA', first.text)
+        self.assertGreater(first.usage_metadata.prompt_token_count, 0)
+
+    def test_injected_rate_limit_burst(self):
+        model = FakeGenerativeModel(profile=LatencyProfile(rate_limit_rate=1.0, rate_limit_burst=3))
+        for _ in range(3):
+            with self.assertRaises(RuntimeError) as ctx:
+                model.generate_content("hello")
+            self.assertTrue(is_rate_limit(ctx.exception))
+
+    def test_latency_is_sampled_from_profile(self):
+        slept = []
+        model = FakeGenerativeModel(profile=LatencyProfile(median_ms=100, p95_ms=400), sleep=slept.append)
+        for _ in range(200):
+            model.generate_content("hello")
+        slept.sort()
+        self.assertAlmostEqual(slept[100], 0.1, delta=0.03)
+        self.assertAlmostEqual(slept[190], 0.4, delta=0.15)
+
+
+class TestOfflineBackend(unittest.TestCase):
+
+    def test_controller_builds_without_api_key(self):
+        with patch('llm_client.LLM_BACKEND', 'fake'), patch('llm_client.genai.configure') as configure:
+            AntifragileController(None)
+        configure.assert_not_called()
+
+    def test_gemini_backend_still_requires_a_key(self):
+        with patch('llm_client.LLM_BACKEND', 'gemini'):
+            with self.assertRaises(ValueError):
+                AntifragileController(None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Unit tests for vectorized fleet tilt scoring
+"""
+import itertools
+import time
+import unittest
+
+import numpy as np
+
+from cognitive_layer import TiltDetectorAgent
+from fleet_tilt import FleetTiltScorer, erratic_mask, score_fleet, severity_codes
+from perception_layer import UserStreamProcessor
+from regime_scanner import REGIME_TIERS
+
+
+class TestFleetTilt(unittest.TestCase):
+
+    def test_scores_match_the_per_trader_detector(self):
+        detector = TiltDetectorAgent("test_key")
+        cases = list(itertools.product(REGIME_TIERS, (False, True), (0, 2, 3, 6)))
+        regimes, erratic, revenge = (list(column) for column in zip(*cases))
+        scores = score_fleet(regimes, erratic, revenge)
+        for (regime, is_erratic, signals), score in zip(cases, scores):
+            expected = detector.score_tilt({'regime': regime}, {'is_erratic': is_erratic}, {'revenge_signals': signals})
+            self.assertEqual(int(score), expected)
+
+    def test_regime_tier_indices(self):
+        tiers = np.arange(len(REGIME_TIERS))
+        np.testing.assert_array_equal(score_fleet(tiers, False, 0), score_fleet(REGIME_TIERS, False, 0))
+
+    def test_erratic_rule_matches_the_user_stream(self):
+        for cancels, orders, speed in itertools.product((0, 3, 4), (0, 5, 6), (0, 500, 501)):
+            stream = UserStreamProcessor()
+            for _ in range(cancels):
+                stream.capture_interaction('cancel_order')
+            for _ in range(orders):
+                stream.capture_interaction('place_order')
+            stream.capture_mouse_speed(speed)
+            expected = stream.analyze_interaction_velocity()['is_erratic']
+            self.assertEqual(bool(erratic_mask(cancels, orders, speed)), expected, (cancels, orders, speed))
+
+    def test_severity_thresholds(self):
+        codes = severity_codes(np.arange(10))
+        np.testing.assert_array_equal(codes, [0, 0, 0, 0, 0, 1, 1, 2, 2, 3])
+
+
+class TestFleetTiltScorer(unittest.TestCase):
+
+    def setUp(self):
+        self.scorer = FleetTiltScorer()
+
+    def test_only_changed_traders_are_returned(self):
+        changes = self.scorer.update(['a', 'b', 'c'], ['CRISIS', 'LOW_VOL', 'CRISIS'], [3, 0, 0], is_erratic=[True, False, False])
+        self.assertEqual([(c['trader_id'], c['severity']) for c in changes], [('a', 'HARD_LOCK')])
+        self.assertEqual(self.scorer.update(['a', 'b', 'c'], ['CRISIS', 'LOW_VOL', 'CRISIS'], [3, 0, 0],
+                                            is_erratic=[True, False, False]), [])
+
+        changes = self.scorer.update(['a', 'b', 'c'], ['LOW_VOL', 'LOW_VOL', 'CRISIS'], [3, 0, 0], is_erratic=[True, False, True])
+        self.assertEqual({c['trader_id']: (c['previous_severity'], c['severity']) for c in changes},
+                         {'a': ('HARD_LOCK', 'SOFT_NUDGE'), 'c': ('NONE', 'CRITICAL')})
+        self.assertEqual(self.scorer.severity_counts(), {'NONE': 1, 'SOFT_NUDGE': 1, 'CRITICAL': 1, 'HARD_LOCK': 0})
+
+    def test_reordered_and_new_traders(self):
+        self.scorer.update([10, 20], ['CRISIS', 'CRISIS'], [3, 3], is_erratic=[True, False])
+        changes = self.scorer.update([30, 20, 10], ['CRISIS', 'CRISIS', 'CRISIS'], [3, 3, 3], is_erratic=[True, False, True])
+        self.assertEqual([(c['trader_id'], c['previous_severity']) for c in changes], [(30, 'NONE')])
+
+    def test_partial_batches_keep_the_rest_of_the_fleet(self):
+        self.scorer.update(['a', 'b', 'c'], ['CRISIS'] * 3, [3, 3, 0], is_erratic=[True, False, False])
+        self.assertEqual(self.scorer.update(['b'], ['CRISIS'], [3], is_erratic=[False]), [])
+        self.assertEqual(self.scorer.update(['d'], ['CRISIS'], [3], is_erratic=[True])[0]['previous_severity'], 'NONE')
+
+        # 'a' was left out of the last two batches and is still at HARD_LOCK
+        self.assertEqual(self.scorer.update(['c', 'a'], ['CRISIS', 'CRISIS'], [0, 3], is_erratic=[False, True]), [])
+        self.assertEqual(self.scorer.severity_counts(), {'NONE': 1, 'SOFT_NUDGE': 1, 'CRITICAL': 0, 'HARD_LOCK': 2})
+        self.assertEqual(list(self.scorer.trader_ids), ['a', 'b', 'c', 'd'])
+
+    def test_derives_erratic_from_raw_counts(self):
+        changes = self.scorer.update(['a', 'b'], ['HIGH_VOL', 'HIGH_VOL'], [0, 0], cancel_count=[4, 0], order_count=[0, 2])
+        self.assertEqual([(c['trader_id'], c['tilt_score']) for c in changes], [('a', 7)])
+
+    def test_large_fleet_scores_in_one_pass(self):
+        rng = np.random.default_rng(0)
+        n = 100_000
+        ids = np.arange(n)
+        regimes = rng.integers(0, len(REGIME_TIERS), n)
+        self.scorer.update(ids, regimes, rng.integers(0, 5, n), cancel_count=rng.integers(0, 5, n))
+        started = time.perf_counter()
+        changes = self.scorer.update(ids[::-1], regimes[::-1], rng.integers(0, 5, n), cancel_count=rng.integers(0, 5, n))
+        self.assertLess(time.perf_counter() - started, 2.0)
+        self.assertLess(len(changes), n)
+        self.assertEqual(sum(self.scorer.severity_counts().values()), n)
+
+
+if __name__ == '__main__':
+    unittest.main()
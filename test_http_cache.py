@@ -0,0 +1,84 @@
+"""
+Unit tests for ETag / Cache-Control / compression on polled API endpoints (controller is mocked)
+"""
+import importlib
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+from http_cache import cache_control, etag_matches
+
+
+class TestEtagMatching(unittest.TestCase):
+
+    def test_if_none_match_forms(self):
+        self.assertTrue(etag_matches('"abc"', '"abc"'))
+        self.assertTrue(etag_matches('"x", W/"abc"', '"abc"'))
+        self.assertTrue(etag_matches('*', '"abc"'))
+        self.assertFalse(etag_matches('"abd"', '"abc"'))
+        self.assertFalse(etag_matches(None, '"abc"'))
+
+    def test_cache_control(self):
+        self.assertEqual(cache_control(60), "public, max-age=60")
+        self.assertEqual(cache_control(60, public=False), "private, max-age=60")
+        self.assertEqual(cache_control(0), "no-cache")
+
+
+class TestCachedEndpoints(unittest.TestCase):
+
+    def setUp(self):
+        from fastapi.testclient import TestClient
+        with patch.dict(os.environ, {'GEMINI_API_KEY': 'test_key'}):
+            self.main = importlib.import_module('api.main')
+        self.addCleanup(setattr, self.main, 'controller', None)
+        self.addCleanup(setattr, self.main, 'trades_df', None)
+        self.main.controller = MagicMock()
+        self.main.controller.get_available_personas.return_value = ['The Quant', 'The Contrarian']
+        self.client = TestClient(self.main.app)
+
+    def test_unchanged_poll_is_a_304(self):
+        first = self.client.get('/api/personas')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers['cache-control'], "public, max-age=3600")
+
+        again = self.client.get('/api/personas', headers={'If-None-Match': first.headers['etag']})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b'')
+        self.assertEqual(again.headers['etag'], first.headers['etag'])
+
+    def test_changed_content_gets_a_new_etag(self):
+        technicals = self.main.controller.get_market_technicals
+        technicals.return_value = {'ticker': 'AAPL', 'rsi': 55.0}
+        first = self.client.get('/api/market/technicals/AAPL')
+        self.assertIn('max-age=60', first.headers['cache-control'])
+
+        technicals.return_value = {'ticker': 'AAPL', 'rsi': 61.0}
+        changed = self.client.get('/api/market/technicals/AAPL', headers={'If-None-Match': first.headers['etag']})
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()['rsi'], 61.0)
+        self.assertNotEqual(changed.headers['etag'], first.headers['etag'])
+
+    def test_errors_are_not_cached(self):
+        self.main.controller.get_market_technicals.return_value = {'error': 'Insufficient data for technical analysis'}
+        response = self.client.get('/api/market/technicals/XYZ')
+        self.assertEqual(response.headers['cache-control'], "no-store")
+        self.assertNotIn('etag', response.headers)
+
+    def test_trades_revalidate_and_compress(self):
+        empty = self.client.get('/api/trades')
+        self.assertEqual(empty.headers['cache-control'], "no-cache")
+
+        self.client.post('/api/trades/load-demo')
+        loaded = self.client.get('/api/trades', headers={'If-None-Match': empty.headers['etag'],
+                                                         'Accept-Encoding': 'gzip'})
+        self.assertEqual(loaded.status_code, 200)
+        self.assertEqual(loaded.json()['count'], 30)
+        self.assertEqual(loaded.headers['content-encoding'], 'gzip')
+        self.assertIs(self.main.display_trades(), self.main.display_trades())
+
+        unchanged = self.client.get('/api/trades', headers={'If-None-Match': loaded.headers['etag']})
+        self.assertEqual(unchanged.status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Unit tests for the bounded intervention history and its rolling counters
+"""
+import json
+import os
+import tempfile
+import unittest
+
+from intervention_history import InterventionHistory
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def intervention(kind, i=0):
+    return {'type': kind, 'message': f"message {i}", 'timestamp': f"t{i}"}
+
+
+class TestInterventionHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.spill_path = os.path.join(self.tmp.name, 'history.jsonl')
+        self.history = InterventionHistory(maxlen=3, spill_path=self.spill_path, clock=self.clock)
+
+    def test_empty_stats(self):
+        self.assertEqual(self.history.stats(), {'total': 0})
+
+    def test_memory_is_bounded_and_old_entries_spill(self):
+        for i in range(5):
+            self.history.append(intervention('SOFT_NUDGE', i))
+        self.assertEqual(len(self.history), 5)
+        self.assertEqual([i['message'] for i in self.history.recent()], ['message 2', 'message 3', 'message 4'])
+        with open(self.spill_path) as fh:
+            spilled = [json.loads(line)['message'] for line in fh]
+        self.assertEqual(spilled, ['message 0', 'message 1'])
+        stats = self.history.stats()
+        self.assertEqual((stats['total'], stats['soft_nudges'], stats['retained'], stats['spilled']), (5, 5, 3, 2))
+        self.assertEqual(stats['last_intervention'], 't4')
+
+    def test_spill_file_is_not_held_open(self):
+        for i in range(4):
+            self.history.append(intervention('SOFT_NUDGE', i))
+        # A rotated-away log is recreated on the next spill instead of written through a stale handle
+        os.remove(self.spill_path)
+        self.history.append(intervention('SOFT_NUDGE', 4))
+        with open(self.spill_path) as fh:
+            self.assertEqual([json.loads(line)['message'] for line in fh], ['message 1'])
+
+    def test_rolling_windows(self):
+        self.history.append(intervention('HARD_LOCK'))
+        self.clock.now += 1800
+        self.history.append(intervention('CRITICAL'))
+        self.history.append(intervention('CRITICAL'))
+        stats = self.history.stats()
+        self.assertEqual(stats['last_hour'], {'SOFT_NUDGE': 0, 'CRITICAL': 2, 'HARD_LOCK': 1})
+
+        self.clock.now += 1860
+        stats = self.history.stats()
+        self.assertEqual(stats['last_hour'], {'SOFT_NUDGE': 0, 'CRITICAL': 2, 'HARD_LOCK': 0})
+        self.assertEqual(stats['last_day']['HARD_LOCK'], 1)
+        self.assertEqual(stats['hard_locks'], 1)
+
+        self.clock.now += 86400
+        self.assertEqual(self.history.stats()['last_day'], {'SOFT_NUDGE': 0, 'CRITICAL': 0, 'HARD_LOCK': 0})
+
+    def test_no_spill_path_drops_old_entries(self):
+        history = InterventionHistory(maxlen=1, spill_path=None, clock=self.clock)
+        history.append(intervention('SOFT_NUDGE'))
+        history.append(intervention('SOFT_NUDGE'))
+        self.assertEqual(history.stats()['spilled'], 1)
+        self.assertEqual(len(history.recent()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Unit tests for the precomputed intervention library and async personalization (LLM calls are mocked)
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from action_layer import InterventionEngine
+from config import BIAS_DEFINITIONS, REGIME_DEFINITIONS
+from intervention_library import InterventionLibrary, build_library, library_key
+
+
+class TestInterventionLibrary(unittest.TestCase):
+
+    def test_every_key_has_variations(self):
+        library = build_library(variations=3)
+        for severity in ('CRITICAL', 'HARD_LOCK'):
+            for bias in BIAS_DEFINITIONS:
+                for regime in REGIME_DEFINITIONS:
+                    variations = library[library_key(severity, bias, regime)]
+                    self.assertEqual(len(set(variations)), 3)
+
+    def test_variations_rotate_per_trader(self):
+        library = InterventionLibrary(path=None)
+        first = library.message('HARD_LOCK', 'FOMO_OVERTRADING', 'CRISIS', 9, 'a')
+        self.assertNotEqual(library.message('HARD_LOCK', 'FOMO_OVERTRADING', 'CRISIS', 9, 'a'), first)
+        self.assertEqual(library.message('HARD_LOCK', 'FOMO_OVERTRADING', 'CRISIS', 9, 'b'), first)
+        self.assertIn('9/10', first)
+        self.assertNotIn('{', first)
+
+    def test_unknown_bias_uses_default_entry(self):
+        message = InterventionLibrary(path=None).message('CRITICAL', None, 'LOW_VOL', 7)
+        self.assertIn('7/10', message)
+
+    def test_loads_a_prebuilt_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'library.json')
+            with open(path, 'w') as fh:
+                json.dump({library_key('CRITICAL', 'DEFAULT', 'HIGH_VOL'): ["Custom {score}"]}, fh)
+            self.assertEqual(InterventionLibrary(path=path).message('CRITICAL', 'x', 'HIGH_VOL', 8), "Custom 8")
+
+
+class TestInstantDelivery(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = InterventionEngine("test_key")
+        self.release = threading.Event()
+        self.engine.model = MagicMock()
+
+        def slow_llm(*args, **kwargs):
+            self.release.wait(5)
+            return MagicMock(text="Personal message.")
+        self.engine.model.generate_content.side_effect = slow_llm
+        self.addCleanup(self.release.set)
+
+    def intervene(self, score):
+        return self.engine.generate_intervention(
+            {'tilt_score': score}, {'dominant_bias': 'LOSS_AVERSION_REVENGE', 'revenge_signals': 3},
+            {'regime': 'CRISIS'}
+        )
+
+    def test_lock_is_served_before_the_llm_answers(self):
+        started = time.perf_counter()
+        lock = self.intervene(9)
+        self.assertLess(time.perf_counter() - started, 0.05)
+        self.assertEqual((lock['type'], lock['source'], lock['personalized']), ('HARD_LOCK', 'library', False))
+        self.assertNotIn('templated', lock)
+
+        lock['ui'] = self.engine.create_ui_overlay(lock)
+        self.release.set()
+        self.assertTrue(self.engine.wait_for_personalization(timeout=5))
+        self.assertEqual(lock['message'], "Personal message.")
+        self.assertEqual(lock['ui']['message'], "Personal message.")
+        self.assertIs(self.engine.find_intervention(lock['id']), lock)
+
+    def test_failed_personalization_keeps_the_library_message(self):
+        self.engine.model.generate_content.side_effect = ValueError("bad output")
+        lock = self.intervene(9)
+        message = lock['message']
+        self.assertTrue(self.engine.wait_for_personalization(timeout=5))
+        self.assertEqual(lock['message'], message)
+        self.assertFalse(lock['personalized'])
+
+    def test_soft_nudge_is_still_generated_inline(self):
+        self.release.set()
+        nudge = self.intervene(5)
+        self.assertEqual(nudge['message'], "Personal message.")
+        self.assertNotIn('source', nudge)
+
+
+if __name__ == '__main__':
+    unittest.main()
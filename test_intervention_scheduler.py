@@ -0,0 +1,90 @@
+"""
+Unit tests for intervention lock windows, cooldowns and hourly caps (LLM calls are mocked)
+"""
+import unittest
+from unittest.mock import MagicMock
+
+from action_layer import InterventionEngine
+from intervention_scheduler import InterventionScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def tilt(score):
+    return {'tilt_score': score}
+
+
+class TestInterventionScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = InterventionScheduler(max_per_hour=3, active_minutes={'HARD_LOCK': 5, 'CRITICAL': 2},
+                                               clock=self.clock)
+
+    def test_lock_is_returned_until_it_expires(self):
+        lock = {'type': 'HARD_LOCK', 'message': 'paused'}
+        self.scheduler.record('t1', lock)
+        self.clock.now += 60
+        repeated = self.scheduler.active_intervention('t1', 'CRITICAL')
+        self.assertEqual(repeated['message'], 'paused')
+        self.assertEqual(repeated['repeat_reason'], 'active')
+        self.assertIsNone(self.scheduler.active_intervention('t2', 'CRITICAL'))
+        self.clock.now += 5 * 60
+        self.assertIsNone(self.scheduler.active_intervention('t1', 'CRITICAL'))
+
+    def test_escalation_breaks_through_a_cooldown(self):
+        self.scheduler.record('t1', {'type': 'CRITICAL', 'message': 'warning'})
+        self.assertIsNotNone(self.scheduler.active_intervention('t1', 'SOFT_NUDGE'))
+        self.assertIsNone(self.scheduler.active_intervention('t1', 'HARD_LOCK'))
+
+    def test_hourly_cap(self):
+        for i in range(3):
+            self.scheduler.record('t1', {'type': 'SOFT_NUDGE', 'message': str(i)})
+            self.clock.now += 60
+        self.assertTrue(self.scheduler.at_hourly_limit('t1'))
+        self.assertEqual(self.scheduler.active_intervention('t1', 'SOFT_NUDGE')['repeat_reason'], 'rate_limited')
+        self.assertIsNone(self.scheduler.active_intervention('t1', 'HARD_LOCK'))
+        self.clock.now += 3600
+        self.assertFalse(self.scheduler.at_hourly_limit('t1'))
+        self.assertEqual(self.scheduler.snapshot('t1')['delivered_last_hour'], 0)
+
+
+class TestEngineScheduling(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = InterventionEngine("test_key")
+        self.clock = FakeClock()
+        self.engine.scheduler = InterventionScheduler(max_per_hour=2, clock=self.clock)
+        self.engine.model = MagicMock()
+        self.engine.model.generate_content.return_value = MagicMock(text="Step away for five minutes.")
+
+    def intervene(self, score, **kwargs):
+        return self.engine.generate_intervention(tilt(score), {'revenge_signals': 3}, {'regime': 'CRISIS'}, **kwargs)
+
+    def test_active_lock_skips_the_llm(self):
+        first = self.intervene(9)
+        self.assertTrue(self.engine.wait_for_personalization(timeout=5))
+        second = self.intervene(9)
+        self.assertEqual(self.engine.model.generate_content.call_count, 1)
+        self.assertTrue(second['repeated'])
+        self.assertEqual(second['message'], first['message'])
+        self.assertEqual(len(self.engine.intervention_history), 1)
+
+    def test_hard_lock_at_the_cap_is_templated(self):
+        self.intervene(5)
+        self.intervene(5)
+        self.assertTrue(self.intervene(5)['repeated'])
+        lock = self.intervene(9)
+        self.assertEqual(lock['type'], 'HARD_LOCK')
+        self.assertTrue(lock['templated'])
+        self.assertEqual(self.engine.model.generate_content.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,256 @@
+"""
+Unit tests for structured LLM output helpers
+"""
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from google.generativeai import protos
+from google.generativeai.types import generation_types
+
+from antifragile_controller import AntifragileController
+from cognitive_layer import MarketAnalystAgent, TiltDetectorAgent
+
+import config
+import llm_client
+from llm_client import (
+    BREAKER, CircuitBreaker, CircuitOpenError, ModelRouter, RoutedModel, SchemaValidationError,
+    configure, generate, generate_structured, parse_json, structured_config, validate
+)
+from market_intelligence import MarketIntelligence
+from metrics import LLM_HEDGES
+
+SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'sentiment': {'type': 'string', 'enum': ['BULLISH', 'BEARISH', 'NEUTRAL']},
+        'confidence': {'type': 'integer', 'minimum': 0, 'maximum': 100},
+        'key_factors': {'type': 'array', 'items': {'type': 'string'}}
+    },
+    'required': ['sentiment', 'confidence']
+}
+
+
+class TestStructuredOutputs(unittest.TestCase):
+
+    def test_valid_payload(self):
+        self.assertEqual(validate({'sentiment': 'BULLISH', 'confidence': 80, 'key_factors': ['RSI']}, SCHEMA), [])
+
+    def test_invalid_payloads(self):
+        self.assertIn("$.confidence: missing", validate({'sentiment': 'BULLISH'}, SCHEMA))
+        self.assertTrue(validate({'sentiment': 'MOON', 'confidence': 80}, SCHEMA))
+        self.assertTrue(validate({'sentiment': 'BULLISH', 'confidence': 101}, SCHEMA))
+        self.assertTrue(validate({'sentiment': 'BULLISH', 'confidence': True}, SCHEMA))
+        self.assertTrue(validate({'sentiment': 'BULLISH', 'confidence': 5, 'key_factors': [1]}, SCHEMA))
+
+    def test_parse_json_strips_fences(self):
+        self.assertEqual(parse_json('```json\n{"a": 1}\n```'), {'a': 1})
+        with self.assertRaises(SchemaValidationError):
+            parse_json('Sure! Here is the JSON you asked for')
+
+    def test_generate_structured_rejects_malformed(self):
+        model = MagicMock()
+        model.generate_content.return_value = MagicMock(text='{"sentiment": "BULLISH"}')
+        with self.assertRaises(SchemaValidationError):
+            generate_structured(model, "prompt", SCHEMA, 64)
+        self.assertEqual(model.generate_content.call_count, 1)
+
+    def test_declared_schemas_are_accepted_by_the_sdk(self):
+        persona_schema = {'type': 'object', 'properties': {'twitter': {'type': 'string'}}, 'required': ['twitter']}
+        for schema in (SCHEMA, MarketIntelligence.SENTIMENT_SCHEMA, MarketIntelligence.BATCH_EXPLAIN_SCHEMA,
+                       MarketAnalystAgent.RESPONSE_SCHEMA, TiltDetectorAgent.RESPONSE_SCHEMA, persona_schema):
+            config = generation_types.to_generation_config_dict(structured_config(schema, 128))
+            protos.GenerationConfig(config)  # Raises on fields the SDK does not know
+
+    def test_bounds_are_still_validated_locally(self):
+        sent = structured_config(SCHEMA, 64)['response_schema']
+        self.assertNotIn('minimum', sent['properties']['confidence'])
+        self.assertTrue(validate({'sentiment': 'BULLISH', 'confidence': 101}, SCHEMA))
+
+
+class FakeModel:
+    """Returns its own name after a fixed delay, or raises"""
+
+    def __init__(self, name, delay=0.0, error=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    def generate_content(self, prompt, generation_config=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return MagicMock(text=self.name, usage_metadata=None)
+
+
+class TestModelRouter(unittest.TestCase):
+
+    def make_router(self, models, hedging=True):
+        return ModelRouter(
+            tiers={'fast': 'fast-model', 'primary': 'primary-model'},
+            task_tiers={'twitter': 'fast', 'explain_market_move': 'primary'},
+            hedge_model='fast-model', hedging=hedging, model_factory=lambda name: models[name]
+        )
+
+    def test_tasks_route_to_tiers(self):
+        models = {'fast-model': FakeModel('fast-model'), 'primary-model': FakeModel('primary-model')}
+        router = self.make_router(models, hedging=False)
+        self.assertEqual(router.generate('twitter', 'p').text, 'fast-model')
+        self.assertEqual(router.generate('explain_market_move', 'p').text, 'primary-model')
+        self.assertEqual(router.model_name_for('unknown_task'), 'primary-model')
+
+    def test_slow_primary_is_hedged(self):
+        models = {'fast-model': FakeModel('fast-model', delay=0.01),
+                  'primary-model': FakeModel('primary-model', delay=0.5)}
+        router = self.make_router(models)
+        router.p95_latency = lambda name: 0.05
+
+        started = time.perf_counter()
+        response = router.generate('explain_market_move', 'p')
+        self.assertEqual(response.text, 'fast-model')
+        self.assertLess(time.perf_counter() - started, 0.4)
+
+    def test_failed_primary_fails_over(self):
+        models = {'fast-model': FakeModel('fast-model'),
+                  'primary-model': FakeModel('primary-model', error=RuntimeError('500'))}
+        router = self.make_router(models)
+        self.assertEqual(router.generate('explain_market_move', 'p').text, 'fast-model')
+
+    def test_fast_tier_is_never_hedged_to_itself(self):
+        models = {'fast-model': FakeModel('fast-model', delay=0.1), 'primary-model': FakeModel('primary-model')}
+        router = self.make_router(models)
+        router.p95_latency = lambda name: 0.01
+        self.assertEqual(router.generate('twitter', 'p').text, 'fast-model')
+        self.assertEqual(models['fast-model'].calls, 1)
+
+    def test_shipped_tiers_hedge_primary_to_a_different_model(self):
+        primary, fast = config.MODEL_TIERS['primary'], config.MODEL_TIERS['fast']
+        self.assertNotEqual(primary, fast)
+        models = {fast: FakeModel(fast, delay=0.01), primary: FakeModel(primary, delay=0.5)}
+        router = ModelRouter(model_factory=lambda name: models[name])
+        router.p95_latency = lambda name: 0.05
+        sent = LLM_HEDGES.value(primary, 'sent')
+
+        self.assertEqual(router.generate('explain_market_move', 'p').text, fast)
+        self.assertEqual(LLM_HEDGES.value(primary, 'sent'), sent + 1)
+
+    def test_warns_when_hedging_can_never_run(self):
+        with patch('builtins.print') as printed:
+            ModelRouter(tiers={'fast': 'same-model', 'primary': 'same-model'}, hedge_model='same-model')
+        self.assertIn('hedging is inactive', printed.call_args[0][0])
+
+    def test_rate_limited_primary_is_not_failed_over(self):
+        models = {'fast-model': FakeModel('fast-model'),
+                  'primary-model': FakeModel('primary-model', error=RuntimeError('429 Too Many Requests'))}
+        router = self.make_router(models)
+        with self.assertRaises(RuntimeError):
+            router.generate('explain_market_move', 'p')
+        self.assertEqual(models['fast-model'].calls, 0)
+
+    def test_generate_passes_endpoint_as_task(self):
+        models = {'fast-model': FakeModel('fast-model'), 'primary-model': FakeModel('primary-model')}
+        model = RoutedModel(self.make_router(models, hedging=False))
+        self.assertEqual(generate(model, 'p', 'persona_bot', 'twitter').text, 'fast-model')
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.breaker = CircuitBreaker('test', failure_threshold=3, reset_seconds=10, clock=lambda: self.now)
+
+    def tearDown(self):
+        BREAKER.reset()
+
+    def test_opens_after_consecutive_failures(self):
+        for _ in range(2):
+            self.breaker.record_failure()
+        self.breaker.record_success()
+        for _ in range(3):
+            self.breaker.before_call()
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open')
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+    def test_half_open_probe(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.now = 11
+        self.breaker.before_call()  # The probe
+        self.assertEqual(self.breaker.state, 'half_open')
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()  # Only one probe in flight
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open')
+
+        self.now = 22
+        self.breaker.before_call()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, 'closed')
+        self.assertEqual(self.breaker.snapshot()['transitions'],
+                         {'closed->open': 1, 'open->half_open': 2, 'half_open->open': 1, 'half_open->closed': 1})
+
+    def test_client_error_during_half_open_releases_the_probe(self):
+        self.breaker.half_open_probes = 1
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.now = 11
+        model = MagicMock()
+        model.generate_content.side_effect = [ValueError("bad schema"), MagicMock(text='ok', usage_metadata=None)]
+        with patch('llm_client.BREAKER', self.breaker):
+            with self.assertRaises(ValueError):
+                generate(model, 'p', 'test', 'test')
+            self.assertEqual(self.breaker.state, 'half_open')
+            self.assertEqual(generate(model, 'p', 'test', 'test').text, 'ok')
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_client_errors_do_not_open_the_breaker(self):
+        model = MagicMock()
+        model.generate_content.side_effect = ValueError("Unknown field for Schema: minimum")
+        for _ in range(BREAKER.failure_threshold + 1):
+            with self.assertRaises(ValueError):
+                generate(model, 'p', 'test', 'test')
+        self.assertEqual(BREAKER.snapshot()['state'], 'closed')
+        self.assertEqual(BREAKER.consecutive_failures, 0)
+
+    def test_open_breaker_skips_the_model(self):
+        model = MagicMock()
+        model.generate_content.side_effect = RuntimeError("503 Service Unavailable")
+        for _ in range(BREAKER.failure_threshold):
+            with self.assertRaises(RuntimeError):
+                generate(model, 'p', 'test', 'test')
+        with self.assertRaises(CircuitOpenError):
+            generate(model, 'p', 'test', 'test')
+        self.assertEqual(model.generate_content.call_count, BREAKER.failure_threshold)
+
+
+
+class TestSharedClient(unittest.TestCase):
+
+    def test_sdk_is_configured_once_per_key(self):
+        with patch('llm_client.LLM_BACKEND', 'gemini'), patch('llm_client._configured_key', None), \
+                patch('llm_client.genai.configure') as sdk_configure:
+            AntifragileController("key_a").market_intelligence
+            configure("key_a")
+            configure("key_b")
+        self.assertEqual([c.kwargs['api_key'] for c in sdk_configure.call_args_list], ['key_a', 'key_b'])
+
+    def test_agents_are_built_on_first_use(self):
+        controller = AntifragileController("test_key")
+        self.assertEqual(controller.built_agents(), [])
+        mi = controller.market_intelligence
+        self.assertIs(controller.market_intelligence, mi)
+        self.assertEqual(controller.built_agents(), ['market_intelligence'])
+
+    def test_agents_share_one_router(self):
+        controller = AntifragileController("test_key")
+        models = [controller.market_analyst.model, controller.intervention_engine.model,
+                  controller.persona_bot.model, controller.insight_model]
+        self.assertEqual({id(model.router) for model in models}, {id(llm_client.get_router())})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Unit tests for Market Intelligence (yfinance and LLM calls are mocked)
+"""
+import json
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from llm_client import BREAKER
+from market_intelligence import MarketIntelligence
+
+
+class TestBatchExplanations(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(BREAKER.reset)
+        self.mi = MarketIntelligence("test_key")
+        self.mi.model = MagicMock()
+        inputs = lambda ticker, context=None: (self.mi._get_demo_technicals(ticker), self.mi._get_demo_news(ticker))
+        patcher = patch.object(self.mi, '_get_explanation_inputs', side_effect=inputs)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _respond(self, tickers):
+        payload = {'explanations': [{'ticker': t, 'explanation': f"{t} moved on news."} for t in tickers]}
+        self.mi.model.generate_content.return_value = MagicMock(text=json.dumps(payload))
+
+    def test_one_call_populates_per_ticker_cache(self):
+        self._respond(['AAPL', 'TSLA', 'NVDA'])
+        results = self.mi.explain_market_moves(['AAPL', 'TSLA', 'NVDA'])
+
+        self.assertEqual(self.mi.model.generate_content.call_count, 1)
+        self.assertEqual(results['TSLA']['explanation'], "TSLA moved on news.")
+        self.assertEqual(self.mi.explain_market_move('NVDA')['explanation'], "NVDA moved on news.")
+        self.assertEqual(self.mi.model.generate_content.call_count, 1)
+
+    def test_token_budget_splits_batches(self):
+        self._respond(['AAPL', 'TSLA', 'NVDA'])
+        self.mi.explain_market_moves(['AAPL', 'TSLA', 'NVDA'], token_budget=1)
+        self.assertEqual(self.mi.model.generate_content.call_count, 3)
+
+    def test_failed_batch_falls_back_per_ticker(self):
+        self.mi.model.generate_content.side_effect = Exception("503 Service Unavailable")
+        results = self.mi.explain_market_moves(['AAPL', 'SPY'])
+
+        for ticker in ('AAPL', 'SPY'):
+            self.assertTrue(results[ticker]['fallback_mode'])
+            self.assertIn(ticker, results[ticker]['explanation'])
+        self.assertEqual(len(self.mi.explanation_cache), 0)
+
+    def test_missing_ticker_in_response_falls_back(self):
+        self._respond(['AAPL'])
+        results = self.mi.explain_market_moves(['AAPL', 'TSLA'])
+        self.assertNotIn('fallback_mode', results['AAPL'])
+        self.assertTrue(results['TSLA']['fallback_mode'])
+
+    def test_open_circuit_falls_back_without_retry_sleeps(self):
+        self.mi.model.generate_content.side_effect = Exception("503 Service Unavailable")
+        for _ in range(BREAKER.failure_threshold):
+            BREAKER.record_failure()
+
+        started = time.perf_counter()
+        result = self.mi.explain_market_move('AAPL')
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertTrue(result['fallback_mode'])
+        self.mi.model.generate_content.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
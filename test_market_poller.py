@@ -0,0 +1,67 @@
+"""
+Unit tests for the market snapshot table and background poller
+"""
+import time
+import unittest
+from unittest.mock import patch
+
+from perception_layer import MarketStreamProcessor, MarketSnapshotPoller
+
+
+def _state(ticker, volatility=0.01, is_demo=False):
+    state = {'ticker': ticker, 'volatility': volatility, 'regime': 'LOW_VOL'}
+    if is_demo:
+        state['is_demo'] = True
+    return state
+
+
+class TestMarketSnapshotPoller(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = MarketStreamProcessor()
+
+    def test_hot_ticker_skips_fetch(self):
+        self.stream.snapshots.update('AAPL', _state('AAPL'))
+        with patch.object(self.stream, 'fetch_market_state') as fetch:
+            self.assertEqual(self.stream.capture_market_state('AAPL')['ticker'], 'AAPL')
+            fetch.assert_not_called()
+
+    def test_cold_ticker_fetches_once(self):
+        with patch.object(self.stream, 'fetch_market_state', return_value=_state('TSLA')) as fetch:
+            self.stream.capture_market_state('TSLA')
+            self.stream.capture_market_state('TSLA')
+            fetch.assert_called_once_with('TSLA')
+
+    def test_stale_snapshot_is_refetched(self):
+        self.stream.snapshot_max_age = 0
+        self.stream.snapshots.update('NVDA', _state('NVDA'))
+        with patch.object(self.stream, 'fetch_market_state', return_value=_state('NVDA', 0.03)) as fetch:
+            self.assertEqual(self.stream.capture_market_state('NVDA')['volatility'], 0.03)
+            fetch.assert_called_once()
+
+    def test_refresh_keeps_last_good_snapshot(self):
+        poller = MarketSnapshotPoller(self.stream, ['AAPL', 'SPY'], interval_seconds=60)
+        self.stream.snapshots.update('SPY', _state('SPY', 0.015))
+        results = {'AAPL': _state('AAPL', 0.02), 'SPY': _state('SPY', 0.04, is_demo=True)}
+        with patch.object(self.stream, 'fetch_market_state', side_effect=results.get):
+            poller.refresh()
+
+        self.assertEqual(poller.cycles, 1)
+        self.assertEqual(self.stream.snapshots.get('AAPL')['volatility'], 0.02)
+        self.assertEqual(self.stream.snapshots.get('SPY')['volatility'], 0.015)
+
+    def test_start_stop(self):
+        poller = MarketSnapshotPoller(self.stream, ['AAPL'], interval_seconds=60)
+        with patch.object(self.stream, 'fetch_market_state', return_value=_state('AAPL')):
+            poller.start()
+            self.assertTrue(poller.is_running)
+            deadline = time.monotonic() + 2
+            while poller.cycles == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            poller.stop()
+        self.assertFalse(poller.is_running)
+        self.assertIsNotNone(self.stream.snapshots.get('AAPL'))
+
+
+if __name__ == '__main__':
+    unittest.main()
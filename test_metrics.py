@@ -0,0 +1,55 @@
+"""
+Unit tests for Prometheus metrics instrumentation
+"""
+import unittest
+from unittest.mock import MagicMock
+
+import metrics
+from llm_client import BREAKER, generate
+from metrics import MetricsRegistry, track_data
+
+
+class TestMetrics(unittest.TestCase):
+
+    def tearDown(self):
+        BREAKER.reset()
+
+    def test_exposition_format(self):
+        registry = MetricsRegistry()
+        requests = registry.counter('demo_requests_total', 'Demo requests', ('agent',))
+        latency = registry.histogram('demo_seconds', 'Demo latency', ('agent',), buckets=(0.1, 1.0))
+        requests.inc('tilt_detector')
+        latency.observe(0.05, 'tilt_detector')
+        latency.observe(0.5, 'tilt_detector')
+
+        text = registry.render()
+        self.assertIn('# TYPE demo_requests_total counter', text)
+        self.assertIn('demo_requests_total{agent="tilt_detector"} 1', text)
+        self.assertIn('demo_seconds_bucket{agent="tilt_detector",le="0.1"} 1', text)
+        self.assertIn('demo_seconds_bucket{agent="tilt_detector",le="1"} 2', text)
+        self.assertIn('demo_seconds_bucket{agent="tilt_detector",le="+Inf"} 2', text)
+        self.assertIn('demo_seconds_count{agent="tilt_detector"} 2', text)
+
+    def test_generate_records_latency_tokens_and_429s(self):
+        model = MagicMock()
+        model.generate_content.return_value = MagicMock(
+            text="ok", usage_metadata=MagicMock(prompt_token_count=40, candidates_token_count=12)
+        )
+        generate(model, "prompt", 'test_agent', 'ok_endpoint')
+        self.assertEqual(metrics.LLM_LATENCY.count('test_agent', 'ok_endpoint'), 1)
+        self.assertEqual(metrics.LLM_TOKENS.value('test_agent', 'ok_endpoint', 'output'), 12)
+
+        model.generate_content.side_effect = Exception("429 Too Many Requests")
+        with self.assertRaises(Exception):
+            generate(model, "prompt", 'test_agent', 'limited_endpoint')
+        self.assertEqual(metrics.LLM_RATE_LIMITED.value('test_agent', 'limited_endpoint'), 1)
+
+    def test_track_data_counts_errors(self):
+        with self.assertRaises(RuntimeError):
+            with track_data('test_source', 'history'):
+                raise RuntimeError("Yahoo down")
+        self.assertEqual(metrics.DATA_REQUESTS.value('test_source', 'history', 'error'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Unit tests for PersonaBot variant generation (LLM calls are mocked)
+"""
+import json
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from persona_bot import CONTENT_CACHE, PersonaBot, market_snapshot_key
+
+TECHNICALS = {'current_price': 185.5, 'price_change_1d': 1.2, 'rsi': 61.0, 'rsi_signal': 'NEUTRAL', 'trend': 'BULLISH'}
+NEWS = [{'title': 'Apple announces new AI features for iPhone'}]
+
+
+class SlowModel:
+    """Records peak concurrency of generate_content calls"""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return MagicMock(text="LinkedIn post" if "LinkedIn post" in prompt else "Tweet")
+
+
+class TestPersonaVariants(unittest.TestCase):
+
+    def setUp(self):
+        CONTENT_CACHE.clear()
+        self.bot = PersonaBot("test_key")
+
+    def test_variants_generated_concurrently(self):
+        self.bot.model = SlowModel()
+        update = self.bot.generate_market_update("The Technical Analyst", "AAPL", TECHNICALS, NEWS)
+
+        self.assertEqual(self.bot.model.peak, 2)
+        self.assertEqual(update['twitter'], "Tweet")
+        self.assertEqual(update['linkedin'], "LinkedIn post")
+
+    def test_single_prompt_produces_all_variants(self):
+        self.bot.model = MagicMock()
+        self.bot.model.generate_content.return_value = MagicMock(
+            text=json.dumps({'twitter_thread': "1/ Thread", 'linkedin_post': "Post"})
+        )
+        social = self.bot.generate_daily_briefing_social("Markets rallied.", "The Macro Strategist", single_prompt=True)
+
+        self.assertEqual(self.bot.model.generate_content.call_count, 1)
+        self.assertEqual(social['twitter_thread'], "1/ Thread")
+        self.assertEqual(social['linkedin_post'], "Post")
+
+    def test_single_prompt_failure_falls_back_per_platform(self):
+        self.bot.model = MagicMock()
+        self.bot.model.generate_content.side_effect = [
+            MagicMock(text='{"twitter": "only one"}'),
+            MagicMock(text="Tweet"),
+            MagicMock(text="Tweet"),
+        ]
+        update = self.bot.generate_market_update("The Technical Analyst", "AAPL", TECHNICALS, NEWS, single_prompt=True)
+        self.assertEqual(self.bot.model.generate_content.call_count, 3)
+        self.assertEqual(update['twitter'], "Tweet")
+
+
+class TestPersonaContentCache(unittest.TestCase):
+
+    def setUp(self):
+        CONTENT_CACHE.clear()
+        self.bot = PersonaBot("test_key")
+        self.bot.model = MagicMock()
+        self.bot.model.generate_content.return_value = MagicMock(text="Post")
+
+    def test_snapshot_quantization(self):
+        nudged = dict(TECHNICALS, current_price=185.6, rsi=62.0)
+        self.assertEqual(market_snapshot_key(TECHNICALS, NEWS), market_snapshot_key(nudged, NEWS))
+        self.assertNotEqual(market_snapshot_key(TECHNICALS, NEWS), market_snapshot_key(dict(TECHNICALS, rsi=71.0), NEWS))
+        self.assertNotEqual(market_snapshot_key(TECHNICALS, NEWS), market_snapshot_key(TECHNICALS, [{'title': 'Other'}]))
+
+    def test_shared_across_bots_until_regenerate(self):
+        self.bot.generate_market_update("The Technical Analyst", "AAPL", TECHNICALS, NEWS)
+        other = PersonaBot("test_key")
+        other.model = self.bot.model
+        other.generate_market_update("The Technical Analyst", "AAPL", dict(TECHNICALS, current_price=185.4), NEWS)
+        self.assertEqual(self.bot.model.generate_content.call_count, 2)
+
+        other.generate_market_update("The Technical Analyst", "AAPL", TECHNICALS, NEWS, regenerate=True)
+        self.assertEqual(self.bot.model.generate_content.call_count, 4)
+
+    def test_errors_are_not_cached(self):
+        self.bot.model.generate_content.side_effect = Exception("429 Too Many Requests")
+        self.bot.generate_market_update("The Technical Analyst", "AAPL", TECHNICALS, NEWS)
+        self.assertEqual(len(CONTENT_CACHE), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+Unit tests for the universe-wide regime scanner
+"""
+import unittest
+
+import numpy as np
+
+from regime_scanner import RegimeScanner, classify_volatility, classify_regime, panel_volatility
+
+
+def _panel(vols, bars=60, seed=0):
+    """Close panel whose per-column return std is roughly `vols`"""
+    rng = np.random.default_rng(seed)
+    returns = rng.standard_normal((bars, len(vols)))
+    returns = (returns - returns.mean(axis=0)) / returns.std(axis=0, ddof=1) * np.asarray(vols)
+    return 100 * np.cumprod(np.vstack([np.ones(len(vols)), 1 + returns]), axis=0)
+
+
+class TestRegimeScanner(unittest.TestCase):
+
+    def test_panel_volatility_matches_inputs(self):
+        vols = panel_volatility(_panel([0.01, 0.03, 0.08]))
+        np.testing.assert_allclose(vols, [0.01, 0.03, 0.08], rtol=1e-9)
+
+    def test_three_tier_classification(self):
+        self.assertEqual(classify_regime(0.01), 'LOW_VOL')
+        self.assertEqual(classify_regime(0.03), 'HIGH_VOL')
+        self.assertEqual(classify_regime(0.08), 'CRISIS')
+
+    def test_hysteresis_holds_regime_near_boundary(self):
+        prev = np.array([0, 1, 0, 1])
+        vols = np.array([0.021, 0.019, 0.023, 0.017])
+        self.assertEqual(classify_volatility(vols, prev, hysteresis=0.1).tolist(), [0, 1, 1, 0])
+
+    def test_scan_publishes_only_changes(self):
+        scanner = RegimeScanner(['AAPL', 'TSLA', 'BTC-USD'])
+        events = []
+        scanner.subscribe(events.append)
+
+        scanner.scan(_panel([0.01, 0.03, 0.08]))
+        self.assertEqual(len(events), 3)
+        self.assertEqual(scanner.regime_map()['BTC-USD']['regime'], 'CRISIS')
+
+        events.clear()
+        scanner.scan(_panel([0.0105, 0.03, 0.01], seed=1))
+        self.assertEqual([(e['ticker'], e['previous'], e['regime']) for e in events],
+                         [('BTC-USD', 'CRISIS', 'LOW_VOL')])
+
+    def test_missing_data_keeps_last_regime(self):
+        scanner = RegimeScanner(['AAPL', 'TSLA'])
+        scanner.scan(_panel([0.01, 0.03]))
+        panel = _panel([0.01, 0.03])
+        panel[:, 1] = np.nan
+        self.assertEqual(scanner.scan(panel), [])
+        self.assertEqual(scanner.regime_map()['TSLA']['regime'], 'HIGH_VOL')
+
+
+if __name__ == '__main__':
+    unittest.main()
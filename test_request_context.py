@@ -0,0 +1,89 @@
+"""
+Unit tests for the request-scoped data context (yfinance and LLM calls are mocked)
+"""
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from antifragile_controller import AntifragileController
+from fake_llm import FakeGenerativeModel
+from request_context import RequestContext
+
+
+class TestRequestContext(unittest.TestCase):
+
+    def test_memo_fetches_each_key_once_across_threads(self):
+        context = RequestContext(MagicMock())
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            return 'value'
+
+        threads = [threading.Thread(target=context.memo, args=(('k',), fetch)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(context.memo(('k',), fetch), 'value')
+
+    def test_news_is_sliced_from_one_fetch(self):
+        mi = MagicMock()
+        mi.fetch_news.return_value = [{'title': str(i)} for i in range(5)]
+        context = RequestContext(mi)
+        self.assertEqual(len(context.fetch_news('AAPL', max_items=3)), 3)
+        self.assertEqual(len(context.fetch_news('AAPL')), 5)
+        mi.fetch_news.assert_called_once_with('AAPL', max_items=None)
+
+
+class TestControllerFlow(unittest.TestCase):
+
+    def setUp(self):
+        self.controller = AntifragileController("test_key")
+        mi = self.controller.market_intelligence
+        for agent in (mi, self.controller.persona_bot):
+            agent.model = FakeGenerativeModel(profile='instant')
+        self.fetches = {'technicals': 0, 'news': 0}
+
+        def technicals(ticker):
+            self.fetches['technicals'] += 1
+            return {'error': 'yfinance unavailable'}
+
+        def news(ticker, max_items=5):
+            self.fetches['news'] += 1
+            return mi._get_demo_news(ticker)[:max_items]
+
+        for name, func in (('calculate_technicals', technicals), ('fetch_news', news)):
+            patcher = patch.object(mi, name, side_effect=func)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_one_flow_fetches_each_input_once(self):
+        context = self.controller.new_context()
+        self.controller.explain_market_move('AAPL', context=context)
+        self.controller.get_market_sentiment('AAPL', context=context)
+        self.controller.generate_social_content('AAPL', 'The Quantitative Stoic', context=context)
+        self.controller.get_market_technicals('AAPL', context=context)
+        self.assertEqual(self.fetches, {'technicals': 1, 'news': 1})
+
+    def test_without_a_context_every_call_refetches(self):
+        self.controller.get_market_sentiment('AAPL')
+        self.controller.get_market_technicals('AAPL')
+        self.assertEqual(self.fetches['technicals'], 2)
+
+    def test_perception_is_reused_until_a_new_action(self):
+        controller = self.controller
+        states = []
+        controller.market_stream.capture_market_state = lambda ticker: states.append(ticker) or {'ticker': ticker}
+        context = controller.new_context()
+        first = controller.perceive('AAPL', context=context)
+        self.assertIs(controller.perceive('AAPL', context=context), first)
+        controller.perceive('AAPL', 'rapid_click', context=context)
+        self.assertEqual(states, ['AAPL'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Unit tests for the dependency-aware stage executor
+"""
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from antifragile_controller import AntifragileController
+from data_manager import generate_mock_trades
+from deadline import Deadline
+from fake_llm import FakeGenerativeModel, LatencyProfile
+from stage_graph import StageGraph
+
+
+def slow(value, seconds=0.2):
+    def run(results):
+        time.sleep(seconds)
+        return value
+    return run
+
+
+class TestStageGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ThreadPoolExecutor(max_workers=4)
+        self.addCleanup(self.pool.shutdown)
+
+    def test_independent_stages_run_concurrently(self):
+        graph = StageGraph()
+        graph.add('a', slow(1))
+        graph.add('b', slow(2))
+        graph.add('sum', lambda r: r['a'] + r['b'], deps=('a', 'b'))
+
+        started = time.perf_counter()
+        results, timings = graph.run(self.pool)
+        self.assertLess(time.perf_counter() - started, 0.35)
+        self.assertEqual(results['sum'], 3)
+        self.assertGreaterEqual(timings['sum']['start_ms'], 200)
+        self.assertEqual({t['status'] for t in timings.values()}, {'ok'})
+
+    def test_undefined_dependency_is_rejected(self):
+        with self.assertRaises(ValueError):
+            StageGraph().add('b', slow(1), deps=('a',))
+
+    def test_deadline_answers_with_fallback(self):
+        graph = StageGraph()
+        graph.add('fast', slow('ok', 0.0))
+        graph.add('llm', slow('late', 1.0), fallback=lambda r: 'template')
+        graph.add('after', lambda r: r['llm'] + '!', deps=('llm',))
+
+        deadline = Deadline(0.1)
+        results, timings = graph.run(self.pool, deadline)
+        self.assertEqual(results['after'], 'template!')
+        self.assertEqual(timings['llm']['status'], 'fallback')
+        self.assertEqual(deadline.degraded_stages, ['llm'])
+
+    def test_stage_error_without_fallback_propagates(self):
+        graph = StageGraph()
+        graph.add('boom', lambda r: 1 / 0)
+        with self.assertRaises(ZeroDivisionError):
+            graph.run(self.pool)
+
+
+class TestAnalystLoopGraph(unittest.TestCase):
+
+    def test_full_loop_runs_along_the_critical_path(self):
+        controller = AntifragileController("test_key")
+        controller.trader_profile = {'revenge_signals': 3, 'win_rate': 40, 'dominant_bias': 'REVENGE'}
+        controller.market_stream.capture_market_state = lambda ticker: {
+            'ticker': ticker, 'regime': 'HIGH_VOL', 'volatility': 0.03, 'price_change_5d': 1.0
+        }
+        mi = controller.market_intelligence
+        mi._get_explanation_inputs = lambda ticker, context=None: (mi._get_demo_technicals(ticker), mi._get_demo_news(ticker))
+
+        # Every LLM stage takes exactly 100ms on the offline backend
+        latency = LatencyProfile(median_ms=100, p95_ms=100)
+        for agent in (mi, controller.market_analyst, controller.tilt_detector, controller.intervention_engine):
+            agent.model = FakeGenerativeModel(profile=latency)
+        combined_model = FakeGenerativeModel(profile=latency)
+
+        controller.insight_model = combined_model
+
+        started = time.perf_counter()
+        result = controller.run_full_analyst_loop('AAPL', generate_mock_trades(30))
+        elapsed = time.perf_counter() - started
+
+        timings = result['stage_timings']
+        self.assertEqual({name: t['status'] for name, t in timings.items()},
+                         {name: 'ok' for name in ('perceive', 'regime', 'tilt', 'intervention',
+                                                  'explanation', 'combined_insight')})
+        self.assertEqual(result['degraded_stages'], [])
+        self.assertEqual(combined_model.calls, 1)
+
+        # Explanation overlaps the cognitive loop; regime and tilt overlap each other
+        self.assertLess(timings['explanation']['start_ms'], 50)
+        self.assertAlmostEqual(timings['regime']['start_ms'], timings['tilt']['start_ms'], delta=50)
+        self.assertGreaterEqual(timings['intervention']['start_ms'], 100)
+        self.assertGreaterEqual(timings['combined_insight']['start_ms'], 200)
+
+        # Critical path is tilt -> intervention -> combined (~300ms), not the ~500ms sum of stages
+        self.assertLess(elapsed, 0.45)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Unit tests for the Telemetry Journal and session replay
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from antifragile_controller import AntifragileController
+from telemetry_journal import TelemetryJournal, SessionReplayer, record_events
+from perception_layer import UserStreamProcessor
+from cognitive_layer import TiltDetectorAgent
+
+
+class TestTelemetryJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "session.journal")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_append_and_read_back(self):
+        with TelemetryJournal(self.path) as journal:
+            journal.append(7, 'place_order', 10.0, ts=1.0)
+            journal.append(7, 'mouse_speed', 640.0, ts=1.5)
+            journal.append(8, 'not_an_action', ts=2.0)
+
+            recs = journal.records()
+            self.assertEqual(len(recs), 3)
+            self.assertEqual(recs['trader_id'].tolist(), [7, 7, 8])
+            self.assertEqual(recs['action'].tolist(), [1, 100, 0])
+            self.assertEqual(recs['value'][1], 640.0)
+            self.assertEqual(len(journal.session(trader_id=7)), 2)
+
+    def test_reopen_is_append_only(self):
+        with TelemetryJournal(self.path) as journal:
+            journal.append(1, 'place_order', ts=1.0)
+        with TelemetryJournal(self.path) as journal:
+            journal.append(1, 'cancel_order', ts=2.0)
+        with TelemetryJournal(self.path, readonly=True) as journal:
+            self.assertEqual(journal.records()['ts'].tolist(), [1.0, 2.0])
+            with self.assertRaises(IOError):
+                journal.append(1, 'place_order')
+
+    def test_user_stream_journals_live_events(self):
+        with TelemetryJournal(self.path) as journal:
+            stream = UserStreamProcessor(journal=journal, trader_id=3)
+            stream.capture_interaction('cancel_order')
+            stream.capture_mouse_speed(120.0)
+            self.assertEqual(journal.session(trader_id=3)['action'].tolist(), [2, 100])
+
+    def test_appends_reach_disk_without_close(self):
+        journal = TelemetryJournal(self.path)
+        self.addCleanup(journal.close)
+        stream = UserStreamProcessor(journal=journal, trader_id=5)
+        stream.capture_interaction('place_order', {'value': 'not-a-number'})
+        stream.capture_interaction('place_order', {'value': 12.5})
+
+        # A second reader sees both records while the writer is still open (crash-safe)
+        with TelemetryJournal(self.path, readonly=True) as reader:
+            self.assertEqual(reader.records()['value'].tolist(), [0.0, 12.5])
+
+    def test_controller_journals_under_its_trader_id(self):
+        with patch('config.ENABLE_TELEMETRY_JOURNAL', True), patch('config.TELEMETRY_JOURNAL_PATH', self.path):
+            controller = AntifragileController("test_key", trader_id=11)
+            controller.user_stream.capture_interaction('place_order')
+        self.addCleanup(controller.close_journal)
+        with TelemetryJournal(self.path, readonly=True) as reader:
+            self.assertEqual(reader.records()['trader_id'].tolist(), [11])
+
+    def test_replay_detects_erratic_session(self):
+        with TelemetryJournal(self.path) as journal:
+            # Ten cancel/place pairs within a minute: erratic behavior
+            events = []
+            for i in range(10):
+                events.append((i * 5.0, 'cancel_order', 0.0))
+                events.append((i * 5.0 + 1, 'place_order', 0.0))
+            record_events(journal, events, trader_id=42)
+
+            replayer = SessionReplayer(journal, tilt_detector=TiltDetectorAgent("test_key"))
+            result = replayer.replay(trader_id=42, market_state={'regime': 'HIGH_VOL'})
+
+        self.assertEqual(result['events'], 20)
+        self.assertTrue(result['final_behavior']['is_erratic'])
+        self.assertEqual(len(result['tilt_episodes']), 1)
+        self.assertEqual(result['tilt_episodes'][0]['peak_score'], 7)
+        self.assertGreater(result['events_per_second'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
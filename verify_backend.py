@@ -1,14 +1,25 @@
-import requests
+import os
 import sys
 
+import requests
+
+# --offline: run the API in-process on the fake LLM backend (no server, key or Gemini access needed)
+if "--offline" in sys.argv:
+    os.environ["LLM_BACKEND"] = "fake"
+    from fastapi.testclient import TestClient
+    from api.main import app
+    client, base_url = TestClient(app), ""
+else:
+    client, base_url = requests, "http://localhost:8001"
+
 try:
-    print("Testing backend on port 8001...")
-    response = requests.get("http://localhost:8001/docs")
+    print(f"Testing backend {'in-process (offline)' if not base_url else 'on port 8001'}...")
+    response = client.get(f"{base_url}/docs")
     if response.status_code == 200:
-        print("SUCCESS: Backend is responding on port 8001")
+        print("SUCCESS: Backend is responding" + (" on port 8001" if base_url else ""))
         
         # Check trades endpoint
-        trades_response = requests.get("http://localhost:8001/api/trades")
+        trades_response = client.get(f"{base_url}/api/trades")
         if trades_response.status_code == 200:
             print(f"SUCCESS: Trades endpoint working. Count: {trades_response.json().get('count', 0)}")
         else: